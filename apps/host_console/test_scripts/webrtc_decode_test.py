@@ -11,20 +11,162 @@ This script:
   2) starts loopback
   3) gets offer
   4) answers with aiortc
-  5) receives video frames and saves first frame
+  5) receives video frames, saves the first one and logs every frame
+  6) writes a receiver-side report (fps, jitter, freezes, stalls) to JSON
+
+Receiver metrics come from what actually arrives here, not from the daemon's
+own counters. Per frame it logs the arrival time, PTS, resolution and (when
+aiortc's decoder can be wrapped) decode time. Over the measurement window it
+reports:
+
+  - receivedFps: frames / arrival span; ptsFps: frames / PTS span (the rate
+    the sender stamped)
+  - interval stats and jitter (stdev of inter-arrival intervals, plus the
+    RFC 3550 estimator of arrival vs PTS spacing)
+  - freezes: intervals > max(3 * avg, avg + 150 ms) over the previous 30
+    intervals (the WebRTC stats definition)
+  - stalls: intervals longer than --stall-ms
+
+Example:
+  python3 apps/host_console/test_scripts/webrtc_decode_test.py --window 10 --fps 60
 """
 
 from __future__ import annotations
 
+import argparse
 import asyncio
 import json
-import os
+import statistics
+import sys
 import time
 from pathlib import Path
 
-async def run() -> int:
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "scripts" / "python"))
+
+# Intervals used for the running average in freeze detection.
+FREEZE_HISTORY = 30
+
+
+def install_decode_timer(decode_ms: dict) -> bool:
+    """Wrap aiortc's decoders so each decoded frame's decode time lands in
+    `decode_ms[pts]`. aiortc decodes on a worker thread, so recv() timing
+    alone cannot see it. Returns False if this aiortc version has no hook.
+    """
+    try:
+        import aiortc.rtcrtpreceiver as receiver  # type: ignore
+    except Exception:
+        return False
+    get_decoder = getattr(receiver, "get_decoder", None)
+    if get_decoder is None:
+        return False
+
+    class TimedDecoder:
+        def __init__(self, inner):
+            self.inner = inner
+
+        def decode(self, encoded_frame):
+            t0 = time.perf_counter()
+            frames = self.inner.decode(encoded_frame)
+            ms = (time.perf_counter() - t0) * 1000.0
+            for f in frames:
+                if getattr(f, "pts", None) is not None:
+                    decode_ms[f.pts] = ms
+            return frames
+
+        def __getattr__(self, name):
+            return getattr(self.inner, name)
+
+    receiver.get_decoder = lambda codec: TimedDecoder(get_decoder(codec))
+    return True
+
+
+def percentile(values: list, pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def _r(value: float | None, digits: int = 3) -> float | None:
+    return None if value is None else round(value, digits)
+
+
+def summarize(frames: list[dict], stall_ms: float, target_fps: float) -> dict:
+    """Receiver metrics for `frames` (dicts with t seconds, ptsS, w, h, decodeMs)."""
+    n = len(frames)
+    out: dict = {"frames": n}
+    if n == 0:
+        return out
+    times = [f["t"] for f in frames]
+    span = times[-1] - times[0]
+    intervals = [(b - a) * 1000.0 for a, b in zip(times, times[1:])]
+    out["durationS"] = _r(span)
+    out["receivedFps"] = _r((n - 1) / span) if span > 0 else None
+    if target_fps > 0 and out["receivedFps"] is not None:
+        out["fpsRatio"] = _r(out["receivedFps"] / target_fps)
+
+    pts = [f["ptsS"] for f in frames if f["ptsS"] is not None]
+    if len(pts) == n and pts[-1] > pts[0]:
+        out["ptsFps"] = _r((n - 1) / (pts[-1] - pts[0]))
+
+    if intervals:
+        out["intervalMs"] = {
+            "mean": _r(statistics.fmean(intervals)),
+            "p50": _r(percentile(intervals, 50)),
+            "p95": _r(percentile(intervals, 95)),
+            "p99": _r(percentile(intervals, 99)),
+            "max": _r(max(intervals)),
+        }
+        out["jitterMs"] = _r(statistics.pstdev(intervals))
+
+    if len(pts) == n and n > 1:
+        # RFC 3550 interarrival jitter, with PTS standing in for RTP timestamps.
+        j = 0.0
+        for i in range(1, n):
+            d = (times[i] - times[i - 1]) - (pts[i] - pts[i - 1])
+            j += (abs(d) - j) / 16.0
+        out["rfc3550JitterMs"] = _r(j * 1000.0)
+
+    freezes = []
+    for i, gap in enumerate(intervals):
+        history = intervals[max(0, i - FREEZE_HISTORY):i]
+        if not history:
+            continue
+        avg = statistics.fmean(history)
+        if gap > max(3.0 * avg, avg + 150.0):
+            freezes.append(gap)
+    out["freezeCount"] = len(freezes)
+    out["totalFreezeMs"] = _r(sum(freezes))
+
+    stalls = [{"atS": _r(times[i] - times[0]), "durationMs": _r(gap)}
+              for i, gap in enumerate(intervals) if gap > stall_ms]
+    out["stallCount"] = len(stalls)
+    out["totalStallMs"] = _r(sum(s["durationMs"] for s in stalls))
+    out["stalls"] = stalls
+
+    sizes: dict = {}
+    for f in frames:
+        key = f"{f['w']}x{f['h']}"
+        sizes[key] = sizes.get(key, 0) + 1
+    out["resolutions"] = sizes
+
+    decode = [f["decodeMs"] for f in frames if f["decodeMs"] is not None]
+    if decode:
+        out["decodeMs"] = {
+            "mean": _r(statistics.fmean(decode)),
+            "p50": _r(percentile(decode, 50)),
+            "p95": _r(percentile(decode, 95)),
+            "max": _r(max(decode)),
+        }
+    return out
+
+
+async def run(args: argparse.Namespace) -> int:
     try:
-        import websockets  # type: ignore
+        from itermremote_client import DEFAULT_WS_URL, DaemonClient
         from aiortc import RTCPeerConnection, RTCSessionDescription  # type: ignore
         from aiortc.mediastreams import MediaStreamError  # type: ignore
         from av import VideoFrame  # type: ignore
@@ -33,40 +175,30 @@ async def run() -> int:
         print("Install: python3 -m pip install aiortc av pillow websockets")
         return 2
 
-    ws_url = os.environ.get("ITERMREMOTE_WS_URL", "ws://127.0.0.1:8766")
-    out_dir = Path(f"/tmp/itermremote-webrtc-decode-{int(time.time())}")
+    ws_url = args.url or DEFAULT_WS_URL
+    out_dir = Path(args.out_dir or f"/tmp/itermremote-webrtc-decode-{int(time.time())}")
     out_dir.mkdir(parents=True, exist_ok=True)
+    report_path = Path(args.report) if args.report else out_dir / "receiver_report.json"
 
     print(f"[decode] ws={ws_url}")
     print(f"[decode] out_dir={out_dir}")
 
-    async with websockets.connect(ws_url) as ws:
+    decode_ms: dict = {}
+    decode_timing = install_decode_timer(decode_ms)
+
+    async with DaemonClient(ws_url) as client:
         async def send_cmd(target: str, action: str, payload: dict | None = None) -> dict:
-            cmd_id = f"cmd-{int(time.time()*1000)}-{target}-{action}"
-            msg = {
-                "version": 1,
-                "type": "cmd",
-                "id": cmd_id,
-                "target": target,
-                "action": action,
-            }
-            if payload is not None:
-                msg["payload"] = payload
-            await ws.send(json.dumps(msg))
-            while True:
-                raw = await ws.recv()
-                if not isinstance(raw, str):
-                    continue
-                data = json.loads(raw)
-                if data.get("type") == "ack" and data.get("id") == cmd_id:
-                    return data
+            return await client.request(target, action, payload)
 
         # Start loopback
-        start_ack = await send_cmd("webrtc", "startLoopback", {
-            "sourceType": "screen",
-            "fps": 30,
-            "bitrateKbps": 1500,
-        })
+        start_payload = {
+            "sourceType": args.source_type,
+            "fps": args.fps,
+            "bitrateKbps": args.bitrate_kbps,
+        }
+        if args.source_id:
+            start_payload["sourceId"] = args.source_id
+        start_ack = await send_cmd("webrtc", "startLoopback", start_payload)
         print(f"[decode] startLoopback success={start_ack.get('success')}")
         if not start_ack.get("success"):
             (out_dir / "start_error.json").write_text(json.dumps(start_ack, indent=2))
@@ -86,27 +218,47 @@ async def run() -> int:
             return 1
 
         pc = RTCPeerConnection()
-        frame_count = 0
+        frames: list[dict] = []
         first_frame_path = out_dir / "first_frame.png"
+        done = asyncio.Event()
+        t_answer = time.perf_counter()
+        window_end: float | None = None
 
         @pc.on("track")
         async def on_track(track):
-            nonlocal frame_count
+            nonlocal window_end
             if track.kind != "video":
                 return
             print("[decode] video track received")
-            while frame_count < 30:
+            while not done.is_set():
                 try:
                     frame = await track.recv()
                 except MediaStreamError:
                     break
-                if isinstance(frame, VideoFrame):
-                    frame_count += 1
-                    # Save first frame and log every 10 frames
-                    if frame_count == 1 or frame_count % 10 == 0:
-                        img = frame.to_image()
-                        img.save(first_frame_path)
-                        print(f"[decode] saved frame {frame_count} to {first_frame_path}")
+                arrival = time.perf_counter()
+                if not isinstance(frame, VideoFrame):
+                    continue
+                if window_end is None:
+                    window_end = arrival + args.warmup + args.window
+                pts_s = float(frame.pts * frame.time_base) if frame.pts is not None and frame.time_base else None
+                frames.append({
+                    "i": len(frames),
+                    "t": arrival - t_answer,
+                    "pts": frame.pts,
+                    "ptsS": pts_s,
+                    "w": frame.width,
+                    "h": frame.height,
+                    "decodeMs": decode_ms.pop(frame.pts, None),
+                })
+                if len(frames) == 1:
+                    # Only the first frame: to_image() on later frames would skew arrivals.
+                    frame.to_image().save(first_frame_path)
+                    print(f"[decode] saved first frame to {first_frame_path}")
+                elif len(frames) % 100 == 0:
+                    print(f"[decode] frames={len(frames)}")
+                if arrival >= window_end:
+                    done.set()
+            done.set()
 
         @pc.on("icecandidate")
         async def on_ice(candidate):
@@ -128,21 +280,65 @@ async def run() -> int:
         })
         print(f"[decode] setRemoteDescription success={answer_ack.get('success')}")
 
-        deadline = time.time() + 15
-        while time.time() < deadline and frame_count < 30:
-            await asyncio.sleep(0.2)
+        try:
+            await asyncio.wait_for(done.wait(), timeout=args.first_frame_timeout + args.warmup + args.window)
+        except asyncio.TimeoutError:
+            pass
+        done.set()
 
-        print(f"[decode] frames_received={frame_count}")
-        if frame_count == 0:
-            print("[decode] No frames received")
-            return 1
+        print(f"[decode] frames_received={len(frames)}")
 
+        stats_ack = await send_cmd("webrtc", "getLoopbackStats")
         stop_ack = await send_cmd("webrtc", "stopLoopback")
         print(f"[decode] stopLoopback success={stop_ack.get('success')}")
 
         await pc.close()
 
+    warm = [f for f in frames if frames and f["t"] >= frames[0]["t"] + args.warmup]
+    report = {
+        "wsUrl": ws_url,
+        "targetFps": args.fps,
+        "windowS": args.window,
+        "warmupS": args.warmup,
+        "stallMs": args.stall_ms,
+        "decodeTiming": decode_timing,
+        "firstFrameMs": _r(frames[0]["t"] * 1000.0) if frames else None,
+        "receiver": summarize(warm, args.stall_ms, args.fps),
+        "daemonStats": (stats_ack.get("data") or {}).get("stats") if stats_ack.get("success") else None,
+        "frameLog": [dict(f, t=_r(f["t"], 6)) for f in frames],
+    }
+    report_path.write_text(json.dumps(report, indent=2))
+
+    rx = report["receiver"]
+    print(f"[decode] receivedFps={rx.get('receivedFps')} target={args.fps} jitterMs={rx.get('jitterMs')} "
+          f"freezes={rx.get('freezeCount')} stalls={rx.get('stallCount')}")
+    print(f"[decode] report={report_path}")
+
+    if not frames:
+        print("[decode] No frames received")
+        return 1
+    if args.min_fps and (rx.get("receivedFps") or 0.0) < args.min_fps:
+        print(f"[decode] receivedFps below --min-fps {args.min_fps}")
+        return 1
     return 0
 
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Receive the daemon's loopback stream with aiortc and measure it")
+    ap.add_argument("--url", default=None, help="Daemon WebSocket URL (default: ITERMREMOTE_WS_URL or local)")
+    ap.add_argument("--source-type", default="screen")
+    ap.add_argument("--source-id", default=None)
+    ap.add_argument("--fps", type=int, default=30, help="Requested capture fps")
+    ap.add_argument("--bitrate-kbps", type=int, default=1500)
+    ap.add_argument("--window", type=float, default=10.0, help="Measurement window in seconds")
+    ap.add_argument("--warmup", type=float, default=1.0, help="Seconds after the first frame to leave out")
+    ap.add_argument("--stall-ms", type=float, default=500.0, help="Inter-frame gap counted as a stall")
+    ap.add_argument("--first-frame-timeout", type=float, default=15.0)
+    ap.add_argument("--min-fps", type=float, default=0.0, help="Fail if receivedFps is below this")
+    ap.add_argument("--out-dir", default=None)
+    ap.add_argument("--report", default=None, help="Report path (default: <out-dir>/receiver_report.json)")
+    return asyncio.run(run(ap.parse_args()))
+
+
 if __name__ == "__main__":
-    raise SystemExit(asyncio.run(run()))
+    raise SystemExit(main())
@@ -1,13 +1,21 @@
 import 'dart:async';
 import 'dart:convert';
 import 'dart:io';
+import 'dart:typed_data';
 
 import 'package:cloudplayplus_core/cloudplayplus_core.dart';
 
+import 'iterm2_worker_client.dart';
+
 /// Bridge to iTerm2 Python API.
 ///
 /// In Phase-0/Phase-2 bootstrap, this is wired to mock scripts under
 /// `scripts/python/` so we can unit test deterministically.
+///
+/// By default calls go through the persistent `iterm2_worker.py` process,
+/// which keeps a single iTerm2 API connection open. If the worker cannot be
+/// started, the bridge falls back to the one-shot scripts. Set
+/// `ITERMREMOTE_ITERM2_WORKER=0` to always use the one-shot scripts.
 class ITerm2Bridge {
   /// Python script paths are repo-relative by default.
   ///
@@ -17,7 +25,20 @@ class ITerm2Bridge {
   final String sendTextScriptPath;
   final String sessionReaderScriptPath;
   final String windowFramesScriptPath;
+  final String workerScriptPath;
   final String? repoRoot;
+  final bool? _useWorker;
+
+  ITerm2WorkerClient? _worker;
+  int _workerFailures = 0;
+
+  /// Consecutive worker failures (errors or timeouts) before the bridge
+  /// stops trying the worker.
+  static const int _maxWorkerFailures = 3;
+
+  /// Ops that must not be re-run through a one-shot script after a worker
+  /// timeout: the worker may still apply them.
+  static const Set<String> _noRetryOps = {'sendText'};
 
   ITerm2Bridge({
     this.sourcesScriptPath = 'scripts/python/iterm2_sources.py',
@@ -25,15 +46,20 @@ class ITerm2Bridge {
     this.sendTextScriptPath = 'scripts/python/iterm2_send_text.py',
     this.sessionReaderScriptPath = 'scripts/python/iterm2_session_reader.py',
     this.windowFramesScriptPath = 'scripts/python/iterm2_window_frames.py',
+    this.workerScriptPath = 'scripts/python/iterm2_worker.py',
     this.repoRoot,
-  });
+    bool? useWorker,
+  }) : _useWorker = useWorker;
+
+  bool get useWorker =>
+      _useWorker ??
+      (!forceMockScripts &&
+          (Platform.environment['ITERMREMOTE_ITERM2_WORKER'] ?? '').trim() !=
+              '0');
 
   Future<List<Map<String, dynamic>>> getWindowFrames() async {
-    final res = await _runPythonFile(windowFramesScriptPath, const []);
-    if (res.exitCode != 0) {
-      throw ITerm2Exception('getWindowFrames failed: ${res.stderr}');
-    }
-    final any = jsonDecode((res.stdout as String).trim());
+    final any = await _invoke(
+        'getWindowFrames', const {}, windowFramesScriptPath, const []);
     if (any is! Map) return const [];
     final listAny = any['windows'];
     if (listAny is! List) return const [];
@@ -47,12 +73,8 @@ class ITerm2Bridge {
 
   /// List iTerm2 sessions (panels).
   Future<List<ITerm2SessionInfo>> getSessions() async {
-    final res = await _runPythonFile(sourcesScriptPath, const []);
-    if (res.exitCode != 0) {
-      throw ITerm2Exception('getSessions failed: ${res.stderr}');
-    }
-    final outStr = (res.stdout as String).trim();
-    final any = jsonDecode(outStr);
+    final any =
+        await _invoke('getSessions', const {}, sourcesScriptPath, const []);
     if (any is! Map) return const [];
     final panelsAny = any['panels'];
     if (panelsAny is! List) return const [];
@@ -66,14 +88,10 @@ class ITerm2Bridge {
 
   /// Activate a session and return metadata for cropping.
   Future<Map<String, dynamic>> activateSession(String sessionId) async {
-    final res = await _runPythonFile(activateScriptPath, [sessionId]);
-    if (res.exitCode != 0) {
-      throw ITerm2Exception('activateSession failed: ${res.stderr}');
-    }
-    final outStr = (res.stdout as String).trim();
+    final any = await _invoke('activateSession', {'sessionId': sessionId},
+        activateScriptPath, [sessionId]);
     // ignore: avoid_print
-    print('ITerm2Bridge.activateSession stdout: $outStr');
-    final any = jsonDecode(outStr);
+    print('ITerm2Bridge.activateSession result: ${jsonEncode(any)}');
     if (any is Map) {
       return any.map((k, v) => MapEntry(k.toString(), v));
     }
@@ -83,27 +101,34 @@ class ITerm2Bridge {
   /// Send UTF-8 text into a session.
   Future<bool> sendText(String sessionId, String text) async {
     final b64 = base64Encode(utf8.encode(text));
-    final res = await _runPythonFile(sendTextScriptPath, [sessionId, b64]);
-    if (res.exitCode != 0) return false;
-    final out = (res.stdout as String).trim();
-    if (out.isEmpty) return true;
+    final Object? any;
     try {
-      final any = jsonDecode(out);
-      if (any is Map && any['ok'] is bool) return any['ok'] as bool;
-    } catch (_) {}
+      any = await _invoke('sendText', {'sessionId': sessionId, 'text': text},
+          sendTextScriptPath, [sessionId, b64]);
+    } on ITerm2Exception {
+      return false;
+    } on TimeoutException {
+      return false;
+    } on FormatException {
+      return true;
+    }
+    if (any is Map && any['ok'] is bool) return any['ok'] as bool;
     return true;
   }
 
   /// Read session buffer (chat mode). Returns decoded UTF-8 text.
   Future<String> readSessionBuffer(String sessionId, int maxBytes) async {
-    final res =
-        await _runPythonFile(sessionReaderScriptPath, [sessionId, '$maxBytes']);
-    if (res.exitCode != 0) {
-      throw ITerm2Exception('readSessionBuffer failed: ${res.stderr}');
-    }
-    final any = jsonDecode((res.stdout as String).trim());
+    final any = await _invoke(
+        'readSessionBuffer',
+        {'sessionId': sessionId, 'maxBytes': maxBytes},
+        sessionReaderScriptPath,
+        [sessionId, '$maxBytes']);
     if (any is! Map) return '';
     final textB64 = any['text'];
+    if (textB64 is Uint8List) {
+      // Binary framing: raw UTF-8, no base64 round-trip.
+      return utf8.decode(textB64, allowMalformed: true);
+    }
     if (textB64 is! String || textB64.isEmpty) return '';
     try {
       return utf8.decode(base64Decode(textB64));
@@ -112,12 +137,108 @@ class ITerm2Bridge {
     }
   }
 
-  Future<ProcessResult> _runPythonFile(String scriptPath, List<String> args) {
-    final cwd = Directory.current.path;
-    final effectiveScriptPath = forceMockScripts
-        ? scriptPath.replaceAll(RegExp(r'\.py$'), '_mock.py')
-        : scriptPath;
-    final configuredRoot = (repoRoot ?? Platform.environment['ITERMREMOTE_REPO_ROOT'] ?? '').trim();
+  /// Incremental buffer read: lines from [cursor] on.
+  ///
+  /// Pass the `cursor` and `generation` of the previous result to get only
+  /// changed lines (`{"unchanged": true}` when nothing moved). See
+  /// `scripts/python/iterm2_session_reader.py` for the result shape.
+  Future<Map<String, dynamic>> readSessionBufferDelta(
+    String sessionId, {
+    int cursor = 0,
+    int? sinceGeneration,
+  }) async {
+    final any = await _invoke(
+        'readSessionBuffer',
+        {
+          'sessionId': sessionId,
+          'cursor': cursor,
+          if (sinceGeneration != null) 'sinceGeneration': sinceGeneration,
+        },
+        sessionReaderScriptPath,
+        [sessionId, '0', '$cursor']);
+    if (any is! Map) return const {};
+    return any.map((k, v) => MapEntry(k.toString(), v));
+  }
+
+  /// Stop the persistent worker, if one is running.
+  Future<void> dispose() async {
+    final worker = _worker;
+    _worker = null;
+    await worker?.close();
+  }
+
+  /// Run [op] via the worker when enabled, else via the one-shot [scriptPath].
+  ///
+  /// Returns the decoded JSON output (`null` when the script printed nothing).
+  Future<Object?> _invoke(
+    String op,
+    Map<String, Object?> args,
+    String scriptPath,
+    List<String> argv,
+  ) async {
+    final worker = _workerOrNull();
+    if (worker != null) {
+      try {
+        final result = await worker.call(op, args,
+            timeout: Duration(milliseconds: _timeoutMs));
+        _workerFailures = 0;
+        return result;
+      } on ITerm2WorkerException catch (e) {
+        _workerFailures++;
+        // ignore: avoid_print
+        print('ITerm2Bridge: worker $op failed ($e), using one-shot script');
+      } on TimeoutException catch (e) {
+        // A worker that is alive but stuck never reports an error; count the
+        // timeout and replace the process so the next call starts fresh.
+        _workerFailures++;
+        // ignore: avoid_print
+        print('ITerm2Bridge: worker $op timed out ($e), restarting worker');
+        unawaited(_restartWorker(worker));
+        if (_noRetryOps.contains(op)) rethrow;
+      }
+    }
+    final res = await _runPythonFile(scriptPath, argv);
+    if (res.exitCode != 0) {
+      throw ITerm2Exception('$op failed: ${res.stderr}');
+    }
+    final out = (res.stdout as String).trim();
+    if (out.isEmpty) return null;
+    return jsonDecode(out);
+  }
+
+  Future<void> _restartWorker(ITerm2WorkerClient worker) async {
+    if (identical(_worker, worker)) _worker = null;
+    await worker.close();
+  }
+
+  ITerm2WorkerClient? _workerOrNull() {
+    if (!useWorker || _workerFailures >= _maxWorkerFailures) return null;
+    final existing = _worker;
+    if (existing != null) return existing;
+    final path = _resolveScript(workerScriptPath);
+    if (path == null) return null;
+    final root = _effectiveRepoRoot;
+    return _worker = ITerm2WorkerClient(
+      scriptPath: path,
+      workingDirectory: root.isNotEmpty ? root : null,
+      binaryFraming:
+          (Platform.environment['ITERMREMOTE_BRIDGE_FRAMING'] ?? '').trim() ==
+              'binary',
+      environment: {
+        if (root.isNotEmpty) 'ITERMREMOTE_REPO_ROOT': root,
+      },
+    );
+  }
+
+  int get _timeoutMs =>
+      int.tryParse(Platform.environment['ITERMREMOTE_PY_TIMEOUT_MS'] ?? '') ??
+      3000;
+
+  String get _effectiveRepoRoot =>
+      (repoRoot ?? Platform.environment['ITERMREMOTE_REPO_ROOT'] ?? '').trim();
+
+  String? _resolveScript(String effectiveScriptPath) {
+    final configuredRoot = _effectiveRepoRoot;
     final candidates = <String>[
       // Add the script path itself (may be absolute).
       effectiveScriptPath,
@@ -134,9 +255,21 @@ class ITerm2Bridge {
     for (final p in candidates) {
       final f = File(p);
       if (f.existsSync()) {
-        return _runPythonWithFallback(f.path, args);
+        return f.path;
       }
     }
+    return null;
+  }
+
+  Future<ProcessResult> _runPythonFile(String scriptPath, List<String> args) {
+    final cwd = Directory.current.path;
+    final effectiveScriptPath = forceMockScripts
+        ? scriptPath.replaceAll(RegExp(r'\.py$'), '_mock.py')
+        : scriptPath;
+    final path = _resolveScript(effectiveScriptPath);
+    if (path != null) {
+      return _runPythonWithFallback(path, args);
+    }
 
     return Future.error(ITerm2Exception(
         'missing script: $effectiveScriptPath (cwd=$cwd). Set ITERMREMOTE_REPO_ROOT to workspace root.'));
@@ -162,10 +295,8 @@ class ITerm2Bridge {
 
   Future<ProcessResult> _runPythonWithTimeout(
       String bin, String scriptPath, List<String> args) async {
-    final timeoutMs = int.tryParse(
-            Platform.environment['ITERMREMOTE_PY_TIMEOUT_MS'] ?? '') ??
-        3000;
-    final repoRoot = (this.repoRoot ?? Platform.environment['ITERMREMOTE_REPO_ROOT'] ?? '').trim();
+    final timeoutMs = _timeoutMs;
+    final repoRoot = _effectiveRepoRoot;
     final proc = await Process.start(
       bin,
       [scriptPath, ...args],
@@ -0,0 +1,260 @@
+import 'dart:async';
+import 'dart:convert';
+import 'dart:io';
+import 'dart:typed_data';
+
+/// Client for the long-lived `scripts/python/iterm2_worker.py` process.
+///
+/// The worker keeps one iTerm2 API connection open and speaks
+/// newline-delimited JSON on stdin/stdout:
+///
+///   -> {"id": 1, "op": "getSessions", "args": {}}
+///   <- {"id": 1, "result": {...}}  or  {"id": 1, "error": "..."}
+///
+/// Lines without an `id` but with an `event` field (e.g. `sessionBuffer`
+/// pushes from `subscribeSessionBuffer`) are delivered on [events].
+///
+/// With [binaryFraming] the worker runs with `--framing binary`: every
+/// message is `u32 headerLen | u32 payloadLen | header JSON | payload`, and
+/// `{"$payload": [offset, length]}` references in the header are resolved to
+/// [Uint8List] views of the payload (e.g. raw UTF-8 session text instead of
+/// base64). See `scripts/python/bridge_framing.py`.
+///
+/// The process is started lazily on the first [call] and restarted on the
+/// next call if it exits.
+class ITerm2WorkerClient {
+  ITerm2WorkerClient({
+    required this.scriptPath,
+    this.workingDirectory,
+    this.environment = const {},
+    this.binaryFraming = false,
+    this.pythonCandidates = const [
+      '/usr/bin/python3',
+      'python3',
+      '/usr/local/bin/python3',
+    ],
+  });
+
+  final String scriptPath;
+  final String? workingDirectory;
+  final Map<String, String> environment;
+  final List<String> pythonCandidates;
+  final bool binaryFraming;
+
+  Process? _proc;
+  Future<Process>? _starting;
+  int _nextId = 0;
+  final Map<int, Completer<Object?>> _pending = {};
+  final StreamController<Map<String, Object?>> _events =
+      StreamController<Map<String, Object?>>.broadcast();
+
+  bool get isRunning => _proc != null;
+
+  /// Unsolicited worker events (`{"event": ..., ...}`).
+  Stream<Map<String, Object?>> get events => _events.stream;
+
+  /// Send [op] with [args] and return the decoded `result` field.
+  ///
+  /// Throws [ITerm2WorkerException] if the worker fails or exits, and
+  /// [TimeoutException] if no response arrives within [timeout].
+  Future<Object?> call(
+    String op,
+    Map<String, Object?> args, {
+    Duration timeout = const Duration(seconds: 3),
+  }) async {
+    final proc = await _ensureStarted();
+    final id = ++_nextId;
+    final completer = Completer<Object?>();
+    _pending[id] = completer;
+    final req = {'id': id, 'op': op, 'args': args};
+    if (binaryFraming) {
+      proc.stdin.add(_encodeFrame(req));
+    } else {
+      proc.stdin.writeln(jsonEncode(req));
+    }
+    try {
+      return await completer.future.timeout(timeout);
+    } on TimeoutException {
+      // Not an ITerm2WorkerException on purpose: the worker may still apply
+      // the request (e.g. sendText), so callers must not blindly retry it.
+      _pending.remove(id);
+      throw TimeoutException(
+          'iterm2 worker $op timed out after ${timeout.inMilliseconds}ms',
+          timeout);
+    }
+  }
+
+  Future<void> close() async {
+    final proc = _proc;
+    _proc = null;
+    _starting = null;
+    if (proc == null) return;
+    try {
+      await proc.stdin.close();
+    } catch (_) {}
+    try {
+      proc.kill(ProcessSignal.sigterm);
+    } catch (_) {}
+    _failPending('worker closed');
+  }
+
+  Future<Process> _ensureStarted() {
+    final proc = _proc;
+    if (proc != null) return Future.value(proc);
+    return _starting ??= _start().whenComplete(() => _starting = null);
+  }
+
+  Future<Process> _start() async {
+    Object? lastError;
+    for (final bin in pythonCandidates) {
+      try {
+        final proc = await Process.start(
+          bin,
+          [scriptPath, if (binaryFraming) ...['--framing', 'binary']],
+          workingDirectory: workingDirectory,
+          environment: {
+            'ITERMREMOTE_NO_PROMPT': '1',
+            'PYTHONUNBUFFERED': '1',
+            ...environment,
+          },
+        );
+        _attach(proc);
+        return proc;
+      } catch (e) {
+        lastError = e;
+      }
+    }
+    throw ITerm2WorkerException('no python runtime available: $lastError');
+  }
+
+  void _attach(Process proc) {
+    _proc = proc;
+    if (binaryFraming) {
+      final decoder = _FrameDecoder();
+      proc.stdout.listen((chunk) {
+        for (final msg in decoder.feed(chunk)) {
+          _onMessage(msg);
+        }
+      });
+    } else {
+      proc.stdout
+          .transform(utf8.decoder)
+          .transform(const LineSplitter())
+          .listen(_onLine);
+    }
+    proc.stderr.transform(utf8.decoder).listen((chunk) {
+      // ignore: avoid_print
+      print('[iterm2_worker] ${chunk.trimRight()}');
+    });
+    proc.exitCode.then((code) {
+      if (identical(_proc, proc)) {
+        _proc = null;
+        _failPending('worker exited with code $code');
+      }
+    });
+  }
+
+  void _onLine(String line) {
+    final trimmed = line.trim();
+    if (trimmed.isEmpty) return;
+    Object? any;
+    try {
+      any = jsonDecode(trimmed);
+    } catch (_) {
+      return;
+    }
+    _onMessage(any);
+  }
+
+  void _onMessage(Object? any) {
+    if (any is! Map) return;
+    final id = any['id'];
+    if (id is! int) {
+      if (any['event'] is String) {
+        _events.add(any.map((k, v) => MapEntry(k.toString(), v)));
+      }
+      return;
+    }
+    final completer = _pending.remove(id);
+    if (completer == null || completer.isCompleted) return;
+    final error = any['error'];
+    if (error != null) {
+      completer.completeError(ITerm2WorkerException(error.toString()));
+    } else {
+      completer.complete(any['result']);
+    }
+  }
+
+  void _failPending(String reason) {
+    final pending = List.of(_pending.values);
+    _pending.clear();
+    for (final c in pending) {
+      if (!c.isCompleted) {
+        c.completeError(ITerm2WorkerException(reason));
+      }
+    }
+  }
+}
+
+Uint8List _encodeFrame(Object? message) {
+  final header = utf8.encode(jsonEncode(message));
+  final out = Uint8List(8 + header.length);
+  final view = ByteData.sublistView(out);
+  view.setUint32(0, header.length);
+  view.setUint32(4, 0);
+  out.setRange(8, out.length, header);
+  return out;
+}
+
+/// Incremental decoder for the worker's binary framing.
+class _FrameDecoder {
+  final BytesBuilder _buf = BytesBuilder(copy: false);
+  Uint8List _pending = Uint8List(0);
+
+  List<Object?> feed(List<int> chunk) {
+    if (_pending.isNotEmpty) _buf.add(_pending);
+    _buf.add(chunk);
+    var data = _buf.takeBytes();
+    final out = <Object?>[];
+    var pos = 0;
+    while (data.length - pos >= 8) {
+      final view = ByteData.sublistView(data, pos);
+      final hlen = view.getUint32(0);
+      final plen = view.getUint32(4);
+      final end = pos + 8 + hlen + plen;
+      if (data.length < end) break;
+      final header = utf8.decode(Uint8List.sublistView(data, pos + 8, pos + 8 + hlen));
+      final body = Uint8List.sublistView(data, pos + 8 + hlen, end);
+      try {
+        out.add(_resolve(jsonDecode(header), body));
+      } catch (_) {
+        // Skip a malformed frame; boundaries are still known.
+      }
+      pos = end;
+    }
+    _pending = Uint8List.sublistView(data, pos);
+    return out;
+  }
+
+  static Object? _resolve(Object? node, Uint8List body) {
+    if (node is Map) {
+      final ref = node.length == 1 ? node[r'$payload'] : null;
+      if (ref is List && ref.length == 2 && ref[0] is int && ref[1] is int) {
+        final off = ref[0] as int;
+        final len = ref[1] as int;
+        return Uint8List.sublistView(body, off, off + len);
+      }
+      return node.map((k, v) => MapEntry(k, _resolve(v, body)));
+    }
+    if (node is List) return node.map((v) => _resolve(v, body)).toList();
+    return node;
+  }
+}
+
+class ITerm2WorkerException implements Exception {
+  final String message;
+  ITerm2WorkerException(this.message);
+
+  @override
+  String toString() => 'ITerm2WorkerException: $message';
+}
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Cold-start report for the iTerm2 bridge scripts.
+
+For every bridge script this measures, in fresh interpreters:
+
+  - interpreter start-up (`python -c pass`)
+  - import time, from `-X importtime`, broken down by top-level package
+    (iterm2, Quartz/objc, google.protobuf, websockets, ...)
+  - with --connect: time to open the iTerm2 API connection and fetch the app,
+    and the wall time of a real one-shot invocation
+
+With --pool it also starts scripts/python/iterm2_warm_pool.py and measures
+request latency on warm standbys, for comparison with the one-shot numbers.
+
+Examples:
+  python3 scripts/bench/bench_bridge_startup.py
+  python3 scripts/bench/bench_bridge_startup.py --connect --pool 5 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+PY_DIR = REPO_ROOT / "scripts" / "python"
+
+# script module -> argv for a harmless one-shot run (--connect)
+SCRIPTS = {
+    "iterm2_sources": [],
+    "iterm2_window_frames": [],
+    "iterm2_activate_and_crop": None,  # activating would steal focus
+    "iterm2_send_text": None,  # would type into a session
+    "iterm2_session_reader": None,  # needs a session id
+    "iterm2_worker": None,
+}
+
+CONNECT_PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import iterm2
+t1 = time.perf_counter()
+out = {}
+async def main(connection):
+    t2 = time.perf_counter()
+    await iterm2.async_get_app(connection)
+    t3 = time.perf_counter()
+    out.update(importMs=(t1 - t0) * 1e3, connectMs=(t2 - t1) * 1e3, appMs=(t3 - t2) * 1e3)
+iterm2.run_until_complete(main)
+print(json.dumps(out))
+"""
+
+
+def _env():
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [str(PY_DIR), env.get("PYTHONPATH", "")] if p)
+    env["ITERMREMOTE_NO_PROMPT"] = "1"
+    return env
+
+
+def _wall(cmd, env):
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=str(PY_DIR), env=env, capture_output=True, text=True)
+    return (time.perf_counter() - t0) * 1000.0, proc
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` output into (total_ms, {root_package: self_ms})."""
+    total_us = 0
+    by_root = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative_us = int(parts[1].strip())
+        except ValueError:
+            continue  # header line
+        name = parts[2][1:] if parts[2].startswith(" ") else parts[2]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        name = name.strip()
+        if depth == 0:
+            total_us += cumulative_us
+        root = name.split(".", 1)[0]
+        by_root[root] = by_root.get(root, 0) + self_us
+    return total_us / 1000.0, {k: v / 1000.0 for k, v in by_root.items()}
+
+
+def _median(values):
+    return round(statistics.median(values), 3) if values else None
+
+
+def measure_script(module, repeat, env, connect):
+    walls = []
+    totals = []
+    roots = {}
+    for _ in range(repeat):
+        wall, proc = _wall([sys.executable, "-X", "importtime", "-c", f"import {module}"], env)
+        if proc.returncode != 0:
+            return {"script": module, "error": proc.stderr.strip().splitlines()[-1:] or ["import failed"]}
+        total, by_root = parse_importtime(proc.stderr)
+        walls.append(wall)
+        totals.append(total)
+        for k, v in by_root.items():
+            roots.setdefault(k, []).append(v)
+    top = sorted(((k, _median(v)) for k, v in roots.items()), key=lambda kv: -kv[1])[:8]
+    row = {
+        "script": module,
+        "importMs": _median(totals),
+        "importWallMs": _median(walls),
+        "topPackagesMs": dict(top),
+    }
+    argv = SCRIPTS.get(module)
+    if connect and argv is not None:
+        one_shot = []
+        for _ in range(repeat):
+            wall, proc = _wall([sys.executable, str(PY_DIR / f"{module}.py")] + argv, env)
+            if proc.returncode == 0:
+                one_shot.append(wall)
+        row["oneShotMs"] = _median(one_shot)
+    return row
+
+
+def measure_connect(repeat, env):
+    samples = []
+    for _ in range(repeat):
+        _, proc = _wall([sys.executable, "-c", CONNECT_PROBE], env)
+        try:
+            samples.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        except Exception:
+            return {"error": (proc.stderr.strip().splitlines() or ["no output"])[-1]}
+    return {k: _median([s[k] for s in samples]) for k in ("importMs", "connectMs", "appMs")}
+
+
+def measure_pool(requests, size, env):
+    pool = subprocess.Popen(
+        [sys.executable, str(PY_DIR / "iterm2_warm_pool.py"), "--size", str(size)],
+        cwd=str(PY_DIR),
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+        bufsize=1,
+    )
+    try:
+        ready = json.loads(pool.stdout.readline() or "{}")
+        if ready.get("event") != "ready":
+            return {"error": "pool did not start"}
+        # Let the standbys finish connecting before timing requests.
+        time.sleep(2.0)
+        latencies = []
+        for i in range(requests):
+            t0 = time.perf_counter()
+            pool.stdin.write(json.dumps({"id": i, "op": "getWindowFrames", "args": {}}) + "\n")
+            pool.stdin.flush()
+            resp = json.loads(pool.stdout.readline() or "{}")
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            if "error" in resp:
+                return {"error": resp["error"]}
+            # Give the replacement standby time to warm up, as a real caller would.
+            time.sleep(0.5)
+        return {"size": size, "requests": requests, "medianMs": _median(latencies), "maxMs": round(max(latencies), 3)}
+    finally:
+        pool.stdin.close()
+        try:
+            pool.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            pool.kill()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Cold-start report for iTerm2 bridge scripts")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--scripts", default=",".join(SCRIPTS), help="Comma-separated script modules")
+    ap.add_argument("--connect", action="store_true", help="Also measure iTerm2 connect + one-shot runs")
+    ap.add_argument("--pool", type=int, default=0, help="Measure N requests through the warm pool")
+    ap.add_argument("--pool-size", type=int, default=2)
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    env = _env()
+    base = [_wall([sys.executable, "-c", "pass"], env)[0] for _ in range(args.repeat)]
+    report = {
+        "python": sys.version.split()[0],
+        "interpreterMs": _median(base),
+        "scripts": [measure_script(m, args.repeat, env, args.connect) for m in args.scripts.split(",") if m],
+    }
+    if args.connect:
+        report["connect"] = measure_connect(args.repeat, env)
+    if args.pool:
+        report["warmPool"] = measure_pool(args.pool, args.pool_size, env)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"python {report['python']}  interpreter start-up {report['interpreterMs']} ms")
+    for row in report["scripts"]:
+        if "error" in row:
+            print(f"{row['script']:28} ERROR {row['error']}")
+            continue
+        extra = f"  one-shot {row['oneShotMs']} ms" if row.get("oneShotMs") is not None else ""
+        print(f"{row['script']:28} import {row['importMs']:8.1f} ms{extra}")
+        for pkg, ms in row["topPackagesMs"].items():
+            print(f"    {pkg:24} {ms:8.1f} ms")
+    if "connect" in report:
+        print(f"connect: {report['connect']}")
+    if "warmPool" in report:
+        print(f"warm pool: {report['warmPool']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
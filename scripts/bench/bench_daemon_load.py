@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Open-loop load generator for the host_daemon WebSocket command path.
+
+Opens N connections (scripts/python/itermremote_client) and sends a weighted
+mix of commands at a fixed target rate. Send times follow a precomputed
+schedule (uniform or Poisson arrivals) that does not wait for acks, and
+latency is measured from the *scheduled* send time. A daemon stall therefore
+shows up as latency for every command that should have been sent during the
+stall, instead of silently lowering the send rate (coordinated omission).
+The send-to-ack "service" time is reported alongside for comparison.
+
+Reports, per action and overall: ack latency percentiles (p50/p90/p99/p999),
+an error breakdown (ack error codes, timeouts, connection errors), achieved
+send / completion rates and scheduler lag. Latencies are kept in log-linear
+HDR-style histograms (~1.6% value precision); --hgrm writes the overall
+distribution in HdrHistogram's percentile format for plotting.
+
+sendText types into a live session, so it is never in the default mix.
+Actions that take a session (sendText, readSessionBuffer, activateSession)
+need --session-id; actions whose payload the generator cannot build are
+rejected at start-up rather than measured as invalid_payload acks.
+
+Exits non-zero when the overall error rate is above --max-error-rate or any
+action in the mix never succeeded.
+
+Examples:
+  python3 scripts/bench/bench_daemon_load.py --rate 200 --duration 30
+  python3 scripts/bench/bench_daemon_load.py --connections 8 --rate 2000 \\
+      --mix iterm2.getSessions=8,orchestrator.getState=2 --arrival poisson --json
+  python3 scripts/bench/bench_daemon_load.py --mix iterm2.sendText=1 \\
+      --session-id <sid> --text '' --rate 50 --out /tmp/load.json --hgrm /tmp/load.hgrm
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "python"))
+
+from itermremote_client import DEFAULT_WS_URL, CommandTimeout, DaemonClient  # noqa: E402
+
+DEFAULT_MIX = "iterm2.getSessions=8,orchestrator.getState=2"
+# Actions sent with an empty payload.
+NO_PAYLOAD_ACTIONS = {
+    ("iterm2", "getSessions"),
+    ("orchestrator", "getState"),
+    ("state", "get"),
+    ("echo", "echo"),
+    ("webrtc", "getLoopbackStats"),
+}
+SESSION_ACTIONS = {("iterm2", "sendText"), ("iterm2", "readSessionBuffer"), ("iterm2", "activateSession")}
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+# --- HDR-style histogram ----------------------------------------------------
+
+SUB_BITS = 7
+SUB_COUNT = 1 << SUB_BITS
+SUB_HALF = SUB_COUNT >> 1
+
+
+class LatencyHistogram:
+    """Log-linear histogram of non-negative integer values (microseconds).
+
+    Values below SUB_COUNT are exact; above that every power-of-two range is
+    split into SUB_HALF equal buckets, so a recorded value is off by at most
+    1/SUB_HALF of itself. Buckets are sparse (dict), so the range is unbounded.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    @staticmethod
+    def _index(v):
+        if v < SUB_COUNT:
+            return v
+        e = v.bit_length() - SUB_BITS
+        return SUB_COUNT + (e - 1) * SUB_HALF + ((v >> e) - SUB_HALF)
+
+    @staticmethod
+    def _highest(index):
+        """Largest value that maps to bucket `index`."""
+        if index < SUB_COUNT:
+            return index
+        e = (index - SUB_COUNT) // SUB_HALF + 1
+        m = (index - SUB_COUNT) % SUB_HALF + SUB_HALF
+        return ((m + 1) << e) - 1
+
+    def record(self, value_us):
+        v = max(0, int(value_us))
+        i = self._index(v)
+        self.counts[i] = self.counts.get(i, 0) + 1
+        self.total += 1
+        self.sum += v
+        self.max = max(self.max, v)
+        self.min = v if self.min is None else min(self.min, v)
+
+    def merge(self, other):
+        for i, n in other.counts.items():
+            self.counts[i] = self.counts.get(i, 0) + n
+        if other.total:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def _walk(self):
+        seen = 0
+        for i in sorted(self.counts):
+            seen += self.counts[i]
+            yield min(self._highest(i), self.max), seen
+
+    def value_at(self, pct):
+        if not self.total:
+            return None
+        need = max(1, math.ceil(self.total * pct / 100.0))
+        for value, seen in self._walk():
+            if seen >= need:
+                return value
+        return self.max
+
+    def summary_ms(self):
+        if not self.total:
+            return None
+        out = {f"p{p:g}": self.value_at(p) / 1e3 for p in PERCENTILES}
+        out.update(min=self.min / 1e3, max=self.max / 1e3, mean=self.sum / self.total / 1e3)
+        return out
+
+    def percentile_distribution(self, ticks_per_half=5):
+        """Rows of (value_us, percentile, total_count), HdrHistogram-style:
+        percentiles step in ticks that halve the remaining distance to 100%."""
+        rows = []
+        if not self.total:
+            return rows
+        pct = 0.0
+        half = 50.0
+        while True:
+            v = self.value_at(pct) if pct > 0 else self.min
+            need = max(1, math.ceil(self.total * pct / 100.0))
+            rows.append((v, pct, need))
+            if need >= self.total:
+                break
+            pct += half / ticks_per_half
+            if pct >= 100.0 - half - 1e-9:
+                half /= 2.0
+        rows.append((self.max, 100.0, self.total))
+        return rows
+
+    def write_hgrm(self, path, unit_ratio=1e3):
+        """Write the distribution in HdrHistogram's .hgrm text format (values in ms)."""
+        lines = [f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}", ""]
+        for v, pct, count in self.percentile_distribution():
+            q = pct / 100.0
+            inv = "inf" if q >= 1.0 else f"{1.0 / (1.0 - q):.2f}"
+            lines.append(f"{v / unit_ratio:12.3f} {q:14.12f} {count:10d} {inv:>14}")
+        lines.append(f"#[Mean    = {self.sum / max(1, self.total) / unit_ratio:12.3f}, "
+                     f"Max     = {self.max / unit_ratio:12.3f}]")
+        lines.append(f"#[Total count    = {self.total:12d}]")
+        Path(path).write_text("\n".join(lines) + "\n")
+
+
+# --- command mix ------------------------------------------------------------
+
+
+def parse_mix(spec):
+    """"target.action=weight,..." -> [(target, action, weight)]."""
+    mix = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, weight = part.partition("=")
+        target, _, action = name.strip().partition(".")
+        if not target or not action:
+            raise ValueError(f"bad mix entry (want target.action=weight): {part}")
+        w = float(weight) if weight else 1.0
+        if w > 0:
+            mix.append((target, action, w))
+    if not mix:
+        raise ValueError("empty command mix")
+    return mix
+
+
+def payload_for(target, action, args):
+    key = (target, action)
+    if key in NO_PAYLOAD_ACTIONS:
+        return {}
+    if key not in SESSION_ACTIONS:
+        known = ", ".join(f"{t}.{a}" for t, a in sorted(NO_PAYLOAD_ACTIONS | SESSION_ACTIONS))
+        raise ValueError(f"no payload for {target}.{action} in the mix (supported: {known})")
+    if not args.session_id:
+        raise ValueError(f"{target}.{action} in the mix needs --session-id")
+    if action == "sendText":
+        return {"sessionId": args.session_id, "text": args.text}
+    if action == "readSessionBuffer":
+        return {"sessionId": args.session_id, "maxBytes": 4096}
+    return {"sessionId": args.session_id}
+
+
+def build_schedule(rate, duration, arrival, rng):
+    """Send offsets in seconds from the start of the run."""
+    offsets = []
+    if arrival == "poisson":
+        t = rng.expovariate(rate)
+        while t < duration:
+            offsets.append(t)
+            t += rng.expovariate(rate)
+    else:
+        n = int(rate * duration)
+        offsets = [i / rate for i in range(n)]
+    return offsets
+
+
+# --- run ----------------------------------------------------------------------
+
+
+class ActionStats:
+    def __init__(self):
+        self.sent = 0
+        self.ok = 0
+        self.errors = {}
+        self.latency = LatencyHistogram()
+        self.service = LatencyHistogram()
+
+    def error(self, code):
+        self.errors[code] = self.errors.get(code, 0) + 1
+
+    def merge(self, other):
+        self.sent += other.sent
+        self.ok += other.ok
+        for code, n in other.errors.items():
+            self.errors[code] = self.errors.get(code, 0) + n
+        self.latency.merge(other.latency)
+        self.service.merge(other.service)
+
+    def to_dict(self):
+        return {
+            "sent": self.sent,
+            "ok": self.ok,
+            "errors": dict(sorted(self.errors.items(), key=lambda kv: -kv[1])),
+            "latencyMs": self.latency.summary_ms(),
+            "serviceMs": self.service.summary_ms(),
+        }
+
+
+async def one_command(client, target, action, payload, scheduled, timeout, stats, record):
+    sent_at = time.perf_counter()
+    if record:
+        stats.sent += 1
+    try:
+        ack = await client.request(target, action, payload, timeout=timeout)
+    except CommandTimeout:
+        code = "timeout"
+    except ConnectionError:
+        code = "connection"
+    except Exception as e:
+        code = f"client:{type(e).__name__}"
+    else:
+        if ack.get("success"):
+            code = None
+        else:
+            code = (ack.get("error") or {}).get("code", "unknown")
+    if not record:
+        return
+    done = time.perf_counter()
+    if code is None:
+        stats.ok += 1
+        stats.latency.record((done - scheduled) * 1e6)
+        stats.service.record((done - sent_at) * 1e6)
+    else:
+        stats.error(code)
+
+
+async def run_load(args):
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    payloads = {(t, a): payload_for(t, a, args) for t, a, _ in mix}
+    weights = [w for _, _, w in mix]
+
+    total_s = args.warmup + args.duration
+    offsets = build_schedule(args.rate, total_s, args.arrival, rng)
+    picks = rng.choices(range(len(mix)), weights=weights, k=len(offsets))
+
+    clients = []
+    try:
+        for c in range(args.connections):
+            client = DaemonClient(args.url, timeout=args.timeout, id_prefix=f"load-{c}")
+            await client.connect()
+            clients.append(client)
+    except Exception:
+        for client in clients:
+            await client.close()
+        raise
+
+    stats = {(t, a): ActionStats() for t, a, _ in mix}
+    tasks = set()
+    max_lag = 0.0
+    max_in_flight = 0
+    start = time.perf_counter() + 0.05
+    record_from = start + args.warmup
+    try:
+        for i, offset in enumerate(offsets):
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                max_lag = max(max_lag, -delay)
+            target, action, _ = mix[picks[i]]
+            client = clients[i % len(clients)]
+            task = asyncio.ensure_future(one_command(
+                client, target, action, payloads[(target, action)], scheduled,
+                args.timeout, stats[(target, action)], scheduled >= record_from,
+            ))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            max_in_flight = max(max_in_flight, len(tasks))
+        send_end = time.perf_counter()
+        if tasks:
+            await asyncio.wait(list(tasks))
+        drain_end = time.perf_counter()
+    finally:
+        for client in clients:
+            await client.close()
+
+    overall = ActionStats()
+    for s in stats.values():
+        overall.merge(s)
+    measured_s = max(1e-9, send_end - record_from)
+    return {
+        "url": args.url,
+        "config": {
+            "connections": args.connections,
+            "rate": args.rate,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "arrival": args.arrival,
+            "timeout": args.timeout,
+            "mix": {f"{t}.{a}": w for t, a, w in mix},
+            "seed": args.seed,
+        },
+        "sentPerSec": overall.sent / measured_s,
+        "okPerSec": overall.ok / measured_s,
+        "maxSchedulerLagMs": max_lag * 1e3,
+        "maxInFlight": max_in_flight,
+        "drainMs": (drain_end - send_end) * 1e3,
+        "lateAcks": sum(c.late_acks for c in clients),
+        "overall": overall.to_dict(),
+        "actions": {f"{t}.{a}": s.to_dict() for (t, a), s in stats.items()},
+    }, overall.latency
+
+
+def failures(report, max_error_rate):
+    """Reasons the run should count as failed (empty when it passed)."""
+    out = []
+    overall = report["overall"]
+    if overall["sent"]:
+        rate = 1.0 - overall["ok"] / overall["sent"]
+        if rate > max_error_rate:
+            out.append(f"error rate {rate:.1%} above {max_error_rate:.1%}")
+    else:
+        out.append("no commands measured")
+    for name, s in report["actions"].items():
+        if s["sent"] and not s["ok"]:
+            out.append(f"{name}: no successful acks")
+    return out
+
+
+def _fmt(summary, key):
+    return f"{summary[key]:>9.2f}" if summary else f"{'-':>9}"
+
+
+def print_report(report):
+    cfg = report["config"]
+    print(f"url={report['url']} connections={cfg['connections']} rate={cfg['rate']:g}/s "
+          f"duration={cfg['duration']:g}s arrival={cfg['arrival']}")
+    print(f"sent {report['sentPerSec']:.1f}/s, ok {report['okPerSec']:.1f}/s, "
+          f"max scheduler lag {report['maxSchedulerLagMs']:.1f} ms, max in flight {report['maxInFlight']}, "
+          f"late acks {report['lateAcks']}")
+    print(f"{'action':<28}{'sent':>8}{'ok':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'p999 ms':>9}{'max ms':>9}")
+    rows = list(report["actions"].items()) + [("(all)", report["overall"])]
+    for name, s in rows:
+        lat = s["latencyMs"]
+        print(f"{name:<28}{s['sent']:>8}{s['ok']:>8}{_fmt(lat, 'p50')}{_fmt(lat, 'p90')}"
+              f"{_fmt(lat, 'p99')}{_fmt(lat, 'p99.9')}{_fmt(lat, 'max')}")
+    for name, s in rows:
+        if s["errors"]:
+            errs = ", ".join(f"{code}={n}" for code, n in s["errors"].items())
+            print(f"errors {name}: {errs}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Open-loop load generator for the host_daemon WebSocket API")
+    ap.add_argument("--url", default=DEFAULT_WS_URL)
+    ap.add_argument("--connections", type=int, default=4)
+    ap.add_argument("--rate", type=float, default=100.0, help="Target commands per second (all connections)")
+    ap.add_argument("--duration", type=float, default=10.0, help="Measured seconds")
+    ap.add_argument("--warmup", type=float, default=2.0, help="Seconds of load before measuring")
+    ap.add_argument("--arrival", choices=["uniform", "poisson"], default="uniform")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"target.action=weight,... (default {DEFAULT_MIX})")
+    ap.add_argument("--session-id", default=None,
+                    help="Session for iterm2.sendText / readSessionBuffer / activateSession")
+    ap.add_argument("--text", default="", help="Text for iterm2.sendText (default: empty)")
+    ap.add_argument("--timeout", type=float, default=10.0, help="Per-command ack timeout (s)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", default=None, help="Write the JSON report here")
+    ap.add_argument("--hgrm", default=None, help="Write the overall latency distribution (.hgrm, ms)")
+    ap.add_argument("--max-error-rate", type=float, default=0.01,
+                    help="Exit non-zero above this fraction of failed commands (default 0.01)")
+    ap.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = ap.parse_args()
+
+    if args.rate <= 0 or args.duration <= 0 or args.connections <= 0:
+        ap.error("--rate, --duration and --connections must be positive")
+    try:
+        report, latency = asyncio.run(run_load(args))
+    except (ValueError, OSError, RuntimeError) as e:
+        print(f"Load run failed: {e}", file=sys.stderr)
+        return 1
+    report["failures"] = failures(report, args.max_error_rate)
+
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(report, indent=2))
+    if args.hgrm:
+        latency.write_hgrm(args.hgrm)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    for reason in report["failures"]:
+        print(f"FAIL: {reason}", file=sys.stderr)
+    return 1 if report["failures"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark NCC template matching: original loop matcher vs tools/image_match.py
+(exhaustive FFT search and coarse-to-fine pyramid search).
+
+Builds a synthetic "screenshot" (noise background plus a few textured windows),
+cuts a title-bar-sized template out of one window, and times both matchers on
+the padded search region around it, like capture_panel_v2.locate_window_rect.
+
+Examples:
+  python3 scripts/bench/bench_image_match.py
+  python3 scripts/bench/bench_image_match.py --search 1000x800 --templ 400x120 --json
+  python3 scripts/bench/bench_image_match.py --search 5120x2880 --skip-legacy
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+from image_match import norm_xcorr2d, pyramid_match  # noqa: E402
+
+
+def legacy_norm_xcorr2d(search, templ):
+    """The original capture_panel_v2.norm_xcorr2d (step-2 scan + 10 px refine)."""
+    sh, sw = search.shape
+    th, tw = templ.shape
+    if th <= 0 or tw <= 0 or th > sh or tw > sw:
+        raise ValueError("invalid template/search sizes")
+    t0 = templ - float(templ.mean())
+    t_norm = float(np.sqrt((t0 * t0).sum()))
+    if t_norm == 0:
+        raise ValueError("template has zero variance")
+
+    def scan(ys, xs, best):
+        for y in ys:
+            rows = search[y:y + th]
+            for x in xs:
+                p = rows[:, x:x + tw]
+                p0 = p - float(p.mean())
+                p_norm = float(np.sqrt((p0 * p0).sum()))
+                if p_norm == 0:
+                    continue
+                score = float((p0 * t0).sum()) / (p_norm * t_norm)
+                if score > best[0]:
+                    best = (score, y, x)
+        return best
+
+    best = scan(range(0, sh - th + 1, 2), range(0, sw - tw + 1, 2), (-1e9, 0, 0))
+    _, by, bx = best
+    best = scan(
+        range(max(0, by - 10), min(sh - th, by + 10) + 1),
+        range(max(0, bx - 10), min(sw - tw, bx + 10) + 1),
+        best,
+    )
+    score, y, x = best
+    return y, x, score
+
+
+def synthetic_screen(w, h, rng):
+    img = rng.normal(40.0, 6.0, size=(h, w)).astype(np.float32)
+    for _ in range(4):
+        ww = int(rng.integers(w // 4, w // 2))
+        wh = int(rng.integers(h // 4, h // 2))
+        x = int(rng.integers(0, w - ww))
+        y = int(rng.integers(0, h - wh))
+        img[y:y + wh, x:x + ww] = rng.normal(200.0, 30.0, size=(wh, ww))
+        # Title bar with some "text".
+        bar = min(28, wh)
+        img[y:y + bar, x:x + ww] = 120.0
+        for k in range(0, ww - 8, 9):
+            if rng.random() < 0.6:
+                img[y + 8:y + bar - 8, x + k:x + k + 6] = 20.0
+    return img
+
+
+def parse_size(s):
+    w, h = s.lower().split("x")
+    return int(w), int(h)
+
+
+def timed(fn, repeat):
+    best = None
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        dt = (time.perf_counter() - t0) * 1000.0
+        best = dt if best is None else min(best, dt)
+    return out, best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark NCC matchers")
+    ap.add_argument("--search", default="700x420", help="Search region WxH")
+    ap.add_argument("--templ", default="200x60", help="Template WxH")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--levels", type=int, default=3, help="Pyramid levels for the pyramid matcher")
+    ap.add_argument("--skip-legacy", action="store_true", help="Do not time the original loop matcher")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    sw, sh = parse_size(args.search)
+    tw, th = parse_size(args.templ)
+    search = synthetic_screen(sw, sh, rng)
+    ty = int(rng.integers(0, sh - th))
+    tx = int(rng.integers(0, sw - tw))
+    templ = search[ty:ty + th, tx:tx + tw].copy()
+
+    fft_res, fft_ms = timed(lambda: norm_xcorr2d(search, templ), args.repeat)
+    report = {
+        "search": [sw, sh],
+        "templ": [tw, th],
+        "truth": [ty, tx],
+        "fft": {"result": [fft_res[0], fft_res[1], round(fft_res[2], 6)], "ms": round(fft_ms, 3)},
+    }
+    pyr_res, pyr_ms = timed(lambda: pyramid_match(search, templ, max_levels=args.levels), args.repeat)
+    report["pyramid"] = {
+        "result": [pyr_res[0], pyr_res[1], round(pyr_res[2], 6)],
+        "ms": round(pyr_ms, 3),
+        "levels": pyr_res[3],
+    }
+    ok = (fft_res[0], fft_res[1]) == (ty, tx) and (pyr_res[0], pyr_res[1]) == (ty, tx)
+    if not args.skip_legacy:
+        legacy_res, legacy_ms = timed(lambda: legacy_norm_xcorr2d(search, templ), 1)
+        report["legacy"] = {
+            "result": [legacy_res[0], legacy_res[1], round(legacy_res[2], 6)],
+            "ms": round(legacy_ms, 3),
+        }
+        report["speedup"] = round(legacy_ms / fft_ms, 1) if fft_ms > 0 else None
+        # The legacy step-2 scan can settle on a local optimum; the FFT result
+        # must be at least as good.
+        ok = ok and fft_res[2] >= legacy_res[2] - 1e-6
+    report["ok"] = ok
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"search {sw}x{sh}  templ {tw}x{th}  truth y={ty} x={tx}")
+        print(f"  fft     {report['fft']['ms']:10.2f} ms  -> {report['fft']['result']}")
+        print(f"  pyramid {report['pyramid']['ms']:10.2f} ms  -> {report['pyramid']['result']}")
+        for r in report["pyramid"]["levels"]:
+            print(f"    level {r['level']} (x{r['scale']:g}): score {r['score']:.4f} over {r['searched']} offsets")
+        if "legacy" in report:
+            print(f"  legacy  {report['legacy']['ms']:10.2f} ms  -> {report['legacy']['result']}")
+            print(f"  speedup {report['speedup']}x")
+        print("  OK" if ok else "  MISMATCH")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
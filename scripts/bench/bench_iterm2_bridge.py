@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Bridge scripts vs pane count, on Linux, using the fake iterm2 package.
+
+Runs the real scripts/python bridge scripts unchanged with
+scripts/python/fake_iterm2 first on PYTHONPATH, against synthetic split
+trees of each --panes size (see fake_iterm2/iterm2/synthetic.py). Every
+iTerm2 API call costs --rpc-ms (+ up to --jitter-ms), so the numbers show
+how RPC count and per-pane Python work scale, not real iTerm2 speed.
+
+Per pane count it measures:
+  - one-shot `iterm2_sources.py --timings` and `iterm2_activate_and_crop.py`
+    wall time and RPC count
+  - warm `iterm2_worker.py` (stdio): getSessions, activateSession and
+    readSessionBuffer latency after the session cache is built
+
+Examples:
+  python3 scripts/bench/bench_iterm2_bridge.py
+  python3 scripts/bench/bench_iterm2_bridge.py --panes 100 1000 --rpc-ms 2 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+PY_DIR = REPO_ROOT / "scripts" / "python"
+FAKE_DIR = PY_DIR / "fake_iterm2"
+
+
+def _median(values):
+    return round(statistics.median(values), 3) if values else None
+
+
+def _env(spec, stats_path):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [str(FAKE_DIR), str(PY_DIR), env.get("PYTHONPATH", "")] if p)
+    env["ITERMREMOTE_FAKE_ITERM2"] = ",".join(f"{k}={v}" for k, v in spec.items())
+    env["ITERMREMOTE_FAKE_ITERM2_STATS"] = stats_path
+    env["ITERMREMOTE_NO_PROMPT"] = "1"
+    return env
+
+
+def _read_stats(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def one_shot(script, argv, env, stats_path, repeat):
+    walls = []
+    out = {}
+    stats = {}
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        proc = subprocess.run([sys.executable, str(PY_DIR / script)] + argv, cwd=str(PY_DIR), env=env,
+                              capture_output=True, text=True)
+        walls.append((time.perf_counter() - t0) * 1000.0)
+        if proc.returncode != 0:
+            return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+        out = json.loads(proc.stdout)
+        stats = _read_stats(stats_path)
+    return {"wallMs": _median(walls), "rpcs": stats.get("rpcs"), "out": out}
+
+
+def warm_worker(session_id, env, stats_path, repeat):
+    proc = subprocess.Popen([sys.executable, str(PY_DIR / "iterm2_worker.py")], cwd=str(PY_DIR), env=env,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+    seq = [0]
+
+    def call(op, args):
+        seq[0] += 1
+        t0 = time.perf_counter()
+        proc.stdin.write(json.dumps({"id": seq[0], "op": op, "args": args}) + "\n")
+        proc.stdin.flush()
+        resp = json.loads(proc.stdout.readline() or "{}")
+        if "error" in resp:
+            raise RuntimeError(f"{op}: {resp['error']}")
+        return (time.perf_counter() - t0) * 1000.0
+
+    try:
+        ready = json.loads(proc.stdout.readline() or "{}")
+        if ready.get("event") != "ready":
+            return {"error": ready.get("error") or "worker did not start"}
+        call("getSessions", {})  # waits for the cache build
+        row = {}
+        ops = [
+            ("getSessionsMs", "getSessions", {}),
+            ("activateSessionMs", "activateSession", {"sessionId": session_id}),
+            ("readSessionBufferMs", "readSessionBuffer", {"sessionId": session_id, "maxBytes": 65536}),
+        ]
+        for key, op, args in ops:
+            row[key] = _median([call(op, args) for _ in range(repeat)])
+    except (RuntimeError, ValueError) as e:
+        return {"error": str(e)}
+    finally:
+        proc.stdin.close()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    row["rpcs"] = _read_stats(stats_path).get("rpcs")
+    return row
+
+
+def measure(panes, args, stats_path):
+    spec = {
+        "windows": args.windows,
+        "tabs": args.tabs,
+        "panes": panes,
+        "seed": args.seed,
+        "rpc_ms": args.rpc_ms,
+        "jitter_ms": args.jitter_ms,
+        "history": args.history,
+    }
+    env = _env(spec, stats_path)
+    row = {"panes": panes}
+    sources = one_shot("iterm2_sources.py", ["--timings"], env, stats_path, args.repeat)
+    if "error" in sources:
+        row["error"] = sources["error"]
+        return row
+    panels = sources["out"].get("panels", [])
+    row["sessions"] = len(panels)
+    row["sources"] = {
+        "wallMs": sources["wallMs"],
+        "refreshMs": sources["out"].get("timings", {}).get("totalMs"),
+        "rpcs": sources["rpcs"],
+    }
+    if not panels:
+        return row
+    # Last panel: the deepest lookup in every linear scan.
+    sid = panels[-1]["id"]
+    crop = one_shot("iterm2_activate_and_crop.py", [sid], env, stats_path, args.repeat)
+    row["activate"] = crop if "error" in crop else {"wallMs": crop["wallMs"], "rpcs": crop["rpcs"]}
+    if not args.no_worker:
+        row["worker"] = warm_worker(sid, env, stats_path, args.repeat)
+    return row
+
+
+def main():
+    ap = argparse.ArgumentParser(description="iTerm2 bridge scripts vs pane count on the fake iterm2 package")
+    ap.add_argument("--panes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    ap.add_argument("--windows", type=int, default=1)
+    ap.add_argument("--tabs", type=int, default=1, help="Tabs per window")
+    ap.add_argument("--rpc-ms", type=float, default=0.5, help="Simulated latency per iTerm2 API call")
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--history", type=int, default=200, help="Scrollback lines per session")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--no-worker", action="store_true", help="Skip the warm worker measurements")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stats_path = str(Path(tmp) / "stats.json")
+        rows = [measure(p, args, stats_path) for p in args.panes]
+    report = {"rpcMs": args.rpc_ms, "jitterMs": args.jitter_ms, "windows": args.windows, "tabs": args.tabs,
+              "results": rows}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print(f"rpc {args.rpc_ms} ms (+{args.jitter_ms} jitter), {args.windows} window(s) x {args.tabs} tab(s)")
+    print(f"{'panes':>6} {'sources':>10} {'refresh':>9} {'rpcs':>6} {'activate':>10} {'rpcs':>6}"
+          f" {'w.get':>8} {'w.act':>8} {'w.read':>8}")
+    for row in rows:
+        if "error" in row:
+            print(f"{row['panes']:>6} ERROR {row['error']}")
+            continue
+        src = row["sources"]
+        act = row.get("activate", {})
+        wk = row.get("worker", {})
+
+        def ms(v):
+            return f"{v:8.1f}" if isinstance(v, (int, float)) else f"{'-':>8}"
+
+        print(f"{row['panes']:>6} {ms(src['wallMs'])}ms {ms(src['refreshMs'])} {src['rpcs'] or '-':>6}"
+              f" {ms(act.get('wallMs'))}ms {act.get('rpcs') or '-':>6}"
+              f" {ms(wk.get('getSessionsMs'))} {ms(wk.get('activateSessionMs'))} {ms(wk.get('readSessionBufferMs'))}")
+        for part in ("activate", "worker"):
+            if "error" in row.get(part, {}):
+                print(f"       {part} error: {row[part]['error']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
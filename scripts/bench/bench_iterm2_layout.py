@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Benchmark iterm2_layout.compute_layout against the old recursive helpers.
+
+Builds synthetic split trees (no iTerm2 needed) and times:
+  - legacy: subtree_size(root) + assign_layout_frames(root) + node_bounds(root)
+            as previously duplicated in iterm2_sources.py / iterm2_activate_and_crop.py
+  - linear: iterm2_layout.compute_layout(root)
+
+Outputs are compared for every tree so the benchmark doubles as a
+regression check.
+
+Usage:
+  python3 scripts/bench/bench_iterm2_layout.py --panes 50 200 500 --shape chain balanced random
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "scripts/python"))
+
+from iterm2_layout import compute_layout, is_vertical  # noqa: E402
+
+
+class _Point:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+
+class _Size:
+    __slots__ = ("width", "height")
+
+    def __init__(self, w, h):
+        self.width = w
+        self.height = h
+
+
+class Frame:
+    __slots__ = ("origin", "size")
+
+    def __init__(self, x, y, w, h):
+        self.origin = _Point(x, y)
+        self.size = _Size(w, h)
+
+
+class Session:
+    def __init__(self, session_id, frame):
+        self.session_id = session_id
+        self.frame = frame
+
+
+class Splitter:
+    def __init__(self, vertical, children):
+        self.vertical = vertical
+        self.children = children
+
+
+# --- synthetic trees --------------------------------------------------------
+
+
+def build_tree(panes, shape, relative, rng):
+    """Split a 1600x1000 rect into `panes` sessions.
+
+    shape: chain (each split has one leaf + the rest, depth = panes - 1),
+           balanced (halve recursively), random (random split points).
+    relative: give every session a (0, 0) origin so the sequential-offset
+              branch is exercised instead of the absolute-frame branch.
+    """
+    counter = [0]
+
+    def leaf(x, y, w, h):
+        counter[0] += 1
+        ox, oy = (0.0, 0.0) if relative else (x, y)
+        return Session(f"s{counter[0]}", Frame(ox, oy, w, h))
+
+    # Iterative construction so chain trees of 1000+ panes do not recurse.
+    root_holder = []
+    stack = [(panes, 0.0, 0.0, 1600.0, 1000.0, True, root_holder)]
+    while stack:
+        n, x, y, w, h, vertical, sink = stack.pop()
+        if n <= 1:
+            sink.append(leaf(x, y, w, h))
+            continue
+        if shape == "chain":
+            left = 1
+        elif shape == "balanced":
+            left = n // 2
+        else:
+            left = rng.randint(1, n - 1)
+        ratio = left / n
+        children = []
+        node = Splitter(vertical, children)
+        sink.append(node)
+        if vertical:
+            a = (left, x, y, w * ratio, h)
+            b = (n - left, x + w * ratio, y, w * (1 - ratio), h)
+        else:
+            a = (left, x, y, w, h * ratio)
+            b = (n - left, x, y + h * ratio, w, h * (1 - ratio))
+        # Children are appended in pop order; push b first so a lands first.
+        stack.append((*b, not vertical, children))
+        stack.append((*a, not vertical, children))
+    return root_holder[0]
+
+
+# --- legacy reference (copied from the pre-iterm2_layout scripts) ----------
+
+
+def _is_session(node):
+    return hasattr(node, "session_id") and not hasattr(node, "children")
+
+
+def legacy_subtree_size(node):
+    if _is_session(node):
+        f = node.frame
+        return float(f.size.width), float(f.size.height)
+    w = 0.0
+    h = 0.0
+    for c in node.children:
+        cw, ch = legacy_subtree_size(c)
+        if is_vertical(node):
+            w += cw
+            h = max(h, ch)
+        else:
+            w = max(w, cw)
+            h += ch
+    return w, h
+
+
+def legacy_node_bounds(node):
+    if _is_session(node):
+        f = node.frame
+        x0 = float(f.origin.x)
+        y0 = float(f.origin.y)
+        return x0, y0, x0 + float(f.size.width), y0 + float(f.size.height)
+    bs = [b for b in (legacy_node_bounds(c) for c in node.children) if b]
+    if not bs:
+        return None
+    return min(b[0] for b in bs), min(b[1] for b in bs), max(b[2] for b in bs), max(b[3] for b in bs)
+
+
+def legacy_assign_layout_frames(node, ox, oy, out):
+    if _is_session(node):
+        f = node.frame
+        out[node.session_id] = {
+            "x": ox + float(f.origin.x),
+            "y": oy + float(f.origin.y),
+            "w": float(f.size.width),
+            "h": float(f.size.height),
+        }
+        return
+    vertical = is_vertical(node)
+    mins = []
+    for c in node.children:
+        b = legacy_node_bounds(c)
+        if b:
+            mins.append(round(b[0 if vertical else 1], 3))
+    distinct = len(set(mins)) if mins else 0
+    if distinct > 1:
+        for c in node.children:
+            legacy_assign_layout_frames(c, ox, oy, out)
+        return
+    x, y = ox, oy
+    for c in node.children:
+        legacy_assign_layout_frames(c, x, y, out)
+        cw, ch = legacy_subtree_size(c)
+        if vertical:
+            x += cw
+        else:
+            y += ch
+
+
+def legacy_layout(root):
+    frames = {}
+    size = legacy_subtree_size(root)
+    legacy_assign_layout_frames(root, 0.0, 0.0, frames)
+    return size, legacy_node_bounds(root), frames
+
+
+# --- benchmark --------------------------------------------------------------
+
+
+def _time(fn, repeat):
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0, out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--panes", type=int, nargs="+", default=[10, 100, 300, 600])
+    ap.add_argument("--shape", nargs="+", default=["chain", "balanced", "random"],
+                    choices=["chain", "balanced", "random"])
+    ap.add_argument("--relative", action="store_true", help="Use (0,0) session origins")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = ap.parse_args()
+
+    # Legacy helpers recurse once per split level.
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * max(args.panes) + 100))
+    rng = random.Random(args.seed)
+    rows = []
+    for shape in args.shape:
+        for n in args.panes:
+            root = build_tree(n, shape, args.relative, rng)
+            legacy_ms, legacy = _time(lambda: legacy_layout(root), args.repeat)
+            linear_ms, layout = _time(lambda: compute_layout(root), args.repeat)
+            same = legacy == (layout.size, layout.bounds, layout.frames)
+            rows.append({
+                "shape": shape,
+                "panes": n,
+                "legacyMs": round(legacy_ms, 3),
+                "linearMs": round(linear_ms, 3),
+                "speedup": round(legacy_ms / linear_ms, 1) if linear_ms > 0 else None,
+                "identical": same,
+            })
+
+    if args.json:
+        print(json.dumps({"relative": args.relative, "results": rows}, indent=2))
+    else:
+        print(f"{'shape':<9}{'panes':>7}{'legacy ms':>12}{'linear ms':>12}{'speedup':>9}  identical")
+        for r in rows:
+            print(f"{r['shape']:<9}{r['panes']:>7}{r['legacyMs']:>12.3f}{r['linearMs']:>12.3f}"
+                  f"{r['speedup']:>8}x  {r['identical']}")
+    return 0 if all(r["identical"] for r in rows) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -8,29 +8,47 @@ Usage:
 
     # Background daemon (manual)
     python3 scripts/monitor_memory.py start --target host_test_app --interval 5 --threshold 2048
+
     python3 scripts/monitor_memory.py stop
     python3 scripts/monitor_memory.py status
 
+    # Several targets in one pass ('*' = every matching process)
+    python3 scripts/monitor_memory.py run --target host_daemon,host_test_app --target 'iterm2_worker*'
+
+    # Percentiles over the last 10 minutes of samples
+    python3 scripts/monitor_memory.py query --metric rss_mb,children --window 600
+
 Logs are written to: build/memory_monitor.log
+Samples (RSS, USS/PSS, CPU%, threads, FDs, child processes) are appended to
+build/memory_samples.csv and kept in an in-memory ring buffer per process.
 """
 
 import argparse
+import csv
+import math
 import os
 import signal
 import sys
 import time
+from collections import deque
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 import psutil
 
 PID_FILE = Path("build/.memory_monitor.pid")
 LOG_FILE = Path("build/memory_monitor.log")
+SERIES_FILE = Path("build/memory_samples.csv")
+
+SAMPLE_FIELDS = [
+    'ts', 'target', 'pid', 'rss_mb', 'uss_mb', 'pss_mb', 'cpu_pct', 'threads', 'fds', 'children',
+]
+METRICS = SAMPLE_FIELDS[3:]
 
 
 def set_state_dir(state_dir: Optional[str]) -> None:
     """Set pid/log file locations based on state directory."""
-    global PID_FILE, LOG_FILE
+    global PID_FILE, LOG_FILE, SERIES_FILE
     if state_dir:
         base = Path(state_dir)
     else:
@@ -38,20 +56,201 @@ def set_state_dir(state_dir: Optional[str]) -> None:
         base = Path(env) if env else Path("build")
     PID_FILE = base / ".memory_monitor.pid"
     LOG_FILE = base / "memory_monitor.log"
+    SERIES_FILE = base / "memory_samples.csv"
+
+
+def _matches(target: str, name: str, cmdline: str) -> bool:
+    t = target.lower()
+    return t in name.lower() or t in cmdline.lower()
+
+
+def _own_pids() -> set:
+    """This process and its ancestors: their command lines name the target."""
+    pids = {os.getpid()}
+    try:
+        pids.update(p.pid for p in psutil.Process().parents())
+    except psutil.Error:
+        pass
+    return pids
+
+
+class Target:
+    """A monitored target with its pinned processes.
+
+    `spec` is a name/cmdline substring. A trailing `*` (e.g. `iterm2_worker*`)
+    tracks every matching process instead of the first one; such targets are
+    also re-scanned every `rescan` seconds to pick up newly spawned processes.
+
+    Processes are pinned by (pid, create_time): a pinned pid is re-used as
+    long as a process with that pid and the same create_time exists, so the
+    process table is only scanned again when a pinned process disappears.
+    """
+
+    def __init__(self, spec: str, rescan: float = 60.0):
+        self.multi = spec.endswith('*')
+        self.name = spec.rstrip('*')
+        self.rescan = rescan
+        self.pinned = {}  # pid -> psutil.Process
+        self.last_scan = 0.0
+
+    def needs_scan(self, now: float) -> bool:
+        if not self.pinned:
+            return True
+        return self.multi and self.rescan > 0 and now - self.last_scan >= self.rescan
+
+    def pin(self, proc) -> None:
+        if not self.multi:
+            self.pinned.clear()
+        self.pinned[proc.pid] = proc
+
+    def alive(self) -> List:
+        """Pinned processes that still exist; drops the ones that do not."""
+        out = []
+        for pid, proc in list(self.pinned.items()):
+            try:
+                # is_running() compares create_time, so a recycled pid is not
+                # mistaken for the pinned process.
+                if proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE:
+                    out.append(proc)
+                    continue
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            del self.pinned[pid]
+        return out
+
 
+def resolve_targets(targets: List[Target], now: Optional[float] = None) -> int:
+    """Pin processes for all targets that need it in one process-table pass.
 
-def find_process(target: str):
-    """Find process by name (bundle or executable)."""
+    Returns the number of processes scanned (0 when no scan was needed).
+    """
+    now = time.time() if now is None else now
+    pending = [t for t in targets if t.needs_scan(now)]
+    if not pending:
+        return 0
+    own = _own_pids()
+    scanned = 0
     for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time']):
+        scanned += 1
         try:
+            if proc.pid in own:
+                continue
             name = proc.info['name'] or ''
-            cmdline = ' '.join(proc.info['cmdline'] or [])
-            # Match by name or full path
-            if target.lower() in name.lower() or target.lower() in cmdline.lower():
-                return proc
+            cmdline = None
+            for t in pending:
+                if proc.pid in t.pinned or (t.pinned and not t.multi):
+                    continue
+                if cmdline is None:
+                    cmdline = ' '.join(proc.info['cmdline'] or [])
+                if _matches(t.name, name, cmdline):
+                    t.pin(proc)
         except (psutil.NoSuchProcess, psutil.AccessDenied):
             continue
-    return None
+    for t in pending:
+        t.last_scan = now
+    return scanned
+
+
+def _mb(v) -> Optional[float]:
+    return None if v is None else round(v / (1024 * 1024), 3)
+
+
+def sample_process(proc, target: str) -> dict:
+    """One resource sample of a pinned process.
+
+    USS/PSS need memory_full_info(), which is slower and may be denied for
+    other users' processes; they are None when unavailable (PSS is Linux-only).
+    cpu_pct is measured since the previous sample of the same Process object
+    (0.0 on the first one).
+    """
+    with proc.oneshot():
+        rss = proc.memory_info().rss
+        uss = pss = None
+        try:
+            full = proc.memory_full_info()
+            uss = getattr(full, 'uss', None)
+            pss = getattr(full, 'pss', None)
+        except (psutil.AccessDenied, psutil.ZombieProcess, NotImplementedError):
+            pass
+        cpu = proc.cpu_percent(None)
+        threads = proc.num_threads()
+        try:
+            fds = proc.num_fds() if hasattr(proc, 'num_fds') else proc.num_handles()
+        except psutil.AccessDenied:
+            fds = None
+    try:
+        children = len(proc.children(recursive=True))
+    except psutil.AccessDenied:
+        children = None
+    return {
+        'ts': round(time.time(), 3),
+        'target': target,
+        'pid': proc.pid,
+        'rss_mb': _mb(rss),
+        'uss_mb': _mb(uss),
+        'pss_mb': _mb(pss),
+        'cpu_pct': round(cpu, 2),
+        'threads': threads,
+        'fds': fds,
+        'children': children,
+    }
+
+
+def append_series(samples: List[dict]) -> None:
+    """Append samples to SERIES_FILE (CSV, header written once)."""
+    if not samples:
+        return
+    SERIES_FILE.parent.mkdir(parents=True, exist_ok=True)
+    new = not SERIES_FILE.exists() or SERIES_FILE.stat().st_size == 0
+    with open(SERIES_FILE, 'a', newline='') as f:
+        w = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+        if new:
+            w.writeheader()
+        w.writerows(samples)
+
+
+def read_series(since: float = 0.0, target: Optional[str] = None) -> List[dict]:
+    """Samples from SERIES_FILE with ts >= since (optionally one target)."""
+    out = []
+    if not SERIES_FILE.exists():
+        return out
+    with open(SERIES_FILE, newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                if float(row['ts']) < since:
+                    continue
+            except (KeyError, TypeError, ValueError):
+                continue
+            if target and row.get('target') != target:
+                continue
+            out.append(row)
+    return out
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile (q in 0..100) of unsorted values."""
+    if not values:
+        return None
+    v = sorted(values)
+    k = (len(v) - 1) * q / 100.0
+    lo = math.floor(k)
+    hi = math.ceil(k)
+    return v[lo] + (v[hi] - v[lo]) * (k - lo)
+
+
+def summarize(samples: List[dict], metric: str, qs: List[float]) -> dict:
+    values = []
+    for s in samples:
+        try:
+            values.append(float(s[metric]))
+        except (KeyError, TypeError, ValueError):
+            continue  # missing (e.g. no PSS on macOS)
+    out = {'count': len(values)}
+    if values:
+        out.update({'min': min(values), 'max': max(values), 'last': values[-1]})
+        for q in qs:
+            out[f'p{q:g}'] = round(percentile(values, q), 3)
+    return out
 
 
 def log_message(msg: str):
@@ -64,51 +263,129 @@ def log_message(msg: str):
     print(line, end='')
 
 
-def monitor_loop(target: str, interval: int, threshold_mb: int):
+def monitor_loop(
+    targets: List[str],
+    interval: int,
+    threshold_mb: int,
+    rescan: float = 60.0,
+    ring_size: int = 720,
+    child_alert: int = 20,
+):
     """Main monitoring loop."""
-    log_message(f"Started monitoring: target={target} interval={interval}s threshold={threshold_mb}MB")
-    
-    last_rss = None
-    alert_count = 0
+    log_message(
+        f"Started monitoring: target={','.join(targets)} interval={interval}s threshold={threshold_mb}MB"
+    )
+
+    tracked = [Target(spec, rescan) for spec in targets]
+    rings = {}  # (target, pid) -> deque of the last `ring_size` samples
+    alert_count = {}
     MAX_ALERTS = 3  # Alert every N samples instead of every sample
-    
+    storming = set()  # keys currently in CHILD PROCESS STORM; logged on change only
+
     while True:
-        proc = find_process(target)
-        if proc:
-            try:
-                mem = proc.memory_info()
-                rss_mb = mem.rss / (1024 * 1024)
-                
+        # Only touches the process table when a pinned process went away
+        # (or a multi-process target is due for a rescan).
+        for t in tracked:
+            t.alive()
+        resolve_targets(tracked)
+
+        batch = []
+        for t in tracked:
+            procs = list(t.pinned.values())
+            if not procs:
+                log_message(f"{t.name} not found, waiting...")
+            live = {(t.name, p.pid) for p in procs}
+            for key in [k for k in rings if k[0] == t.name and k not in live]:
+                del rings[key]
+                alert_count.pop(key, None)
+                storming.discard(key)
+
+            for proc in procs:
+                key = (t.name, proc.pid)
+                label = f"{t.name}[{proc.pid}]" if t.multi else t.name
+                try:
+                    sample = sample_process(proc, t.name)
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    log_message(f"{label} process disappeared, will retry...")
+                    rings.pop(key, None)
+                    storming.discard(key)
+                    t.pinned.pop(proc.pid, None)
+                    continue
+                batch.append(sample)
+                ring = rings.setdefault(key, deque(maxlen=max(1, ring_size)))
+                prev = ring[-1] if ring else None
+                ring.append(sample)
+                rss_mb = sample['rss_mb']
+
                 # Calculate delta
-                delta = 0.0
-                if last_rss is not None:
-                    delta = rss_mb - last_rss
-                
+                delta = 0.0 if prev is None else rss_mb - prev['rss_mb']
+                extra = (
+                    f" cpu={sample['cpu_pct']:.1f}% threads={sample['threads']}"
+                    f" fds={sample['fds']} children={sample['children']}"
+                )
+
                 # Log sample
-                status = ""
                 if rss_mb > threshold_mb:
-                    alert_count += 1
-                    if alert_count % MAX_ALERTS == 0:
+                    alert_count[key] = alert_count.get(key, 0) + 1
+                    if alert_count[key] % MAX_ALERTS == 0:
                         status = " [ALERT: HIGH MEMORY]"
-                        log_message(f"{target} RSS={rss_mb:.1f}MB (delta={delta:+.1f}MB){status}")
+                        log_message(f"{label} RSS={rss_mb:.1f}MB (delta={delta:+.1f}MB){extra}{status}")
                 else:
-                    alert_count = 0
+                    alert_count[key] = 0
                     # Only log when there's significant change or periodically
-                    if abs(delta) > 10.0 or alert_count % 10 == 0:
-                        log_message(f"{target} RSS={rss_mb:.1f}MB (delta={delta:+.1f}MB)")
-                
-                last_rss = rss_mb
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                log_message(f"{target} process disappeared, will retry...")
-                last_rss = None
-        else:
-            log_message(f"{target} not found, waiting...")
-            last_rss = None
-        
+                    if abs(delta) > 10.0 or alert_count[key] % 10 == 0:
+                        log_message(f"{label} RSS={rss_mb:.1f}MB (delta={delta:+.1f}MB){extra}")
+
+                # Fork storm: child count grew by `child_alert` within the ring.
+                kids = [s['children'] for s in ring if s['children'] is not None]
+                storm = child_alert > 0 and bool(kids) and kids[-1] - min(kids) >= child_alert
+                if storm and key not in storming:
+                    storming.add(key)
+                    log_message(
+                        f"{label} children={kids[-1]} (min {min(kids)} in last {len(ring)} samples)"
+                        " [ALERT: CHILD PROCESS STORM]"
+                    )
+                elif not storm and key in storming:
+                    storming.discard(key)
+                    log_message(f"{label} children={kids[-1] if kids else None} [CHILD PROCESS STORM cleared]")
+
+        try:
+            append_series(batch)
+        except OSError as e:
+            log_message(f"Failed to append samples: {e}")
+
         time.sleep(interval)
 
 
-def start_daemon(target: str, interval: int, threshold_mb: int):
+def run_query(metrics: List[str], window: float, target: Optional[str], qs: List[float], as_json: bool):
+    """Print percentiles of the recorded series, per target and pid.
+
+    Processes are kept apart: pooling the RSS of unrelated `name*` matches
+    into one distribution would make the percentiles meaningless.
+    """
+    samples = read_series(time.time() - window if window > 0 else 0.0, target)
+    by_proc = {}
+    for s in samples:
+        by_proc.setdefault((s['target'], s.get('pid') or ''), []).append(s)
+    report = {}
+    for (t, pid), rows in sorted(by_proc.items(), key=lambda kv: (kv[0][0], int(kv[0][1] or 0))):
+        report.setdefault(t, {})[pid] = {m: summarize(rows, m, qs) for m in metrics}
+    if as_json:
+        import json
+        print(json.dumps(report, indent=2))
+        return
+    if not report:
+        print(f"No samples in {SERIES_FILE.absolute()}")
+        return
+    for t, per_pid in report.items():
+        for pid, per_metric in per_pid.items():
+            print(f"{t}[{pid}]")
+            for m, stats in per_metric.items():
+                cells = '  '.join(f"{k}={v:g}" for k, v in stats.items() if k != 'count')
+                print(f"  {m:10} n={stats['count']}  {cells}")
+
+
+def start_daemon(targets: List[str], interval: int, threshold_mb: int, rescan: float = 60.0, **sampling):
     """Start the daemon in background."""
     if PID_FILE.exists():
         pid = int(PID_FILE.read_text().strip())
@@ -141,7 +418,7 @@ def start_daemon(target: str, interval: int, threshold_mb: int):
 
     # Single fork is enough; keep PID stable for stop/status.
     try:
-        monitor_loop(target, interval, threshold_mb)
+        monitor_loop(targets, interval, threshold_mb, rescan, **sampling)
     except KeyboardInterrupt:
         log_message("Daemon stopped (interrupted)")
         PID_FILE.unlink(missing_ok=True)
@@ -200,16 +477,21 @@ def show_status():
         print("  No logs yet")
 
 
-def run_foreground(target: str, interval: int, threshold_mb: int):
+def run_foreground(targets: List[str], interval: int, threshold_mb: int, rescan: float = 60.0, **sampling):
     """Run monitor loop in the foreground (for launchd/system service)."""
     try:
-        monitor_loop(target, interval, threshold_mb)
+        monitor_loop(targets, interval, threshold_mb, rescan, **sampling)
     except KeyboardInterrupt:
         log_message("Monitor stopped (interrupted)")
     except Exception as e:
         log_message(f"Monitor error: {e}")
 
 
+def parse_targets(values: Optional[List[str]]) -> List[str]:
+    targets = [t.strip() for v in (values or []) for t in v.split(',') if t.strip()]
+    return targets or ['host_test_app']
+
+
 def main():
     parser = argparse.ArgumentParser(description="Memory monitoring daemon")
     parser.add_argument(
@@ -220,30 +502,70 @@ def main():
     subparsers = parser.add_subparsers(dest='command', help='Command')
     
     run_cmd = subparsers.add_parser('run', help='Run in foreground (system service)')
-    run_cmd.add_argument('--target', default='host_test_app', help='Process name to monitor')
+    run_cmd.add_argument(
+        '--target',
+        action='append',
+        default=None,
+        help="Process name to monitor; repeat or comma-separate for several, suffix '*' for all matches "
+        "(default: host_test_app)",
+    )
+    run_cmd.add_argument('--rescan', type=float, default=60.0, help="Rescan interval for '*' targets (seconds)")
     run_cmd.add_argument('--interval', type=int, default=5, help='Sampling interval (seconds)')
     run_cmd.add_argument('--threshold', type=int, default=2048, help='Alert threshold (MB)')
+    run_cmd.add_argument('--ring', type=int, default=720, help='In-memory samples kept per process')
+    run_cmd.add_argument(
+        '--child-alert', type=int, default=20, help='Alert when child count grows by N within the ring (0 = off)'
+    )
 
     start_cmd = subparsers.add_parser('start', help='Start monitoring')
-    start_cmd.add_argument('--target', default='host_test_app', help='Process name to monitor')
+    start_cmd.add_argument(
+        '--target',
+        action='append',
+        default=None,
+        help="Process name to monitor; repeat or comma-separate for several, suffix '*' for all matches "
+        "(default: host_test_app)",
+    )
+    start_cmd.add_argument('--rescan', type=float, default=60.0, help="Rescan interval for '*' targets (seconds)")
     start_cmd.add_argument('--interval', type=int, default=5, help='Sampling interval (seconds)')
     start_cmd.add_argument('--threshold', type=int, default=2048, help='Alert threshold (MB)')
+    start_cmd.add_argument('--ring', type=int, default=720, help='In-memory samples kept per process')
+    start_cmd.add_argument(
+        '--child-alert', type=int, default=20, help='Alert when child count grows by N within the ring (0 = off)'
+    )
     
     subparsers.add_parser('stop', help='Stop monitoring')
     subparsers.add_parser('status', help='Show status and recent logs')
+
+    query_cmd = subparsers.add_parser('query', help='Percentiles over recorded samples')
+    query_cmd.add_argument('--metric', default='rss_mb', help=f"Comma-separated, from: {','.join(METRICS)}")
+    query_cmd.add_argument('--window', type=float, default=3600, help='Seconds back from now (0 = all)')
+    query_cmd.add_argument('--target', default=None, help='Only this target')
+    query_cmd.add_argument('--percentiles', default='50,90,99', help='Comma-separated percentiles')
+    query_cmd.add_argument('--json', action='store_true')
     
     args = parser.parse_args()
 
     set_state_dir(args.state_dir)
+
+    if args.command in ('run', 'start'):
+        targets = parse_targets(args.target)
+        sampling = {'ring_size': args.ring, 'child_alert': args.child_alert}
     
     if args.command == 'run':
-        run_foreground(args.target, args.interval, args.threshold)
+        run_foreground(targets, args.interval, args.threshold, args.rescan, **sampling)
     elif args.command == 'start':
-        start_daemon(args.target, args.interval, args.threshold)
+        start_daemon(targets, args.interval, args.threshold, args.rescan, **sampling)
     elif args.command == 'stop':
         stop_daemon()
     elif args.command == 'status':
         show_status()
+    elif args.command == 'query':
+        metrics = [m.strip() for m in args.metric.split(',') if m.strip()]
+        unknown = [m for m in metrics if m not in METRICS]
+        if unknown:
+            parser.error(f"unknown metric(s): {','.join(unknown)}")
+        qs = [float(q) for q in args.percentiles.split(',') if q.strip()]
+        run_query(metrics, args.window, args.target, qs, args.json)
     else:
         parser.print_help()
 
@@ -0,0 +1,177 @@
+"""Length-prefixed binary framing for the iTerm2 bridge protocol.
+
+The default protocol is one JSON object per line, with byte payloads (session
+text) carried as base64 strings. Binary framing keeps the same JSON objects
+but moves payloads out of the JSON into a raw byte section:
+
+  +----------------+----------------+-------------+---------------+
+  | header_len u32 | payload_len u32| header JSON | payload bytes |
+  +----------------+----------------+-------------+---------------+
+    (big-endian)
+
+Inside the header every payload is replaced by `{"$payload": [offset, length]}`
+pointing into the payload section, so the Dart side can hand the raw UTF-8
+bytes straight to its decoder instead of base64-decoding a JSON string.
+
+Handlers mark byte payloads with `Payload(...)`; `dumps_line()` (JSON mode)
+turns them back into base64 strings, `encode_frame()` (binary mode) moves them
+into the payload section. `FrameDecoder` is the reference incremental decoder;
+decoded payloads are memoryview slices of the received frame (no copy).
+"""
+
+import asyncio
+import base64
+import json
+import struct
+
+HEADER = struct.Struct(">II")
+PAYLOAD_KEY = "$payload"
+
+# Refuse frames beyond this size instead of buffering without bound.
+MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+
+class FramingError(ValueError):
+    pass
+
+
+class Payload:
+    """Raw bytes that should travel outside the JSON when framing is on."""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self.data = data
+
+    def __len__(self):
+        return len(self.data)
+
+    def b64(self):
+        return base64.b64encode(self.data).decode("ascii")
+
+
+def _json_default(obj):
+    if isinstance(obj, Payload):
+        return obj.b64()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """JSON text for `obj`, with payloads as base64 strings."""
+    return json.dumps(obj, ensure_ascii=False, default=_json_default)
+
+
+def dumps_line(obj):
+    return (dumps(obj) + "\n").encode("utf-8")
+
+
+def _extract(obj, blobs, offset):
+    """Copy `obj` with payloads replaced by references; returns (copy, offset)."""
+    if isinstance(obj, Payload):
+        n = len(obj.data)
+        blobs.append(obj.data)
+        return {PAYLOAD_KEY: [offset, n]}, offset + n
+    if isinstance(obj, dict):
+        out = {}
+        for k, v in obj.items():
+            out[k], offset = _extract(v, blobs, offset)
+        return out, offset
+    if isinstance(obj, (list, tuple)):
+        out = []
+        for v in obj:
+            item, offset = _extract(v, blobs, offset)
+            out.append(item)
+        return out, offset
+    return obj, offset
+
+
+def encode_frame(obj):
+    blobs = []
+    header_obj, size = _extract(obj, blobs, 0)
+    header = json.dumps(header_obj, ensure_ascii=False).encode("utf-8")
+    return b"".join([HEADER.pack(len(header), size), header] + blobs)
+
+
+def _resolve(obj, body):
+    if isinstance(obj, dict):
+        ref = obj.get(PAYLOAD_KEY) if len(obj) == 1 else None
+        if ref is not None:
+            try:
+                off, n = int(ref[0]), int(ref[1])
+            except Exception:
+                raise FramingError(f"bad payload reference: {ref!r}")
+            if off < 0 or n < 0 or off + n > len(body):
+                raise FramingError(f"payload reference out of range: {ref!r}")
+            return body[off:off + n]
+        return {k: _resolve(v, body) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_resolve(v, body) for v in obj]
+    return obj
+
+
+def decode_frame(frame):
+    """Decode one complete frame; payloads become memoryview slices."""
+    view = memoryview(frame)
+    if len(view) < HEADER.size:
+        raise FramingError("truncated frame header")
+    hlen, plen = HEADER.unpack_from(view, 0)
+    if len(view) != HEADER.size + hlen + plen:
+        raise FramingError("frame length mismatch")
+    header = json.loads(bytes(view[HEADER.size:HEADER.size + hlen]).decode("utf-8"))
+    return _resolve(header, view[HEADER.size + hlen:])
+
+
+class FrameDecoder:
+    """Incremental decoder: `feed()` bytes, get back the completed objects."""
+
+    def __init__(self, max_frame=MAX_FRAME_BYTES):
+        self.max_frame = max_frame
+        self._buf = bytearray()
+
+    def feed(self, data):
+        self._buf += data
+        out = []
+        while len(self._buf) >= HEADER.size:
+            hlen, plen = HEADER.unpack_from(self._buf, 0)
+            total = HEADER.size + hlen + plen
+            if total > self.max_frame:
+                raise FramingError(f"frame of {total} bytes exceeds limit {self.max_frame}")
+            if len(self._buf) < total:
+                break
+            frame = bytes(self._buf[:total])
+            del self._buf[:total]
+            out.append(decode_frame(frame))
+        return out
+
+    @property
+    def pending(self):
+        return len(self._buf)
+
+
+async def read_frame(reader, max_frame=MAX_FRAME_BYTES):
+    """Read one frame from an asyncio StreamReader; None at clean EOF."""
+    try:
+        head = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise FramingError("truncated frame header")
+    hlen, plen = HEADER.unpack(head)
+    if HEADER.size + hlen + plen > max_frame:
+        raise FramingError(f"frame of {HEADER.size + hlen + plen} bytes exceeds limit {max_frame}")
+    rest = await reader.readexactly(hlen + plen)
+    return decode_frame(head + rest)
+
+
+def text_of(value):
+    """Session text from a payload field: raw bytes (binary) or base64 (JSON)."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).decode("utf-8", errors="replace")
+    if isinstance(value, str):
+        try:
+            return base64.b64decode(value.encode("ascii"), validate=False).decode("utf-8", errors="replace")
+        except Exception:
+            return ""
+    return ""
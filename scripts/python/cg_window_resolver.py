@@ -0,0 +1,214 @@
+"""Map iTerm2 windows to macOS CGWindowIDs.
+
+ScreenCaptureKit / `screencapture -l` need the CGWindowID of an iTerm2
+window, which the iTerm2 API does not expose. We find it by listing the
+on-screen windows owned by iTerm2 and picking the one whose bounds are
+closest to the iTerm2 window frame.
+
+`CGWindowResolver` caches `window_number -> CGWindowID` together with the
+frame it was resolved for; the window list is only queried again when that
+frame changes (window moved/resized) or the id disappears. Candidates are
+scored by distance between frames, so there are no fixed per-axis
+tolerances to tune. There are only ever a handful of iTerm2 windows, so
+scoring is plain Python; the module stays cheap to import.
+
+Window lists come from a provider:
+
+- `QuartzWindowProvider`: CGWindowListCopyWindowInfo (macOS, PyObjC).
+- `FakeWindowProvider`: a static list, for tests and Linux.
+
+Each provider returns plain dicts:
+  {"id", "owner", "pid", "title", "layer", "x", "y", "w", "h"}
+in CoreGraphics coordinates (origin top-left of the main display).
+"""
+
+import threading
+
+try:
+    import Quartz
+except Exception:
+    Quartz = None
+
+OWNER_MATCH = "iterm"
+
+# Y is compared in both CG (top-left) and Cocoa (bottom-left) orientation and
+# weighted lower: iTerm2 frames can be either, and the title bar / menu bar
+# shifts Y more than the other edges.
+Y_WEIGHT = 0.5
+
+# Reject the best candidate when its score exceeds this fraction of the
+# window's perimeter (w + h); nothing on screen resembles the frame then.
+MAX_RELATIVE_SCORE = 0.25
+
+# A cached frame still counts as the same frame within this many points.
+FRAME_EPSILON = 0.5
+
+
+def _num(bounds, key):
+    try:
+        return float(bounds.get(key, 0) if hasattr(bounds, "get") else bounds[key])
+    except Exception:
+        return 0.0
+
+
+class QuartzWindowProvider:
+    """On-screen windows from CGWindowListCopyWindowInfo."""
+
+    def __init__(self):
+        if Quartz is None:
+            raise RuntimeError("Quartz (pyobjc) is not available")
+
+    def screen_height(self):
+        try:
+            return float(Quartz.CGDisplayBounds(Quartz.CGMainDisplayID()).size.height)
+        except Exception:
+            return None
+
+    def list_windows(self):
+        infos = Quartz.CGWindowListCopyWindowInfo(
+            Quartz.kCGWindowListOptionOnScreenOnly | Quartz.kCGWindowListExcludeDesktopElements,
+            Quartz.kCGNullWindowID,
+        ) or []
+        out = []
+        for info in infos:
+            wid = info.get("kCGWindowNumber")
+            if not isinstance(wid, int) or wid <= 0:
+                continue
+            b = info.get("kCGWindowBounds") or {}
+            out.append({
+                "id": wid,
+                "owner": str(info.get("kCGWindowOwnerName") or ""),
+                "pid": int(info.get("kCGWindowOwnerPID") or 0),
+                "title": str(info.get("kCGWindowName") or ""),
+                "layer": int(info.get("kCGWindowLayer") or 0),
+                "x": _num(b, "X"),
+                "y": _num(b, "Y"),
+                "w": _num(b, "Width"),
+                "h": _num(b, "Height"),
+            })
+        return out
+
+
+class FakeWindowProvider:
+    """Static window list (tests / non-macOS)."""
+
+    def __init__(self, windows, screen_height=None):
+        self.windows = [dict(w) for w in windows]
+        self._screen_height = screen_height
+        self.calls = 0
+
+    def screen_height(self):
+        return self._screen_height
+
+    def list_windows(self):
+        self.calls += 1
+        return [dict(w) for w in self.windows]
+
+
+def score_candidates(candidates, frame, screen_height=None):
+    """Distance of every candidate to `frame` ({"x","y","w","h"}); lower is better."""
+    fx = float(frame.get("x", 0))
+    fy = float(frame.get("y", 0))
+    fw = float(frame.get("w", 0))
+    fh = float(frame.get("h", 0))
+    # The same frame expressed with a flipped Y axis.
+    fy_flip = (screen_height - fy - fh) if screen_height else fy
+    out = []
+    for c in candidates:
+        dy = min(abs(c["y"] - fy), abs(c["y"] - fy_flip))
+        out.append(abs(c["x"] - fx) + Y_WEIGHT * dy + abs(c["w"] - fw) + abs(c["h"] - fh))
+    return out
+
+
+def _same_frame(a, b):
+    if a is None or b is None:
+        return a is b
+    return all(abs(float(a.get(k, 0)) - float(b.get(k, 0))) <= FRAME_EPSILON for k in ("x", "y", "w", "h"))
+
+
+class CGWindowResolver:
+    """Cached `window_number -> CGWindowID` lookup for one app's windows.
+
+    `resolve()` is thread-safe: the session cache runs it off the event loop.
+    """
+
+    def __init__(self, provider, owner_match=OWNER_MATCH):
+        self.provider = provider
+        self.owner_match = owner_match.lower()
+        # window_number -> (frame dict | None, cg id)
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+
+    def candidates(self):
+        """Normal-layer windows whose owner matches, in front-to-back order."""
+        self.lookups += 1
+        wins = self.provider.list_windows()
+        return [w for w in wins if self.owner_match in w["owner"].lower() and w.get("layer", 0) == 0]
+
+    def invalidate(self, window_number=None):
+        if window_number is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(window_number, None)
+
+    def resolve(self, window_number, frame=None):
+        """CGWindowID for iTerm2 window `window_number` with `frame`, or None."""
+        with self._lock:
+            return self._resolve(window_number, frame)
+
+    def _resolve(self, window_number, frame):
+        hit = self._cache.get(window_number)
+        if hit is not None and _same_frame(hit[0], frame):
+            return hit[1]
+
+        cands = self.candidates()
+        live = {c["id"] for c in cands}
+        for num, (_, cg) in list(self._cache.items()):
+            if cg not in live:
+                del self._cache[num]
+        if not cands:
+            self._cache.pop(window_number, None)
+            return None
+
+        if not frame:
+            cg = cands[0]["id"]
+        else:
+            # Do not hand out an id another window number already owns.
+            taken = {cg for num, (_, cg) in self._cache.items() if num != window_number}
+            pool = [c for c in cands if c["id"] not in taken] or cands
+            scores = score_candidates(pool, frame, self.provider.screen_height())
+            best = min(range(len(pool)), key=scores.__getitem__)
+            limit = MAX_RELATIVE_SCORE * (float(frame.get("w", 0)) + float(frame.get("h", 0)))
+            if limit > 0 and scores[best] > limit:
+                self._cache.pop(window_number, None)
+                return None
+            cg = pool[best]["id"]
+        self._cache[window_number] = (dict(frame) if frame else None, cg)
+        return cg
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_resolver():
+    """Process-wide resolver backed by Quartz, or None off macOS."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            try:
+                _default = CGWindowResolver(QuartzWindowProvider())
+            except Exception:
+                return None
+        return _default
+
+
+def resolve_cg_window_id(window_number, frame=None):
+    resolver = default_resolver()
+    if resolver is None:
+        return None
+    try:
+        return resolver.resolve(window_number, frame)
+    except Exception:
+        return None
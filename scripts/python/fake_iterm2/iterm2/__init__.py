@@ -0,0 +1,61 @@
+"""In-process stand-in for the `iterm2` Python API (no macOS, no iTerm2).
+
+Put this directory first on PYTHONPATH and the real bridge scripts run
+unchanged against a synthetic window/tab/split tree:
+
+  PYTHONPATH=scripts/python/fake_iterm2 ITERMREMOTE_FAKE_ITERM2=panes=100,rpc_ms=0.5 \\
+      python3 scripts/python/iterm2_sources.py --timings
+
+See `synthetic` for the spec keys. Every `async_*` call costs one simulated
+RPC (`rpc_ms` + jitter); set ITERMREMOTE_FAKE_ITERM2_STATS=<path> to get
+the per-RPC counts as JSON when the process exits.
+
+Only the surface the bridge scripts use is implemented.
+"""
+
+from . import session
+from .app import App
+from .connection import Connection, run_forever, run_until_complete, stats
+from .focus import FocusMonitor, FocusUpdate, FocusUpdateActiveSessionChanged, FocusUpdateSelectedTabChanged
+from .lifecycle import LayoutChangeMonitor, NewSessionMonitor, SessionTerminationMonitor
+from .session import LineContents, LineInfo, Session, Splitter
+from .synthetic import build_app
+from .tab import Tab
+from .transaction import Transaction
+from .util import Frame, Point, Size
+from .window import Window
+
+
+async def async_get_app(connection, create_if_needed=True):
+    await connection.rpc("app.list")
+    if connection.app is None:
+        connection.app = build_app(connection)
+    return connection.app
+
+
+__all__ = [
+    "App",
+    "Connection",
+    "FocusMonitor",
+    "FocusUpdate",
+    "FocusUpdateActiveSessionChanged",
+    "FocusUpdateSelectedTabChanged",
+    "Frame",
+    "LayoutChangeMonitor",
+    "LineContents",
+    "LineInfo",
+    "NewSessionMonitor",
+    "Point",
+    "Session",
+    "SessionTerminationMonitor",
+    "Size",
+    "Splitter",
+    "Tab",
+    "Transaction",
+    "Window",
+    "async_get_app",
+    "run_forever",
+    "run_until_complete",
+    "session",
+    "stats",
+]
@@ -0,0 +1,129 @@
+"""App: the window/tab/session tree of one connection.
+
+Like the real App, it applies its own layout/focus changes and then posts
+the matching notifications to the connection's monitors.
+"""
+
+from . import synthetic
+from .focus import FocusUpdate, FocusUpdateActiveSessionChanged
+from .session import Session, Splitter, frame_of
+
+
+class App:
+    def __init__(self, connection, spec=None):
+        self.connection = connection
+        self.spec = dict(spec or connection.spec)
+        self.windows = []
+        self.current_terminal_window = None
+
+    @property
+    def terminal_windows(self):
+        return self.windows
+
+    def get_window_by_id(self, window_id):
+        for w in self.windows:
+            if w.window_id == window_id:
+                return w
+        return None
+
+    def get_tab_by_id(self, tab_id):
+        for w in self.windows:
+            for t in w.tabs:
+                if t.tab_id == tab_id:
+                    return t
+        return None
+
+    def get_session_by_id(self, session_id, include_buried_sessions=True):
+        for w in self.windows:
+            for t in w.tabs:
+                for s in t.sessions:
+                    if s.session_id == session_id:
+                        return s
+        return None
+
+    def get_tab_and_window_for_session(self, session):
+        for w in self.windows:
+            for t in w.tabs:
+                if session in t.sessions:
+                    return t, w
+        return None, None
+
+    async def async_activate(self, raise_all_windows=True, ignoring_other_apps=False):
+        await self.connection.rpc("app.activate")
+
+    # --- mutations -----------------------------------------------------------
+
+    def _notify(self, kind, update):
+        self.connection.notify(kind, update)
+
+    def _focus(self, session):
+        tab = session.tab
+        window = tab.window
+        changed = tab.current_session is not session or window.current_tab is not tab \
+            or self.current_terminal_window is not window
+        tab.current_session = session
+        window.current_tab = tab
+        self.current_terminal_window = window
+        if changed:
+            self._notify("focus", FocusUpdate(active_session_changed=FocusUpdateActiveSessionChanged(session.session_id)))
+
+    def _parent(self, root, node):
+        stack = [root]
+        while stack:
+            n = stack.pop()
+            if isinstance(n, Splitter):
+                if node in n.children:
+                    return n
+                stack.extend(n.children)
+        return None
+
+    def _split(self, session, vertical, before):
+        tab = session.tab
+        f = session.frame
+        x, y, w, h = f.origin.x, f.origin.y, f.size.width, f.size.height
+        if vertical:
+            a, b = (x, y, w / 2, h), (x + w / 2, y, w - w / 2, h)
+        else:
+            a, b = (x, y, w, h / 2), (x, y + h / 2, w, h - h / 2)
+        if before:
+            a, b = b, a
+        session.frame = frame_of(*a)
+        new = Session(self.connection, synthetic.new_session_id(), frame_of(*b), name=session.name)
+        new.tab = tab
+        parent = self._parent(tab.root, session)
+        if len(parent.children) == 1:
+            parent._reorient(vertical)
+        if parent.vertical == vertical:
+            i = parent.children.index(session)
+            parent.children.insert(i if before else i + 1, new)
+        else:
+            pair = [new, session] if before else [session, new]
+            parent.children[parent.children.index(session)] = Splitter(vertical, pair)
+        self._notify("newSession", new.session_id)
+        self._notify("layout", None)
+        return new
+
+    def _close(self, session):
+        tab = session.tab
+        parent = self._parent(tab.root, session)
+        if parent is not None:
+            parent.children.remove(session)
+            if len(parent.children) == 1 and parent is not tab.root:
+                grand = self._parent(tab.root, parent)
+                grand.children[grand.children.index(parent)] = parent.children[0]
+        remaining = tab.sessions
+        if not remaining:
+            window = tab.window
+            window.tabs.remove(tab)
+            if window.current_tab is tab:
+                window.current_tab = window.tabs[0] if window.tabs else None
+            if not window.tabs:
+                self.windows.remove(window)
+                if self.current_terminal_window is window:
+                    self.current_terminal_window = self.windows[0] if self.windows else None
+        else:
+            synthetic.relayout(tab.root, 0.0, 0.0, self.spec["width"], self.spec["height"])
+            if tab.current_session is session:
+                tab.current_session = remaining[0]
+        self._notify("terminateSession", session.session_id)
+        self._notify("layout", None)
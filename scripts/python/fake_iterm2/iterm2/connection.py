@@ -0,0 +1,88 @@
+"""Fake iTerm2 API connection with simulated per-RPC latency.
+
+Every `async_*` call on an app object goes through `Connection.rpc()`, which
+sleeps `rpc_ms` plus uniform 0..`jitter_ms` and counts the call by name.
+Concurrent RPCs overlap, like pipelined requests on the real websocket.
+"""
+
+import asyncio
+import atexit
+import json
+import os
+import random
+
+from . import synthetic
+
+STATS_ENV = "ITERMREMOTE_FAKE_ITERM2_STATS"
+
+_connections = []
+
+
+class Connection:
+    def __init__(self, rpc_ms=None, jitter_ms=None, seed=None, spec=None):
+        self.spec = spec if spec is not None else synthetic.spec_from_env()
+        self.rpc_ms = self.spec["rpc_ms"] if rpc_ms is None else rpc_ms
+        self.jitter_ms = self.spec["jitter_ms"] if jitter_ms is None else jitter_ms
+        self._rng = random.Random(self.spec["seed"] if seed is None else seed)
+        self.rpc_counts = {}
+        self.rpc_total = 0
+        self.app = None
+        self.monitors = {}  # monitor kind -> set of queues
+        _connections.append(self)
+
+    @classmethod
+    async def async_create(cls):
+        return cls()
+
+    async def rpc(self, name):
+        self.rpc_counts[name] = self.rpc_counts.get(name, 0) + 1
+        self.rpc_total += 1
+        delay = self.rpc_ms
+        if self.jitter_ms > 0:
+            delay += self._rng.uniform(0.0, self.jitter_ms)
+        # Always yield, so the call is a real suspension point.
+        await asyncio.sleep(delay / 1000.0 if delay > 0 else 0)
+
+    def notify(self, kind, update):
+        for queue in list(self.monitors.get(kind, ())):
+            queue.put_nowait(update)
+
+    def run_until_complete(self, coro, retry=False):
+        return asyncio.run(coro(self))
+
+    def run_forever(self, coro, retry=False):
+        async def forever(connection):
+            await coro(connection)
+            await asyncio.Future()
+
+        return asyncio.run(forever(self))
+
+
+def run_until_complete(coro, retry=False, debug=False):
+    return Connection().run_until_complete(coro)
+
+
+def run_forever(coro, retry=False, debug=False):
+    return Connection().run_forever(coro)
+
+
+def stats():
+    """RPC counts summed over every connection made in this process."""
+    counts = {}
+    for c in _connections:
+        for name, n in c.rpc_counts.items():
+            counts[name] = counts.get(name, 0) + n
+    return {"connections": len(_connections), "rpcs": sum(counts.values()), "byName": counts}
+
+
+def _write_stats():
+    path = os.environ.get(STATS_ENV)
+    if path:
+        try:
+            with open(path, "w") as f:
+                json.dump(stats(), f)
+        except OSError:
+            pass
+
+
+atexit.register(_write_stats)
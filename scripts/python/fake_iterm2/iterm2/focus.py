@@ -0,0 +1,28 @@
+"""FocusMonitor and its update types."""
+
+from .lifecycle import _Monitor
+
+
+class FocusUpdateActiveSessionChanged:
+    def __init__(self, session_id):
+        self.session_id = session_id
+
+
+class FocusUpdateSelectedTabChanged:
+    def __init__(self, tab_id):
+        self.tab_id = tab_id
+
+
+class FocusUpdate:
+    def __init__(self, active_session_changed=None, selected_tab_changed=None):
+        self.active_session_changed = active_session_changed
+        self.selected_tab_changed = selected_tab_changed
+        self.window_changed = None
+        self.application_active = None
+
+
+class FocusMonitor(_Monitor):
+    kind = "focus"
+
+    async def async_get_next_update(self):
+        return await self._queue.get()
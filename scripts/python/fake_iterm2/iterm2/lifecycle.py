@@ -0,0 +1,38 @@
+"""Notification monitors (LayoutChange / NewSession / SessionTermination)."""
+
+import asyncio
+
+
+class _Monitor:
+    kind = ""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._queue = asyncio.Queue()
+
+    async def __aenter__(self):
+        await self.connection.rpc(f"subscribe.{self.kind}")
+        self.connection.monitors.setdefault(self.kind, set()).add(self._queue)
+        return self
+
+    async def __aexit__(self, *_):
+        self.connection.monitors.get(self.kind, set()).discard(self._queue)
+
+    async def async_get(self):
+        return await self._queue.get()
+
+
+class LayoutChangeMonitor(_Monitor):
+    kind = "layout"
+
+
+class NewSessionMonitor(_Monitor):
+    """async_get() returns the new session id."""
+
+    kind = "newSession"
+
+
+class SessionTerminationMonitor(_Monitor):
+    """async_get() returns the terminated session id."""
+
+    kind = "terminateSession"
@@ -0,0 +1,181 @@
+"""Session (split-tree leaf) and Splitter, plus the screen/buffer APIs.
+
+Each session keeps a line buffer: `history` scrollback lines followed by a
+screen of `grid_size.height` lines. `async_send_text` appends to it (CR/LF
+end a line) and wakes screen streamers; scrollback beyond `max_scrollback`
+moves into `overflow`, as in iTerm2.
+"""
+
+import asyncio
+
+from .util import Frame, Size
+
+CELL_W = 7.0
+CELL_H = 16.0
+
+
+class LineInfo:
+    def __init__(self, overflow, scrollback_buffer_height, mutable_area_height, first_visible_line_number):
+        self.overflow = overflow
+        self.scrollback_buffer_height = scrollback_buffer_height
+        self.mutable_area_height = mutable_area_height
+        self.first_visible_line_number = first_visible_line_number
+
+
+class LineContents:
+    __slots__ = ("string", "hard_eol")
+
+    def __init__(self, string, hard_eol=True):
+        self.string = string
+        self.hard_eol = hard_eol
+
+
+class ScreenStreamer:
+    def __init__(self, session, want_contents):
+        self.session = session
+        self.want_contents = want_contents
+
+    async def __aenter__(self):
+        await self.session._rpc("screenStreamer.subscribe")
+        return self
+
+    async def __aexit__(self, *_):
+        pass
+
+    async def async_get(self, style=False):
+        await self.session._changed.wait()
+        self.session._changed.clear()
+        return None
+
+
+class Splitter:
+    """Inner split-tree node; `vertical` splitters place children side by side."""
+
+    def __init__(self, vertical=False, children=None):
+        self.__vertical = vertical
+        self.children = list(children or [])
+
+    @property
+    def vertical(self):
+        return self.__vertical
+
+    def _reorient(self, vertical):
+        self.__vertical = vertical
+
+    @property
+    def sessions(self):
+        out = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Session):
+                out.append(node)
+            else:
+                stack.extend(reversed(node.children))
+        return out
+
+
+class Session:
+    def __init__(self, connection, session_id, frame, name="zsh", history=0, max_scrollback=10000):
+        self.connection = connection
+        self.session_id = session_id
+        self.name = name
+        self.frame = frame
+        self.tab = None
+        self.variables = {"session.name": name, "jobName": name, "path": "/Users/fake", "hostname": "fake"}
+        self.max_scrollback = max_scrollback
+        self.overflow = 0
+        self._lines = [LineContents(f"{name} history line {i}") for i in range(history)]
+        self._lines.append(LineContents(f"{name} $ ", hard_eol=False))
+        self._changed = asyncio.Event()
+
+    def __repr__(self):
+        return f"<Session {self.session_id}>"
+
+    @property
+    def grid_size(self):
+        f = self.frame
+        return Size(max(1, int(f.size.width // CELL_W)), max(1, int(f.size.height // CELL_H)))
+
+    async def _rpc(self, name):
+        await self.connection.rpc(name)
+
+    # --- variables ---------------------------------------------------------
+
+    async def async_get_variable(self, name):
+        await self._rpc("session.getVariable")
+        if name.startswith("tab.") and self.tab is not None:
+            return self.tab.variables.get(name[4:])
+        return self.variables.get(name)
+
+    async def async_set_variable(self, name, value):
+        await self._rpc("session.setVariable")
+        self.variables[name] = value
+
+    # --- focus / layout ----------------------------------------------------
+
+    async def async_activate(self, select_tab=True, order_window_front=True):
+        await self._rpc("session.activate")
+        if self.tab is not None:
+            self.tab.app._focus(self)
+
+    async def async_split_pane(self, vertical=False, before=False, profile=None):
+        await self._rpc("session.splitPane")
+        return self.tab.app._split(self, vertical, before)
+
+    async def async_close(self, force=False):
+        await self._rpc("session.close")
+        self.tab.app._close(self)
+
+    # --- buffer --------------------------------------------------------------
+
+    def _screen_rows(self):
+        return self.grid_size.height
+
+    def _all_lines(self):
+        rows = self._screen_rows()
+        if len(self._lines) >= rows:
+            return self._lines
+        return self._lines + [LineContents("") for _ in range(rows - len(self._lines))]
+
+    async def async_send_text(self, text, suppress_broadcast=False):
+        await self._rpc("session.sendText")
+        last = self._lines[-1]
+        buf = last.string
+        for ch in text:
+            if ch in "\r\n":
+                self._lines[-1] = LineContents(buf, hard_eol=True)
+                buf = ""
+                self._lines.append(LineContents("", hard_eol=False))
+            else:
+                buf += ch
+        self._lines[-1] = LineContents(buf, hard_eol=False)
+        limit = self.max_scrollback + self._screen_rows()
+        if len(self._lines) > limit:
+            drop = len(self._lines) - limit
+            del self._lines[:drop]
+            self.overflow += drop
+        self._changed.set()
+
+    async def async_get_line_info(self):
+        await self._rpc("session.getLineInfo")
+        rows = self._screen_rows()
+        history = max(0, len(self._lines) - rows)
+        return LineInfo(self.overflow, history, rows, self.overflow + history)
+
+    async def async_get_contents(self, first_line, number_of_lines):
+        await self._rpc("session.getContents")
+        lines = self._all_lines()
+        start = max(0, int(first_line) - self.overflow)
+        return lines[start:start + max(0, int(number_of_lines))]
+
+    async def async_get_screen_contents(self):
+        await self._rpc("session.getScreenContents")
+        return self._all_lines()[-self._screen_rows():]
+
+    def get_screen_streamer(self, want_contents=True):
+        return ScreenStreamer(self, want_contents)
+
+
+def frame_of(x, y, w, h):
+    return Frame.rect(float(x), float(y), float(w), float(h))
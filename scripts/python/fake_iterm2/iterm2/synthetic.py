@@ -0,0 +1,186 @@
+"""Synthetic window/tab/split-tree generator for the fake iterm2 package.
+
+The shape comes from `ITERMREMOTE_FAKE_ITERM2` (comma-separated key=value):
+
+  windows=1   tabs=1 (per window)   panes=2 (total, at least one per tab)
+  seed=0      rpc_ms=0   jitter_ms=0   history=0 (scrollback lines/session)
+  width=1600  height=1000 (tab content size in points)
+
+e.g. `ITERMREMOTE_FAKE_ITERM2=windows=2,tabs=3,panes=1000,rpc_ms=0.5`.
+
+Trees are built like a user splitting panes: a random pane count goes to
+each side, the split mostly follows the longer side, and children with the
+same orientation as their parent are merged into one n-ary Splitter, as
+iTerm2 does. Session frames are absolute within the tab. Everything is
+iterative, so 1000-pane chains do not hit the recursion limit.
+"""
+
+import os
+import random
+import uuid
+
+from .session import Session, Splitter, frame_of
+from .tab import Tab
+from .window import Window
+
+SPEC_ENV = "ITERMREMOTE_FAKE_ITERM2"
+
+DEFAULT_SPEC = {
+    "windows": 1,
+    "tabs": 1,
+    "panes": 2,
+    "seed": 0,
+    "rpc_ms": 0.0,
+    "jitter_ms": 0.0,
+    "history": 0,
+    "width": 1600.0,
+    "height": 1000.0,
+}
+
+SESSION_NAMES = ("zsh", "bash", "python3", "vim", "htop", "ssh", "node", "tail")
+
+# Session/window ids are drawn from here so a given seed gives stable ids.
+_ids = random.Random(0)
+
+
+def parse_spec(text):
+    spec = dict(DEFAULT_SPEC)
+    for item in (text or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, sep, value = item.partition("=")
+        key = key.strip()
+        if not sep or key not in DEFAULT_SPEC:
+            raise ValueError(f"bad {SPEC_ENV} entry {item!r} (keys: {', '.join(DEFAULT_SPEC)})")
+        spec[key] = type(DEFAULT_SPEC[key])(value.strip())
+    return spec
+
+
+def spec_from_env():
+    return parse_spec(os.environ.get(SPEC_ENV, ""))
+
+
+def new_session_id(rng=None):
+    return str(uuid.UUID(int=(rng or _ids).getrandbits(128), version=4)).upper()
+
+
+def _flatten(root):
+    """Merge same-orientation child splitters into their parent."""
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        children = []
+        pending = list(reversed(node.children))
+        while pending:
+            child = pending.pop()
+            if isinstance(child, Splitter) and child.vertical == node.vertical:
+                pending.extend(reversed(child.children))
+            else:
+                children.append(child)
+        node.children = children
+        stack.extend(c for c in children if isinstance(c, Splitter))
+    return root
+
+
+def build_tree(connection, panes, width, height, rng, history=0):
+    """Random split tree of `panes` sessions filling a width x height tab."""
+    if panes <= 1:
+        session = Session(connection, new_session_id(rng), frame_of(0, 0, width, height),
+                          name=rng.choice(SESSION_NAMES), history=history)
+        return Splitter(False, [session])
+
+    root_holder = []
+    stack = [(panes, 0.0, 0.0, float(width), float(height), root_holder)]
+    while stack:
+        n, x, y, w, h, sink = stack.pop()
+        if n <= 1:
+            sink.append(Session(connection, new_session_id(rng), frame_of(x, y, w, h),
+                                name=rng.choice(SESSION_NAMES), history=history))
+            continue
+        vertical = (w >= h) if rng.random() < 0.8 else (w < h)
+        left = rng.randint(1, n - 1)
+        ratio = left / n
+        node = Splitter(vertical)
+        children = node.children
+        sink.append(node)
+        if vertical:
+            a = (left, x, y, w * ratio, h)
+            b = (n - left, x + w * ratio, y, w * (1 - ratio), h)
+        else:
+            a = (left, x, y, w, h * ratio)
+            b = (n - left, x, y + h * ratio, w, h * (1 - ratio))
+        # Children are appended in pop order; push b first so a lands first.
+        stack.append((*b, children))
+        stack.append((*a, children))
+    return _flatten(root_holder[0])
+
+
+def relayout(root, x, y, w, h):
+    """Stretch the tree to fill (x, y, w, h), keeping each child's share."""
+    extent = {}
+    # Post-order: current (w, h) of every node from its sessions' frames.
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if isinstance(node, Splitter):
+            stack.extend(node.children)
+    for node in reversed(order):
+        if isinstance(node, Session):
+            extent[id(node)] = (node.frame.size.width, node.frame.size.height)
+            continue
+        sizes = [extent[id(c)] for c in node.children] or [(0.0, 0.0)]
+        if node.vertical:
+            extent[id(node)] = (sum(s[0] for s in sizes), max(s[1] for s in sizes))
+        else:
+            extent[id(node)] = (max(s[0] for s in sizes), sum(s[1] for s in sizes))
+
+    stack = [(root, x, y, w, h)]
+    while stack:
+        node, nx, ny, nw, nh = stack.pop()
+        if isinstance(node, Session):
+            node.frame = frame_of(nx, ny, nw, nh)
+            continue
+        axis = 0 if node.vertical else 1
+        total = sum(extent[id(c)][axis] for c in node.children)
+        offset = 0.0
+        for c in node.children:
+            share = extent[id(c)][axis] / total if total > 0 else 1.0 / len(node.children)
+            if node.vertical:
+                stack.append((c, nx + offset, ny, nw * share, nh))
+                offset += nw * share
+            else:
+                stack.append((c, nx, ny + offset, nw, nh * share))
+                offset += nh * share
+
+
+def build_app(connection, spec=None):
+    """Populate a new App from `spec` (defaults to the connection's spec)."""
+    # Imported here: app.py imports this module for ids and relayout.
+    from .app import App
+
+    spec = dict(spec or connection.spec)
+    rng = random.Random(spec["seed"])
+    _ids.seed(spec["seed"])
+    app = App(connection, spec)
+
+    windows = max(1, int(spec["windows"]))
+    tabs = max(1, int(spec["tabs"]))
+    total_tabs = windows * tabs
+    per_tab, extra = divmod(max(int(spec["panes"]), total_tabs), total_tabs)
+
+    tab_index = 0
+    for w in range(windows):
+        tab_list = []
+        for t in range(tabs):
+            panes = per_tab + (1 if tab_index < extra else 0)
+            root = build_tree(connection, panes, spec["width"], spec["height"], rng, int(spec["history"]))
+            tab_index += 1
+            tab_list.append(Tab(app, str(tab_index), root, title=f"tab {tab_index}"))
+        frame = frame_of(40.0 * w, 25.0 + 40.0 * w, spec["width"], spec["height"])
+        app.windows.append(Window(app, f"pty-{new_session_id(rng)}", w + 1, frame, tab_list))
+
+    app.current_terminal_window = app.windows[0]
+    return app
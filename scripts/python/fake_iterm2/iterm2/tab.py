@@ -0,0 +1,35 @@
+"""Tab: owns one split tree (`root`)."""
+
+
+class Tab:
+    def __init__(self, app, tab_id, root, title=""):
+        self.app = app
+        self.connection = app.connection
+        self.tab_id = tab_id
+        self.root = root
+        self.window = None
+        self.variables = {"title": title}
+        sessions = root.sessions
+        self.current_session = sessions[0] if sessions else None
+        for s in sessions:
+            s.tab = self
+
+    def __repr__(self):
+        return f"<Tab {self.tab_id}>"
+
+    @property
+    def sessions(self):
+        return self.root.sessions
+
+    async def async_select(self, order_window_front=True):
+        await self.connection.rpc("tab.select")
+        if self.current_session is not None:
+            self.app._focus(self.current_session)
+
+    async def async_get_variable(self, name):
+        await self.connection.rpc("tab.getVariable")
+        return self.variables.get(name)
+
+    async def async_set_title(self, title):
+        await self.connection.rpc("tab.setTitle")
+        self.variables["title"] = title
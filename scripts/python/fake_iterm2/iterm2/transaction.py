@@ -0,0 +1,13 @@
+"""iterm2.Transaction: no-op grouping, counted as one RPC each way."""
+
+
+class Transaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    async def __aenter__(self):
+        await self.connection.rpc("transaction.begin")
+        return self
+
+    async def __aexit__(self, *_):
+        await self.connection.rpc("transaction.end")
@@ -0,0 +1,38 @@
+"""Geometry value types (iterm2.util.Point / Size / Frame)."""
+
+
+class Point:
+    __slots__ = ("x", "y")
+
+    def __init__(self, x=0.0, y=0.0):
+        self.x = x
+        self.y = y
+
+    def __repr__(self):
+        return f"Point({self.x}, {self.y})"
+
+
+class Size:
+    __slots__ = ("width", "height")
+
+    def __init__(self, width=0.0, height=0.0):
+        self.width = width
+        self.height = height
+
+    def __repr__(self):
+        return f"Size({self.width}, {self.height})"
+
+
+class Frame:
+    __slots__ = ("origin", "size")
+
+    def __init__(self, origin=None, size=None):
+        self.origin = origin or Point()
+        self.size = size or Size()
+
+    @classmethod
+    def rect(cls, x, y, w, h):
+        return cls(Point(x, y), Size(w, h))
+
+    def __repr__(self):
+        return f"Frame({self.origin!r}, {self.size!r})"
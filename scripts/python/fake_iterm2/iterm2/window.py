@@ -0,0 +1,34 @@
+"""Window: a list of tabs and a screen frame."""
+
+from .util import Frame
+
+
+class Window:
+    def __init__(self, app, window_id, window_number, frame, tabs):
+        self.app = app
+        self.connection = app.connection
+        self.window_id = window_id
+        self.window_number = window_number
+        self._frame = frame
+        self.tabs = list(tabs)
+        self.current_tab = self.tabs[0] if self.tabs else None
+        for t in self.tabs:
+            t.window = self
+
+    def __repr__(self):
+        return f"<Window {self.window_id} #{self.window_number}>"
+
+    async def async_get_frame(self):
+        await self.connection.rpc("window.getFrame")
+        f = self._frame
+        return Frame.rect(f.origin.x, f.origin.y, f.size.width, f.size.height)
+
+    async def async_set_frame(self, frame):
+        await self.connection.rpc("window.setFrame")
+        self._frame = Frame.rect(frame.origin.x, frame.origin.y, frame.size.width, frame.size.height)
+        self.app._notify("layout", None)
+
+    async def async_activate(self):
+        await self.connection.rpc("window.activate")
+        if self.current_tab is not None and self.current_tab.current_session is not None:
+            self.app._focus(self.current_tab.current_session)
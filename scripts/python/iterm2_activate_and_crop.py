@@ -1,70 +1,16 @@
-import json
+import asyncio
+import os
 import sys
 import time
 
 try:
     import iterm2
-except Exception as e:
-    print(json.dumps({"error": f"iterm2 module not available: {e}"}, ensure_ascii=False))
-    raise SystemExit(0)
-
-try:
-    import Quartz
-    from Quartz import (
-        CGWindowListCopyWindowInfo,
-        kCGNullWindowID,
-        kCGWindowListOptionOnScreenOnly,
-        kCGWindowListExcludeDesktopElements,
-    )
 except Exception:
-    Quartz = None
+    iterm2 = None
 
-SESSION_ID = sys.argv[1] if len(sys.argv) > 1 else ""
-
-
-def _find_iterm2_cg_window_id_by_owner(rawWindowFrame=None):
-    """Return first iTerm2 CGWindowID (best-effort)."""
-    if Quartz is None:
-        return None
-    try:
-        window_list = CGWindowListCopyWindowInfo(
-            kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements,
-            kCGNullWindowID,
-        )
-        for win_info in window_list:
-            owner_name = win_info.get("kCGWindowOwnerName", "")
-            # Filter by iTerm2 owner
-            if "iterm" not in str(owner_name).lower():
-                continue
-            wid = win_info.get("kCGWindowNumber")
-            if not isinstance(wid, int) or wid <= 0:
-                continue
-            # If rawWindowFrame provided, match by frame bounds.
-            if rawWindowFrame:
-                bounds = win_info.get("kCGWindowBounds", {})
-                # Convert NSDictionary to plain dict for easier access
-                try:
-                    wx = float(bounds.get("X", 0) if hasattr(bounds, "get") else bounds["X"])
-                    wy = float(bounds.get("Y", 0) if hasattr(bounds, "get") else bounds["Y"])
-                    ww = float(bounds.get("Width", 0) if hasattr(bounds, "get") else bounds["Width"])
-                    wh = float(bounds.get("Height", 0) if hasattr(bounds, "get") else bounds["Height"])
-                except (KeyError, TypeError, AttributeError):
-                    continue
-                # CGWindow bounds are in global coords, but macOS may report
-                # slightly different Y due to menu bar / system UI.
-                # Match primarily by X/Width/Height, and allow larger Y slack.
-                if (abs(wx - rawWindowFrame.get("x", 0)) < 10 and
-                    abs(wy - rawWindowFrame.get("y", 0)) < 80 and
-                    abs(ww - rawWindowFrame.get("w", 0)) < 20 and
-                    abs(wh - rawWindowFrame.get("h", 0)) < 20):
-                    return wid
-                # Not a match, continue searching.
-                continue
-            # No rawWindowFrame: return first iTerm2 window.
-            return wid
-    except Exception:
-        pass
-    return None
+from cg_window_resolver import resolve_cg_window_id
+from iterm2_layout import compute_layout
+from iterm2_session_cache import resolve_session
 
 
 async def get_frame(obj):
@@ -80,128 +26,74 @@ async def get_frame(obj):
         return None
 
 
-def subtree_size(node):
+def _env_ms(name, default):
     try:
-        if isinstance(node, iterm2.session.Session):
-            f = node.frame
-            return float(f.size.width), float(f.size.height)
-        if isinstance(node, iterm2.session.Splitter):
-            if getattr(node, "_Splitter__vertical", False):
-                w = 0.0
-                h = 0.0
-                for c in node.children:
-                    cw, ch = subtree_size(c)
-                    w += cw
-                    if ch > h:
-                        h = ch
-                return w, h
-            else:
-                w = 0.0
-                h = 0.0
-                for c in node.children:
-                    cw, ch = subtree_size(c)
-                    if cw > w:
-                        w = cw
-                    h += ch
-                return w, h
-    except Exception:
-        pass
-    return 0.0, 0.0
+        return max(0.0, float(os.environ.get(name, default)))
+    except ValueError:
+        return float(default)
+
+
+# Upper bound on waiting for iTerm2 to settle after activation, and the
+# interval between frame samples while waiting.
+READY_TIMEOUT_MS = _env_ms("ITERMREMOTE_ACTIVATE_READY_TIMEOUT_MS", 250)
+READY_POLL_MS = _env_ms("ITERMREMOTE_ACTIVATE_READY_POLL_MS", 10)
 
 
-def node_bounds(node):
+def _frame_key(f):
     try:
-        if isinstance(node, iterm2.session.Session):
-            f = node.frame
-            x0 = float(f.origin.x)
-            y0 = float(f.origin.y)
-            x1 = x0 + float(f.size.width)
-            y1 = y0 + float(f.size.height)
-            return x0, y0, x1, y1
-        if isinstance(node, iterm2.session.Splitter):
-            xs = []
-            ys = []
-            xe = []
-            ye = []
-            for c in node.children:
-                b = node_bounds(c)
-                if b:
-                    xs.append(b[0])
-                    ys.append(b[1])
-                    xe.append(b[2])
-                    ye.append(b[3])
-            if xs:
-                return min(xs), min(ys), max(xe), max(ye)
+        return (
+            round(float(f.origin.x), 1),
+            round(float(f.origin.y), 1),
+            round(float(f.size.width), 1),
+            round(float(f.size.height), 1),
+        )
     except Exception:
-        pass
-    return None
+        return None
 
 
-def assign_layout_frames(node, ox, oy, out):
+def _focused_session_id(app):
     try:
-        if isinstance(node, iterm2.session.Session):
-            f = node.frame
-            out[node.session_id] = {
-                "x": ox + float(f.origin.x),
-                "y": oy + float(f.origin.y),
-                "w": float(f.size.width),
-                "h": float(f.size.height),
-            }
-            return
-        if isinstance(node, iterm2.session.Splitter):
-            vertical = getattr(node, "_Splitter__vertical", False)
-            mins = []
-            for c in node.children:
-                b = node_bounds(c)
-                if b:
-                    mins.append(round(b[0 if vertical else 1], 3))
-            distinct = len(set(mins)) if mins else 0
-            if vertical:
-                if distinct > 1:
-                    for c in node.children:
-                        assign_layout_frames(c, ox, oy, out)
-                else:
-                    x = ox
-                    for c in node.children:
-                        assign_layout_frames(c, x, oy, out)
-                        cw, _ = subtree_size(c)
-                        x += cw
-            else:
-                if distinct > 1:
-                    for c in node.children:
-                        assign_layout_frames(c, ox, oy, out)
-                else:
-                    y = oy
-                    for c in node.children:
-                        assign_layout_frames(c, ox, y, out)
-                        _, ch = subtree_size(c)
-                        y += ch
+        return app.current_terminal_window.current_tab.current_session.session_id
     except Exception:
-        pass
+        return None
 
 
-async def main(connection):
-    app = await iterm2.async_get_app(connection)
-    target = None
-    target_win = None
-    target_tab = None
-
-    for win in app.terminal_windows:
-        for tab in win.tabs:
-            for sess in tab.sessions:
-                if sess.session_id == SESSION_ID:
-                    target = sess
-                    target_win = win
-                    target_tab = tab
-                    break
-            if target:
-                break
-        if target:
-            break
+async def wait_until_ready(app, session, window, timeout_ms=READY_TIMEOUT_MS, poll_ms=READY_POLL_MS):
+    """Wait until `session` has focus and its frames stop changing.
+
+    Samples the session and window frames every `poll_ms`; two identical
+    consecutive samples (with the session focused, when the app reports
+    focus) count as settled. Returns (ready, elapsed_ms, session_frame,
+    window_frame) with the last samples, so callers need not re-fetch them.
+    """
+    t0 = time.perf_counter()
+    deadline = t0 + timeout_ms / 1000.0
+    prev = None
+    f = wf = None
+    while True:
+        f = await get_frame(session)
+        wf = await get_frame(window)
+        key = (_frame_key(f), _frame_key(wf))
+        focused = _focused_session_id(app)
+        focus_ok = focused is None or focused == session.session_id
+        if focus_ok and key == prev:
+            return True, (time.perf_counter() - t0) * 1000.0, f, wf
+        prev = key
+        if time.perf_counter() >= deadline:
+            return False, (time.perf_counter() - t0) * 1000.0, f, wf
+        await asyncio.sleep(poll_ms / 1000.0)
+
+
+def unavailable(error):
+    return {"error": error}
+
+
+async def handle(connection, app, args):
+    session_id = args.get("sessionId") or ""
+    target_win, target_tab, target = resolve_session(app, session_id)
 
     if not target:
-        print(json.dumps({"error": f"session not found: {SESSION_ID}"}, ensure_ascii=False))
-        return
+        return {"error": f"session not found: {session_id}"}
 
     try:
         await target.async_activate()
@@ -218,22 +110,22 @@ async def main(connection):
     except Exception:
         pass
 
-    try:
-        time.sleep(0.05)
-    except Exception:
-        pass
+    ready, ready_ms, f, wf = await wait_until_ready(app, target, target_win)
 
     layout_frames = {}
     layout_w = 0.0
     layout_h = 0.0
+    root_bounds = None
     try:
-        root = target_tab.root
-        layout_w, layout_h = subtree_size(root)
-        assign_layout_frames(root, 0.0, 0.0, layout_frames)
+        layout = compute_layout(target_tab.root)
+        layout_w, layout_h = layout.size
+        layout_frames = layout.frames
+        root_bounds = layout.bounds
     except Exception:
         layout_frames = {}
         layout_w = 0.0
         layout_h = 0.0
+        root_bounds = None
 
     # Use window_number as matchable id.
     try:
@@ -247,17 +139,11 @@ async def main(connection):
         # CGWindowID used by ScreenCaptureKit for direct window capture.
         # This intentionally bypasses flutter_webrtc's DesktopCapturer sourceId mapping.
         "cgWindowId": None,
+        "ready": ready,
+        "readyMs": round(ready_ms, 3),
     }
 
     try:
-        f = await get_frame(target)
-        root_bounds = None
-        try:
-            root_bounds = node_bounds(target_tab.root)
-        except Exception:
-            root_bounds = None
-        wf = await get_frame(target_win)
-
         # Always include layout-based frames for overlay/debug (best-effort).
         lf = layout_frames.get(target.session_id)
         if lf and layout_w > 0 and layout_h > 0:
@@ -297,21 +183,18 @@ async def main(connection):
         sys.stderr.write(f"Warning: frame extraction failed: {e}\n")
 
     # Find CGWindowId (must run after rawWindowFrame is set)
-    raw_frame = out.get("rawWindowFrame")
     try:
-        cg_id = _find_iterm2_cg_window_id_by_owner(raw_frame)
-        if cg_id:
-            out["cgWindowId"] = cg_id
+        out["cgWindowId"] = resolve_cg_window_id(win_number, out.get("rawWindowFrame"))
+        if not out["cgWindowId"]:
+            # No window close to the frame: fall back to the frontmost iTerm2 window.
+            out["cgWindowId"] = resolve_cg_window_id(win_number)
     except Exception:
         pass
-    if not out.get("cgWindowId"):
-        try:
-            out["cgWindowId"] = _find_iterm2_cg_window_id_by_owner()
-        except Exception:
-            pass
 
-    print(json.dumps(out, ensure_ascii=False))
+    return out
 
 
 if __name__ == "__main__":
-    iterm2.run_until_complete(main)
+    from iterm2_worker import run_once
+
+    run_once("activateSession", {"sessionId": sys.argv[1] if len(sys.argv) > 1 else ""})
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""Mock of iterm2_activate_and_crop.py (argv: <sessionId>)."""
+import json
+import sys
+
+from iterm2_sources_mock import CG_WINDOW_ID, WINDOW_NUMBER, find_panel
+
+
+def mock_result(args):
+    session_id = args.get("sessionId") or ""
+    panel = find_panel(session_id)
+    if panel is None:
+        return {"error": f"session not found: {session_id}"}
+    return {
+        "sessionId": session_id,
+        "windowId": WINDOW_NUMBER,
+        "cgWindowId": CG_WINDOW_ID,
+        "ready": True,
+        "readyMs": 0.0,
+        "layoutFrame": panel["layoutFrame"],
+        "layoutWindowFrame": panel["layoutWindowFrame"],
+        "frame": panel["frame"],
+        "windowFrame": panel["windowFrame"],
+        "rawWindowFrame": panel["rawWindowFrame"],
+    }
+
+
+def main():
+    print(json.dumps(mock_result({"sessionId": sys.argv[1] if len(sys.argv) > 1 else ""})))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""Split-tree layout helpers shared by the iTerm2 bridge scripts.
+
+`tab.root` is a tree of `Splitter` nodes with `Session` leaves. The old
+helpers (`subtree_size`, `node_bounds`, `assign_layout_frames`) recursed to
+the leaves again at every Splitter level, which is quadratic in split depth.
+`compute_layout()` does a single post-order pass that memoizes size and
+bounds per node, then a pre-order pass that places every session, so the
+whole tree costs O(nodes). Both passes are iterative, so very deep split
+chains do not hit the recursion limit.
+
+Geometry rules (unchanged from the original helpers):
+
+- size: vertical splitters add widths and take the max height; horizontal
+  splitters take the max width and add heights.
+- bounds: union of the children's frame rects.
+- frames: if a splitter's children already start at different offsets along
+  its axis, their frames are absolute and are kept as-is; otherwise children
+  are laid out one after another using their subtree sizes.
+"""
+
+try:
+    import iterm2
+except Exception:
+    iterm2 = None
+
+_SESSION = 1
+_SPLITTER = 2
+
+
+def _kind(node):
+    if iterm2 is not None:
+        if isinstance(node, iterm2.session.Session):
+            return _SESSION
+        if isinstance(node, iterm2.session.Splitter):
+            return _SPLITTER
+    # Duck-typed nodes (synthetic trees in benchmarks / fake iterm2 module).
+    if hasattr(node, "children"):
+        return _SPLITTER
+    if hasattr(node, "session_id") and hasattr(node, "frame"):
+        return _SESSION
+    return None
+
+
+def is_vertical(node):
+    v = getattr(node, "_Splitter__vertical", None)
+    if v is None:
+        v = getattr(node, "vertical", False)
+    return bool(v)
+
+
+class Layout:
+    """Result of `compute_layout()`.
+
+    size:   (w, h) of the whole tree.
+    bounds: (x0, y0, x1, y1) union of all session frames, or None.
+    frames: session_id -> {"x", "y", "w", "h"} absolute layout frame.
+    """
+
+    __slots__ = ("size", "bounds", "frames")
+
+    def __init__(self, size, bounds, frames):
+        self.size = size
+        self.bounds = bounds
+        self.frames = frames
+
+
+def _measure(root):
+    """Post-order pass: id(node) -> (kind, (w, h), bounds|None)."""
+    memo = {}
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        key = id(node)
+        if key in memo:
+            continue
+        kind = _kind(node)
+        if kind == _SPLITTER and not expanded:
+            stack.append((node, True))
+            try:
+                children = list(node.children)
+            except Exception:
+                children = []
+            for c in reversed(children):
+                if id(c) not in memo:
+                    stack.append((c, False))
+            continue
+
+        size = (0.0, 0.0)
+        bounds = None
+        if kind == _SESSION:
+            try:
+                f = node.frame
+                x0 = float(f.origin.x)
+                y0 = float(f.origin.y)
+                w = float(f.size.width)
+                h = float(f.size.height)
+                size = (w, h)
+                bounds = (x0, y0, x0 + w, y0 + h)
+            except Exception:
+                pass
+        elif kind == _SPLITTER:
+            vertical = is_vertical(node)
+            w = 0.0
+            h = 0.0
+            bx0 = by0 = bx1 = by1 = None
+            try:
+                children = list(node.children)
+            except Exception:
+                children = []
+            for c in children:
+                _, (cw, ch), cb = memo[id(c)]
+                if vertical:
+                    w += cw
+                    h = max(h, ch)
+                else:
+                    w = max(w, cw)
+                    h += ch
+                if cb is not None:
+                    if bx0 is None:
+                        bx0, by0, bx1, by1 = cb
+                    else:
+                        bx0 = min(bx0, cb[0])
+                        by0 = min(by0, cb[1])
+                        bx1 = max(bx1, cb[2])
+                        by1 = max(by1, cb[3])
+            size = (w, h)
+            if bx0 is not None:
+                bounds = (bx0, by0, bx1, by1)
+        memo[key] = (kind, size, bounds)
+    return memo
+
+
+def compute_layout(root):
+    """Compute size, bounds and absolute layout frames for `root` in O(nodes)."""
+    memo = _measure(root)
+    frames = {}
+    stack = [(root, 0.0, 0.0)]
+    while stack:
+        node, ox, oy = stack.pop()
+        kind, size, bounds = memo[id(node)]
+        if kind == _SESSION:
+            if bounds is not None:
+                frames[node.session_id] = {
+                    "x": ox + bounds[0],
+                    "y": oy + bounds[1],
+                    "w": size[0],
+                    "h": size[1],
+                }
+            continue
+        if kind != _SPLITTER:
+            continue
+        vertical = is_vertical(node)
+        try:
+            children = list(node.children)
+        except Exception:
+            children = []
+        axis = 0 if vertical else 1
+        mins = set()
+        for c in children:
+            cb = memo[id(c)][2]
+            if cb is not None:
+                mins.add(round(cb[axis], 3))
+        placed = []
+        if len(mins) > 1:
+            placed = [(c, ox, oy) for c in children]
+        else:
+            x = ox
+            y = oy
+            for c in children:
+                placed.append((c, x, y))
+                cw, ch = memo[id(c)][1]
+                if vertical:
+                    x += cw
+                else:
+                    y += ch
+        # Reverse so children are visited in order (matches the old recursion).
+        stack.extend(reversed(placed))
+    _, size, bounds = memo[id(root)]
+    return Layout(size, bounds, frames)
@@ -1,20 +1,24 @@
+"""sendText op: deliver keystrokes / pasted text to one iTerm2 session.
+
+Inside the worker, chunks for the same session that arrive within a short
+window (ITERMREMOTE_SENDTEXT_COALESCE_MS, default 8 ms; 0 disables) are
+joined and delivered with a single `async_send_text`, in arrival order.
+Each chunk's result carries a `batch` record with the batch size and
+latency so callers can see what coalescing costs.
+"""
+
+import asyncio
 import base64
-import json
+import os
 import sys
+import time
 
 try:
     import iterm2
-except Exception as e:
-    print(
-        json.dumps(
-            {"ok": False, "error": f"iterm2 module not available: {e}"},
-            ensure_ascii=False,
-        )
-    )
-    raise SystemExit(0)
+except Exception:
+    iterm2 = None
 
-SESSION_ID = sys.argv[1] if len(sys.argv) > 1 else ""
-TEXT_B64 = sys.argv[2] if len(sys.argv) > 2 else ""
+from iterm2_session_cache import resolve_session
 
 
 def decode_text(b64: str) -> str:
@@ -25,46 +29,135 @@ def decode_text(b64: str) -> str:
         return ""
 
 
-text = decode_text(TEXT_B64)
-if not text:
-    raise SystemExit(0)
+def normalize_text(text: str) -> str:
+    # TTY compatibility:
+    # - Enter is usually carriage return.
+    # - Backspace is usually DEL (0x7f).
+    text = text.replace("\r\n", "\r").replace("\n", "\r")
+    return text.replace("\b", "\x7f")
+
+
+def _env_ms(name, default):
+    try:
+        return max(0.0, float(os.environ.get(name, default)))
+    except ValueError:
+        return float(default)
+
+
+COALESCE_MS = _env_ms("ITERMREMOTE_SENDTEXT_COALESCE_MS", 8)
+
+
+class _Pending:
+    __slots__ = ("chunks", "futures", "first_ts", "task")
+
+    def __init__(self):
+        self.chunks = []
+        self.futures = []
+        self.first_ts = None
+        self.task = None
+
 
-# TTY compatibility:
-# - Enter is usually carriage return.
-# - Backspace is usually DEL (0x7f).
-text = text.replace("\r\n", "\r").replace("\n", "\r")
-text = text.replace("\b", "\x7f")
+class InputCoalescer:
+    """Per-session input queues that flush once per `window_ms`.
 
+    A chunk submitted while a batch for the same session is being sent goes
+    into the next batch, so delivery order always matches submission order.
+    """
 
-async def main(connection):
-    app = await iterm2.async_get_app(connection)
-    target = None
-    for win in app.terminal_windows:
-        for tab in win.tabs:
-            for sess in tab.sessions:
-                if sess.session_id == SESSION_ID:
-                    target = sess
-                    break
-            if target:
-                break
-        if target:
-            break
+    def __init__(self, window_ms=COALESCE_MS):
+        self.window = window_ms / 1000.0
+        self._queues = {}
+
+    async def submit(self, session, text):
+        loop = asyncio.get_running_loop()
+        key = session.session_id
+        q = self._queues.get(key)
+        if q is None:
+            q = self._queues[key] = _Pending()
+        fut = loop.create_future()
+        if not q.chunks:
+            q.first_ts = time.perf_counter()
+        q.chunks.append(text)
+        q.futures.append(fut)
+        if q.task is None:
+            q.task = asyncio.ensure_future(self._drain(key, session, q))
+        return await fut
+
+    async def _drain(self, key, session, q):
+        try:
+            while q.chunks:
+                await asyncio.sleep(self.window)
+                chunks, futures, first_ts = q.chunks, q.futures, q.first_ts
+                q.chunks, q.futures, q.first_ts = [], [], None
+                text = "".join(chunks)
+                t0 = time.perf_counter()
+                try:
+                    await session.async_send_text(text)
+                    out = {"ok": True}
+                except Exception as e:
+                    out = {"ok": False, "error": str(e)}
+                t1 = time.perf_counter()
+                out["batch"] = {
+                    "chunks": len(chunks),
+                    "chars": len(text),
+                    "sendMs": round((t1 - t0) * 1000.0, 3),
+                    "latencyMs": round((t1 - first_ts) * 1000.0, 3),
+                }
+                for fut in futures:
+                    if not fut.done():
+                        fut.set_result(dict(out))
+        finally:
+            q.task = None
+            for fut in q.futures:
+                if not fut.done():
+                    fut.set_result({"ok": False, "error": "input queue stopped"})
+            q.chunks, q.futures = [], []
+            if self._queues.get(key) is q:
+                del self._queues[key]
+
+
+# Installed by the worker; one-shot runs send immediately.
+coalescer = None
+
+
+def unavailable(error):
+    return {"ok": False, "error": error}
+
+
+async def handle(connection, app, args):
+    session_id = args.get("sessionId") or ""
+    text = args.get("text")
+    if isinstance(text, (bytes, bytearray, memoryview)):
+        # Raw payload from a binary-framed request.
+        text = bytes(text).decode("utf-8", errors="replace")
+    if text is None:
+        text = decode_text(args.get("textB64") or "")
+    if not text:
+        return None
+    text = normalize_text(text)
+
+    _, _, target = resolve_session(app, session_id)
 
     if not target:
-        print(
-            json.dumps(
-                {"ok": False, "error": f"session not found: {SESSION_ID}"},
-                ensure_ascii=False,
-            )
-        )
-        return
+        return {"ok": False, "error": f"session not found: {session_id}"}
+
+    if coalescer is not None and coalescer.window > 0:
+        return await coalescer.submit(target, text)
 
     try:
         await target.async_send_text(text)
-        print(json.dumps({"ok": True}, ensure_ascii=False))
+        return {"ok": True}
     except Exception as e:
-        print(json.dumps({"ok": False, "error": str(e)}, ensure_ascii=False))
+        return {"ok": False, "error": str(e)}
 
 
 if __name__ == "__main__":
-    iterm2.run_until_complete(main)
+    from iterm2_worker import run_once
+
+    run_once(
+        "sendText",
+        {
+            "sessionId": sys.argv[1] if len(sys.argv) > 1 else "",
+            "textB64": sys.argv[2] if len(sys.argv) > 2 else "",
+        },
+    )
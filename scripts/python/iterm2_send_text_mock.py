@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""Mock of iterm2_send_text.py (argv: <sessionId> <base64 text>)."""
+import json
+import sys
+
+from iterm2_sources_mock import find_panel
+
+
+def mock_result(args):
+    return {"ok": find_panel(args.get("sessionId") or "") is not None}
+
+
+def main():
+    print(json.dumps(mock_result({"sessionId": sys.argv[1] if len(sys.argv) > 1 else ""})))
+
+
+if __name__ == '__main__':
+    main()
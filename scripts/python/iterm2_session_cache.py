@@ -0,0 +1,450 @@
+"""In-memory model of iTerm2 windows/tabs/sessions for the bridge worker.
+
+`iterm2_sources.py` used to walk every window, tab and session (with one
+`tab.title` RPC per session) on every `getSessions`. The cache below is built
+once and then patched from iTerm2 notifications:
+
+- layout change     -> re-read window frames, recompute split layouts locally,
+                       fetch titles only for tabs that did not exist before
+- focus change      -> update the selected session (+ refresh that tab title)
+- new session       -> handled through the layout change it triggers
+- session terminate -> drop the session right away
+
+`snapshot()` returns the prebuilt `getSessions` payload, so reads are O(1).
+`resolve_session()` maps a session id to (window, tab, session) through an
+index maintained from the same events, so keystroke and activation paths do
+not scan every window/tab/session.
+`generation` increases only when the payload actually changes, which lets
+callers skip work when the layout is unchanged.
+
+The iterm2 `App` object keeps its own window/tab/session tree up to date from
+the same notifications; the cache only derives the panel payload from it.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+try:
+    import iterm2
+except Exception:
+    iterm2 = None
+
+from iterm2_layout import compute_layout
+from iterm2_sources import get_frame
+
+_active = None
+
+# Max in-flight iTerm2 RPCs while (re)building the model.
+DEFAULT_CONCURRENCY = int(os.environ.get("ITERMREMOTE_ITERM2_RPC_CONCURRENCY", "16") or 16)
+
+
+def _log(msg):
+    sys.stderr.write(f"[iterm2_session_cache] {msg}\n")
+
+
+def _ms(seconds):
+    return round(seconds * 1000.0, 3)
+
+
+async def gather_bounded(limit, coros):
+    """asyncio.gather with at most `limit` coroutines awaiting at once."""
+    sem = asyncio.Semaphore(max(1, int(limit)))
+
+    async def run(coro):
+        async with sem:
+            return await coro
+
+    return await asyncio.gather(*(run(c) for c in coros))
+
+
+def _rect(f):
+    return {
+        "x": float(f.origin.x),
+        "y": float(f.origin.y),
+        "w": float(f.size.width),
+        "h": float(f.size.height),
+    }
+
+
+class SessionCache:
+    def __init__(self, connection, app, concurrency=None):
+        self.connection = connection
+        self.app = app
+        self.concurrency = concurrency or DEFAULT_CONCURRENCY
+        self.timings = {}
+        self.generation = 0
+        self.watching = False
+        # window_id -> {"number": int|None, "cgWindowId": int|None, "raw": rect|None}
+        self._windows = {}
+        # tab_id -> {"title": str, "layoutW": float, "layoutH": float,
+        #            "layoutFrames": {sid: rect}, "frames": {sid: rect}}
+        self._tabs = {}
+        self._selected = None
+        # Terminated session ids, hidden until `app` drops them too.
+        self._gone = set()
+        self._snapshot = {"panels": [], "selectedSessionId": None, "generation": 0}
+        self._lock = asyncio.Lock()
+        self._tasks = []
+        # session_id -> (window, tab, session)
+        self.index = {}
+
+    def snapshot(self):
+        return self._snapshot
+
+    def lookup(self, session_id):
+        """Return (window, tab, session) for `session_id`, or None."""
+        # Without live notifications the index may hold closed sessions.
+        hit = self.index.get(session_id) if self.watching else None
+        if hit is not None:
+            return hit
+        hit = _lookup_via_app(self.app, session_id)
+        if hit is not None:
+            self.index[session_id] = hit
+        return hit
+
+    async def refresh(self, window_frames=True, titles=False):
+        """Re-derive the model from `app`.
+
+        window_frames: re-read window frames (one RPC per window).
+        titles: re-read every tab title; otherwise only unseen tabs are read.
+
+        RPCs of each phase are issued concurrently (bounded by
+        `self.concurrency`); per-phase wall time is kept in `self.timings`.
+        """
+        async with self._lock:
+            t0 = time.perf_counter()
+            windows = list(self.app.terminal_windows)
+            tabs = [tab for win in windows for tab in win.tabs]
+            sessions = [sess for tab in tabs for sess in tab.sessions]
+
+            stale_windows = [
+                w for w in windows
+                if window_frames or getattr(w, "window_id", None) not in self._windows
+            ]
+            described = await gather_bounded(
+                self.concurrency, [self._describe_window(w) for w in stale_windows]
+            )
+            for win, entry in zip(stale_windows, described):
+                self._windows[getattr(win, "window_id", None)] = entry
+            t1 = time.perf_counter()
+
+            untitled = [
+                tab for tab in tabs
+                if titles or getattr(tab, "tab_id", None) not in self._tabs
+            ]
+            fetched = await gather_bounded(
+                self.concurrency, [self._tab_title(tab) for tab in untitled]
+            )
+            new_titles = {getattr(tab, "tab_id", None): t for tab, t in zip(untitled, fetched)}
+            t2 = time.perf_counter()
+
+            frames = await gather_bounded(
+                self.concurrency, [get_frame(sess) for sess in sessions]
+            )
+            frame_by_sid = {}
+            for sess, f in zip(sessions, frames):
+                try:
+                    if f:
+                        frame_by_sid[sess.session_id] = _rect(f)
+                except Exception:
+                    pass
+            t3 = time.perf_counter()
+
+            seen_tabs = set()
+            for tab in tabs:
+                tid = getattr(tab, "tab_id", None)
+                seen_tabs.add(tid)
+                if tid in new_titles:
+                    title = new_titles[tid]
+                else:
+                    title = self._tabs[tid]["title"]
+                self._tabs[tid] = self._describe_tab(tab, title, frame_by_sid)
+            seen_windows = {getattr(w, "window_id", None) for w in windows}
+            for wid in list(self._windows):
+                if wid not in seen_windows:
+                    del self._windows[wid]
+            for tid in list(self._tabs):
+                if tid not in seen_tabs:
+                    del self._tabs[tid]
+            self._gone &= {sess.session_id for sess in sessions}
+            self.index = {
+                sess.session_id: (win, tab, sess)
+                for win in windows
+                for tab in win.tabs
+                for sess in tab.sessions
+            }
+            self._selected = self._current_session_id()
+            t4 = time.perf_counter()
+            self._publish()
+            t5 = time.perf_counter()
+
+            self.timings = {
+                "windowFramesMs": _ms(t1 - t0),
+                "tabTitlesMs": _ms(t2 - t1),
+                "sessionFramesMs": _ms(t3 - t2),
+                "layoutMs": _ms(t4 - t3),
+                "publishMs": _ms(t5 - t4),
+                "totalMs": _ms(t5 - t0),
+                "windows": len(stale_windows),
+                "titles": len(untitled),
+                "sessions": len(sessions),
+                "concurrency": self.concurrency,
+            }
+
+    async def _describe_window(self, win):
+        try:
+            number = int(getattr(win, "window_number", 0))
+        except Exception:
+            number = None
+        cg_window_id = None
+        try:
+            # macOS: use Window.screen_number (CGWindowID) when available.
+            cg_window_id = int(getattr(win, "screen_number", 0))
+            if cg_window_id <= 0:
+                cg_window_id = None
+        except Exception:
+            cg_window_id = None
+        f = await get_frame(win)
+        raw = _rect(f) if f else None
+        if cg_window_id is None and number is not None and raw is not None:
+            # Imported here so scripts that never resolve windows (sendText,
+            # buffer reads) do not pay for Quartz. Cached per window number;
+            # the Quartz window list is only re-read when the frame moves,
+            # and that synchronous call runs off the event loop.
+            from cg_window_resolver import resolve_cg_window_id
+
+            cg_window_id = await asyncio.to_thread(resolve_cg_window_id, number, raw)
+        return {"number": number, "cgWindowId": cg_window_id, "raw": raw}
+
+    async def _tab_title(self, tab):
+        sessions = list(getattr(tab, "sessions", []) or [])
+        if not sessions:
+            return ""
+        try:
+            return await sessions[0].async_get_variable("tab.title") or ""
+        except Exception:
+            return ""
+
+    def _describe_tab(self, tab, title, frame_by_sid):
+        layout_frames = {}
+        layout_w = 0.0
+        layout_h = 0.0
+        try:
+            layout = compute_layout(tab.root)
+            layout_w, layout_h = layout.size
+            layout_frames = layout.frames
+        except Exception:
+            layout_frames = {}
+            layout_w = 0.0
+            layout_h = 0.0
+        frames = {}
+        for sess in tab.sessions:
+            f = frame_by_sid.get(sess.session_id)
+            if f:
+                frames[sess.session_id] = f
+        return {
+            "title": title,
+            "layoutW": layout_w,
+            "layoutH": layout_h,
+            "layoutFrames": layout_frames,
+            "frames": frames,
+        }
+
+    def _current_session_id(self):
+        try:
+            w = self.app.current_terminal_window
+            if w and w.current_tab and w.current_tab.current_session:
+                return w.current_tab.current_session.session_id
+        except Exception:
+            pass
+        return None
+
+    def _publish(self):
+        panels = []
+        win_idx = 0
+        for win in self.app.terminal_windows:
+            win_idx += 1
+            wentry = self._windows.get(getattr(win, "window_id", None))
+            if wentry is None:
+                continue
+            number = wentry["number"]
+            window_id = number if number and number > 0 else win_idx
+            raw_window_frame = wentry["raw"]
+            tab_idx = 0
+            for tab in win.tabs:
+                tab_idx += 1
+                tentry = self._tabs.get(getattr(tab, "tab_id", None))
+                if tentry is None:
+                    continue
+                sess_idx = 0
+                for sess in tab.sessions:
+                    sess_idx += 1
+                    sid = sess.session_id
+                    if sid in self._gone:
+                        continue
+                    name = getattr(sess, "name", "") or ""
+                    detail = " · ".join([p for p in [tentry["title"], name] if p])
+                    item = {
+                        "id": sid,
+                        "title": f"{win_idx}.{tab_idx}.{sess_idx}",
+                        "detail": detail,
+                        "index": len(panels),
+                        "windowId": window_id,
+                        "cgWindowId": wentry["cgWindowId"],
+                    }
+                    f = tentry["frames"].get(sid)
+                    if f and raw_window_frame:
+                        item["frame"] = dict(f)
+                        item["windowFrame"] = raw_window_frame
+                    if raw_window_frame:
+                        item["rawWindowFrame"] = raw_window_frame
+                    lf = tentry["layoutFrames"].get(sid)
+                    if lf and tentry["layoutW"] > 0 and tentry["layoutH"] > 0:
+                        item["layoutFrame"] = lf
+                        item["layoutWindowFrame"] = {
+                            "x": 0.0,
+                            "y": 0.0,
+                            "w": float(tentry["layoutW"]),
+                            "h": float(tentry["layoutH"]),
+                        }
+                    panels.append(item)
+
+        prev = self._snapshot
+        if panels != prev["panels"] or self._selected != prev["selectedSessionId"]:
+            self.generation += 1
+        self._snapshot = {
+            "panels": panels,
+            "selectedSessionId": self._selected,
+            "generation": self.generation,
+        }
+
+    # --- notification handling -------------------------------------------
+
+    def start(self):
+        """Subscribe to iTerm2 notifications (worker mode)."""
+        if self.watching or iterm2 is None:
+            return
+        self.watching = True
+        self._tasks = [
+            asyncio.ensure_future(self._watch(iterm2.LayoutChangeMonitor, self._on_layout_change)),
+            asyncio.ensure_future(self._watch(iterm2.FocusMonitor, self._on_focus_change)),
+            asyncio.ensure_future(self._watch(iterm2.NewSessionMonitor, self._on_new_session)),
+            asyncio.ensure_future(self._watch(iterm2.SessionTerminationMonitor, self._on_session_terminated)),
+        ]
+
+    def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        self._tasks = []
+        self.watching = False
+
+    async def _watch(self, monitor_cls, on_update):
+        try:
+            async with monitor_cls(self.connection) as mon:
+                while True:
+                    if hasattr(mon, "async_get_next_update"):
+                        update = await mon.async_get_next_update()
+                    else:
+                        update = await mon.async_get()
+                    # Let the App object apply the same notification first.
+                    await asyncio.sleep(0)
+                    try:
+                        await on_update(update)
+                    except Exception as e:
+                        _log(f"{monitor_cls.__name__} handler failed: {e}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Fall back to full refreshes on read; see get_cache().
+            _log(f"{monitor_cls.__name__} stopped: {e}")
+            self.watching = False
+
+    async def _on_layout_change(self, _update):
+        await self.refresh(window_frames=True)
+
+    async def _on_new_session(self, session_id):
+        hit = _lookup_via_app(self.app, session_id)
+        if hit is not None:
+            self.index[session_id] = hit
+        await self.refresh(window_frames=False)
+
+    async def _on_session_terminated(self, session_id):
+        self.index.pop(session_id, None)
+        async with self._lock:
+            self._gone.add(session_id)
+            for tentry in self._tabs.values():
+                tentry["frames"].pop(session_id, None)
+                tentry["layoutFrames"].pop(session_id, None)
+            if self._selected == session_id:
+                self._selected = self._current_session_id()
+            self._publish()
+
+    async def _on_focus_change(self, _update):
+        # Session, tab and window switches all move the selection; the App
+        # has already applied the update (see _watch), so read it from there
+        # instead of from whichever field of the update is set.
+        async with self._lock:
+            sid = self._current_session_id()
+            if sid == self._selected:
+                return
+            self._selected = sid
+            tab = None
+            try:
+                sess = self.app.get_session_by_id(sid) if sid else None
+                if sess is not None:
+                    tab, _ = self.app.get_tab_and_window_for_session(sess)
+            except Exception:
+                tab = None
+            tentry = self._tabs.get(getattr(tab, "tab_id", None)) if tab else None
+            if tentry is not None:
+                tentry["title"] = await self._tab_title(tab)
+            self._publish()
+
+
+def _lookup_via_app(app, session_id):
+    try:
+        sess = app.get_session_by_id(session_id)
+        if sess is None:
+            return None
+        tab, win = app.get_tab_and_window_for_session(sess)
+        return win, tab, sess
+    except Exception:
+        return None
+
+
+def resolve_session(app, session_id):
+    """(window, tab, session) for `session_id`, or (None, None, None).
+
+    Uses the worker's live index when there is one; otherwise (one-shot runs)
+    falls back to `app.get_session_by_id`.
+    """
+    cache = _active
+    if cache is not None and cache.app is app:
+        hit = cache.lookup(session_id)
+    else:
+        hit = _lookup_via_app(app, session_id)
+    return hit if hit is not None else (None, None, None)
+
+
+async def start(connection, app, concurrency=None):
+    """Build the shared cache and keep it updated (worker start-up)."""
+    global _active
+    cache = SessionCache(connection, app, concurrency)
+    await cache.refresh(window_frames=True, titles=True)
+    cache.start()
+    _active = cache
+    return cache
+
+
+async def get_cache(connection, app, concurrency=None):
+    """Return the live worker cache, or a freshly built one (one-shot)."""
+    cache = _active
+    if cache is not None and cache.connection is connection:
+        if not cache.watching:
+            await cache.refresh(window_frames=True, titles=True)
+        return cache
+    cache = SessionCache(connection, app, concurrency)
+    await cache.refresh(window_frames=True, titles=True)
+    return cache
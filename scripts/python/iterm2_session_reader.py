@@ -1,12 +1,197 @@
-import base64
-import json
+"""readSessionBuffer op: read scrollback + screen of one iTerm2 session.
+
+Lines are addressed by absolute line number (`overflow` + index), which does
+not move as scrollback grows. Everything below the mutable screen area is
+frozen, so a client only ever needs the lines from its last `cursor` on.
+
+Full read (no `cursor` arg), same shape as before:
+
+  {"text": b64(utf-8 tail of at most maxBytes), "cursor": N, "generation": G}
+
+(`text` is a raw UTF-8 payload instead of base64 when the worker runs with
+binary framing.)
+
+Delta read (`cursor` = value returned by the previous read):
+
+  {"cursor": N, "from": F, "end": E, "generation": G,
+   "lines": [{"n": 123, "text": "...", "eol": true}, ...], "lost": K}
+
+The client drops its cached lines >= `end`, stores `lines` by `n`, and keeps
+`cursor` for the next call. When `sinceGeneration` is the generation handed
+out last for the session on the same worker stream, `lines` only carries
+lines that changed; with nothing changed the reply is `{"generation": G, "unchanged":
+true, ...}`. `lost` counts lines that scrolled out of iTerm2's history before
+the client caught up.
+
+`subscribeSessionBuffer` pushes the same delta as `sessionBuffer` events
+whenever iTerm2's screen streamer reports an update (worker only).
+"""
+
+import asyncio
 import sys
 
-def main():
-    session_id = sys.argv[1] if len(sys.argv) > 1 else ""
-    content = f"Mock session buffer for {session_id}\n$ "
-    text_b64 = base64.b64encode(content.encode("utf-8")).decode("ascii")
-    print(json.dumps({"text": text_b64}))
+try:
+    import iterm2
+except Exception:
+    iterm2 = None
+
+from bridge_framing import Payload
+from iterm2_session_cache import resolve_session
+
+# Lines fetched per async_get_contents call when reading the tail backwards.
+PAGE_LINES = 512
+
+
+class BufferState:
+    """Last lines handed out for one session, used to diff the next read."""
+
+    __slots__ = ("generation", "lines", "frozen", "end")
+
+    def __init__(self):
+        self.generation = 0
+        # Mutable-area lines from the last read: n -> (text, hard_eol).
+        self.lines = {}
+        # Lines below `frozen` can no longer change.
+        self.frozen = None
+        self.end = 0
+
+
+def unavailable(error):
+    return {"error": error, "text": ""}
+
+
+async def _line_info(session):
+    info = await session.async_get_line_info()
+    overflow = int(info.overflow)
+    history = int(info.scrollback_buffer_height)
+    height = int(info.mutable_area_height)
+    return overflow, overflow + history, overflow + history + height
+
+
+async def read_tail(connection, session, max_bytes):
+    """Join the last lines of the buffer until `max_bytes` is reached."""
+    async with iterm2.Transaction(connection):
+        overflow, frozen, end = await _line_info(session)
+        parts = []
+        size = 0
+        stop = end
+        while stop > overflow and size < max_bytes:
+            start = max(overflow, stop - PAGE_LINES)
+            page = await session.async_get_contents(start, stop - start)
+            for lc in reversed(page):
+                s = lc.string + ("\n" if lc.hard_eol else "")
+                parts.append(s)
+                size += len(s.encode("utf-8"))
+                if size >= max_bytes:
+                    break
+            stop = start
+    text = "".join(reversed(parts))
+    raw = text.encode("utf-8")
+    if len(raw) > max_bytes:
+        text = raw[len(raw) - max_bytes:].decode("utf-8", errors="ignore")
+    return text, frozen
+
+
+async def read_delta(connection, session, cursor, state, since=None):
+    """Lines from `cursor` on, diffed against `state` when `since` matches."""
+    async with iterm2.Transaction(connection):
+        overflow, frozen, end = await _line_info(session)
+        start = min(max(int(cursor), overflow), frozen)
+        contents = await session.async_get_contents(start, end - start) if end > start else []
+
+    fresh = {}
+    for i, lc in enumerate(contents):
+        fresh[start + i] = (lc.string, bool(lc.hard_eol))
+
+    if state.frozen is None:
+        diff = sorted(fresh)
+    else:
+        diff = [n for n in sorted(fresh) if n >= state.frozen and state.lines.get(n) != fresh[n]]
+    moved = state.frozen is None or bool(diff) or end != state.end
+    incremental = since is not None and since == state.generation
+    if moved:
+        state.generation += 1
+    state.lines = {n: v for n, v in fresh.items() if n >= frozen}
+    state.frozen = frozen
+    state.end = end
+
+    out = {
+        "cursor": frozen,
+        "from": start,
+        "end": end,
+        "generation": state.generation,
+        "lost": max(0, overflow - int(cursor)),
+    }
+    if incremental and not moved:
+        out["unchanged"] = True
+    changed = diff if incremental else sorted(fresh)
+    out["lines"] = [{"n": n, "text": fresh[n][0], "eol": fresh[n][1]} for n in changed]
+    return out
+
+
+def _target(app, session_id):
+    _, _, session = resolve_session(app, session_id)
+    return session
+
+
+async def handle(connection, app, args, states=None):
+    """`states` maps session_id -> BufferState for one client stream."""
+    if states is None:
+        states = {}
+    session_id = args.get("sessionId") or ""
+    session = _target(app, session_id)
+    if session is None:
+        states.pop(session_id, None)
+        return {"error": f"session not found: {session_id}", "text": ""}
+
+    cursor = args.get("cursor")
+    if cursor is None:
+        max_bytes = int(args.get("maxBytes") or 65536)
+        text, frozen = await read_tail(connection, session, max_bytes)
+        state = states.get(session_id)
+        return {
+            "text": Payload(text),
+            "cursor": frozen,
+            "generation": state.generation if state else 0,
+        }
+
+    state = states.setdefault(session_id, BufferState())
+    return await read_delta(connection, session, cursor, state, args.get("sinceGeneration"))
+
+
+async def subscribe(connection, app, args, push):
+    """Start pushing `sessionBuffer` deltas; returns (initial result, task)."""
+    session_id = args.get("sessionId") or ""
+    session = _target(app, session_id)
+    if session is None:
+        return {"error": f"session not found: {session_id}"}, None
+
+    state = BufferState()
+    first = await read_delta(connection, session, args.get("cursor") or 0, state)
+    cursor = first["cursor"]
+
+    async def pump():
+        nonlocal cursor
+        async with session.get_screen_streamer(want_contents=False) as streamer:
+            while True:
+                # Read before waiting so changes made while the streamer was
+                # being set up are not missed.
+                delta = await read_delta(connection, session, cursor, state, state.generation)
+                cursor = delta["cursor"]
+                if not delta.get("unchanged"):
+                    await push(dict(delta, sessionId=session_id))
+                await streamer.async_get()
+
+    return first, asyncio.ensure_future(pump())
+
 
 if __name__ == '__main__':
-    main()
+    from iterm2_worker import run_once
+
+    args = {
+        "sessionId": sys.argv[1] if len(sys.argv) > 1 else "",
+        "maxBytes": int(sys.argv[2]) if len(sys.argv) > 2 else 65536,
+    }
+    if len(sys.argv) > 3:
+        args["cursor"] = int(sys.argv[3])
+    run_once("readSessionBuffer", args)
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""Mock of iterm2_session_reader.py (argv: <sessionId> [maxBytes])."""
+import base64
+import json
+import sys
+
+
+def mock_result(args):
+    session_id = args.get("sessionId") or ""
+    content = f"Mock session buffer for {session_id}\n$ "
+    max_bytes = int(args.get("maxBytes") or 65536)
+    raw = content.encode("utf-8")[-max_bytes:]
+    return {"text": base64.b64encode(raw).decode("ascii")}
+
+
+def main():
+    args = {"sessionId": sys.argv[1] if len(sys.argv) > 1 else ""}
+    if len(sys.argv) > 2:
+        args["maxBytes"] = sys.argv[2]
+    print(json.dumps(mock_result(args)))
+
+
+if __name__ == '__main__':
+    main()
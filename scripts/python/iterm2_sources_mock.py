@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Mock of iterm2_sources.py: one window, one tab, two side-by-side panels.
+
+Used by ITerm2Bridge when ITERMREMOTE_ITERM2_MOCK=1 (the bridge swaps
+`<script>.py` for `<script>_mock.py`) and by scripts/test/fake_host_daemon.py.
+The other *_mock.py scripts read the same layout from here.
+"""
+import json
+
+WINDOW_NUMBER = 1
+CG_WINDOW_ID = 4242
+RAW_WINDOW_FRAME = {"x": 0.0, "y": 0.0, "w": 800.0, "h": 600.0}
+LAYOUT_WINDOW_FRAME = {"x": 0.0, "y": 0.0, "w": 800.0, "h": 600.0}
+
+PANELS = [
+    {
+        "id": "session-1",
+        "title": "1.1.1",
+        "detail": "bash",
+        "index": 0,
+        "frame": {"x": 0.0, "y": 0.0, "w": 400.0, "h": 300.0},
+        "windowFrame": RAW_WINDOW_FRAME,
+        "rawWindowFrame": RAW_WINDOW_FRAME,
+        "layoutFrame": {"x": 0.0, "y": 0.0, "w": 400.0, "h": 300.0},
+        "layoutWindowFrame": LAYOUT_WINDOW_FRAME,
+        "windowId": WINDOW_NUMBER,
+        "cgWindowId": CG_WINDOW_ID,
+    },
+    {
+        "id": "session-2",
+        "title": "1.1.2",
+        "detail": "python",
+        "index": 1,
+        "frame": {"x": 400.0, "y": 0.0, "w": 400.0, "h": 300.0},
+        "windowFrame": RAW_WINDOW_FRAME,
+        "rawWindowFrame": RAW_WINDOW_FRAME,
+        "layoutFrame": {"x": 400.0, "y": 0.0, "w": 400.0, "h": 300.0},
+        "layoutWindowFrame": LAYOUT_WINDOW_FRAME,
+        "windowId": WINDOW_NUMBER,
+        "cgWindowId": CG_WINDOW_ID,
+    },
+]
+
+
+def find_panel(session_id):
+    for p in PANELS:
+        if p["id"] == session_id:
+            return p
+    return None
+
+
+def mock_result(args):
+    return {"panels": [dict(p) for p in PANELS], "selectedSessionId": PANELS[0]["id"], "generation": 1}
+
+
+def main():
+    print(json.dumps(mock_result({})))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Warm pool of standby iTerm2 bridge interpreters.
+
+A one-shot bridge call pays for interpreter start-up, `import iterm2` (and
+`import Quartz` on the activate path) and the websocket handshake before it
+does any work. The pool keeps N standby `iterm2_worker.py --once` processes
+that have already imported every op module and connected to iTerm2; a
+request is handed to one of them and a replacement is started in the
+background, so the caller only pays for the op itself.
+
+Standby interpreters are started with subprocess rather than os.fork():
+PyObjC/Quartz and the asyncio loop inside the iTerm2 client are not
+fork-safe, so each standby imports its own copy.
+
+It speaks the same NDJSON protocol as iterm2_worker.py, so it can be used
+wherever the worker is (stdin/stdout):
+
+  python3 iterm2_warm_pool.py --size 2
+
+Use the persistent worker when one long-lived connection is acceptable; the
+pool is for callers that want per-request process isolation without the
+cold-start cost.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+WORKER = Path(__file__).resolve().parent / "iterm2_worker.py"
+
+DEFAULT_SIZE = 2
+# Standby processes must connect and report ready within this many seconds.
+READY_TIMEOUT_S = 15.0
+# After this many standbys in a row fail to start (no iterm2 module, API
+# down), stop respawning and answer requests with an error instead.
+MAX_SPAWN_FAILURES = 3
+# A request waits at most this long for a ready standby.
+TAKE_TIMEOUT_S = READY_TIMEOUT_S + 5.0
+
+# Ops that need a long-lived connection and cannot run in a one-request standby.
+UNSUPPORTED_OPS = {"subscribeSessionBuffer", "unsubscribeSessionBuffer"}
+
+
+def _log(msg):
+    sys.stderr.write(f"[iterm2_warm_pool] {msg}\n")
+    sys.stderr.flush()
+
+
+class PoolUnavailable(Exception):
+    pass
+
+
+class Standby:
+    __slots__ = ("proc", "spawned_at", "ready_at")
+
+    def __init__(self, proc, spawned_at, ready_at):
+        self.proc = proc
+        self.spawned_at = spawned_at
+        self.ready_at = ready_at
+
+
+class WarmPool:
+    """Keeps `size` ready standby workers; `call()` consumes one per request."""
+
+    def __init__(self, size=DEFAULT_SIZE, python=None, worker=WORKER, env=None):
+        self.size = max(1, int(size))
+        self.python = python or sys.executable
+        self.worker = str(worker)
+        self.env = dict(os.environ, PYTHONUNBUFFERED="1", **(env or {}))
+        self._ready = asyncio.Queue()
+        self._spawning = set()
+        self._starting = set()  # standby processes not yet ready (killed on close)
+        self._closed = False
+        self._failures = 0
+        self._error = None
+        self._broken = asyncio.Event()
+        self._up = asyncio.Event()
+        self.stats = {"spawned": 0, "failed": 0, "served": 0, "readyMs": []}
+
+    async def start(self):
+        """Spawn the standbys; returns once one is ready.
+
+        Raises PoolUnavailable if MAX_SPAWN_FAILURES standbys fail first.
+        """
+        for _ in range(self.size):
+            self._refill()
+        await self._wait_first(self._up.wait())
+
+    async def _wait_first(self, coro):
+        waiter = asyncio.ensure_future(coro)
+        broken = asyncio.ensure_future(self._broken.wait())
+        try:
+            await asyncio.wait({waiter, broken}, timeout=TAKE_TIMEOUT_S, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            broken.cancel()
+            if not waiter.done():
+                waiter.cancel()
+        if waiter.done() and not waiter.cancelled():
+            return waiter.result()
+        raise PoolUnavailable(self._error or f"no standby ready within {TAKE_TIMEOUT_S:.0f}s")
+
+    def _refill(self):
+        if self._closed:
+            return
+        task = asyncio.ensure_future(self._spawn())
+        self._spawning.add(task)
+        task.add_done_callback(self._spawning.discard)
+
+    async def _spawn(self):
+        t0 = time.perf_counter()
+        proc = await asyncio.create_subprocess_exec(
+            self.python,
+            self.worker,
+            "--once",
+            # The pool parses JSON lines; do not inherit ITERMREMOTE_BRIDGE_FRAMING.
+            "--framing",
+            "json",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=str(Path(self.worker).parent),
+            env=self.env,
+        )
+        self.stats["spawned"] += 1
+        self._starting.add(proc)
+        try:
+            try:
+                line = await asyncio.wait_for(proc.stdout.readline(), READY_TIMEOUT_S)
+                ready = json.loads(line) if line else {}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ready = {"event": "error", "error": str(e)}
+            if ready.get("event") != "ready":
+                if proc.returncode is None:
+                    proc.kill()
+                await proc.wait()
+        finally:
+            self._starting.discard(proc)
+        if ready.get("event") != "ready":
+            error = ready.get("error") or "no ready event"
+            self.stats["failed"] += 1
+            _log(f"standby failed to start: {error}")
+            if self._error is not None:
+                # Another concurrent spawn already gave up.
+                return
+            self._failures += 1
+            if self._failures >= MAX_SPAWN_FAILURES:
+                # Waiting callers are woken with the error; the next request
+                # triggers a single retry (see call()).
+                self._error = f"standbys failed to start {MAX_SPAWN_FAILURES} times in a row: {error}"
+                self._broken.set()
+                _log(self._error)
+                return
+            # Back off so a missing iTerm2 does not turn into a spawn loop.
+            await asyncio.sleep(1.0)
+            self._refill()
+            return
+        t1 = time.perf_counter()
+        self.stats["readyMs"].append(round((t1 - t0) * 1000.0, 3))
+        recovered = self._error is not None
+        self._failures = 0
+        self._error = None
+        self._broken.clear()
+        self._up.set()
+        await self._ready.put(Standby(proc, t0, t1))
+        if recovered:
+            for _ in range(self.size - 1):
+                self._refill()
+
+    async def _take(self):
+        while True:
+            standby = await self._wait_first(self._ready.get())
+            if standby.proc.returncode is None:
+                return standby
+            # Died while idle (e.g. iTerm2 restarted); replace it.
+            self._refill()
+
+    async def call(self, req):
+        """Run one request on a warm standby and return its response object."""
+        rid = req.get("id") if isinstance(req, dict) else None
+        op = req.get("op") if isinstance(req, dict) else None
+        if op in UNSUPPORTED_OPS:
+            return {"id": rid, "error": f"{op} is not supported by the warm pool"}
+        if self._error is not None and self._ready.empty():
+            if not self._spawning:
+                self._refill()
+            return {"id": rid, "error": f"{op} failed: {self._error}"}
+        try:
+            standby = await self._take()
+        except PoolUnavailable as e:
+            return {"id": rid, "error": f"{op} failed: {e}"}
+        self._refill()
+        proc = standby.proc
+        try:
+            proc.stdin.write((json.dumps(req, ensure_ascii=False) + "\n").encode("utf-8"))
+            await proc.stdin.drain()
+            proc.stdin.close()
+            line = await proc.stdout.readline()
+        except Exception as e:
+            line = b""
+            _log(f"standby pid={proc.pid} failed: {e}")
+        await proc.wait()
+        self.stats["served"] += 1
+        if not line:
+            return {"id": rid, "error": f"{op} failed: standby exited with code {proc.returncode}"}
+        return json.loads(line)
+
+    async def close(self):
+        self._closed = True
+        for task in list(self._spawning):
+            task.cancel()
+        for proc in list(self._starting):
+            if proc.returncode is None:
+                proc.kill()
+            await proc.wait()
+        self._starting.clear()
+        while not self._ready.empty():
+            proc = self._ready.get_nowait().proc
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+
+
+async def _serve(pool):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=16 * 1024 * 1024)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    lock = asyncio.Lock()
+    inflight = set()
+
+    async def send(obj):
+        async with lock:
+            sys.stdout.write(json.dumps(obj, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+
+    # sendText for one session must reach iTerm2 in arrival order even though
+    # requests run on different standbys: chain them per session.
+    chains = {}
+
+    async def run(req, prev):
+        if prev is not None:
+            await asyncio.wait([prev])
+        if isinstance(req, dict) and req.get("op") == "ping":
+            await send({"id": req.get("id"), "result": {"ok": True, "pid": os.getpid(), "pool": pool.size}})
+            return
+        await send(await pool.call(req))
+
+    try:
+        await pool.start()
+    except PoolUnavailable as e:
+        await send({"event": "error", "error": str(e)})
+        await pool.close()
+        return 1
+    await send({"event": "ready", "pid": os.getpid()})
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            req = json.loads(line)
+        except Exception as e:
+            await send({"id": None, "error": f"invalid json: {e}"})
+            continue
+        # Each request owns its own standby process, so they can overlap.
+        key = None
+        if isinstance(req, dict) and req.get("op") == "sendText":
+            key = (req.get("args") or {}).get("sessionId")
+        task = asyncio.ensure_future(run(req, chains.get(key) if key else None))
+        if key:
+            chains[key] = task
+            task.add_done_callback(lambda t, k=key: chains.get(k) is t and chains.pop(k))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+    if inflight:
+        await asyncio.gather(*inflight, return_exceptions=True)
+    await pool.close()
+    return 0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Warm pool of standby iTerm2 bridge interpreters (NDJSON)")
+    ap.add_argument("--size", type=int, default=int(os.environ.get("ITERMREMOTE_WARM_POOL_SIZE") or DEFAULT_SIZE))
+    args = ap.parse_args()
+    return asyncio.run(_serve(WarmPool(args.size)))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,10 +1,7 @@
-import json
-
 try:
     import iterm2
-except Exception as e:
-    print(json.dumps({"error": f"iterm2 module not available: {e}", "windows": []}, ensure_ascii=False))
-    raise SystemExit(0)
+except Exception:
+    iterm2 = None
 
 
 async def get_frame(obj):
@@ -20,8 +17,11 @@ async def get_frame(obj):
         return None
 
 
-async def main(connection):
-    app = await iterm2.async_get_app(connection)
+def unavailable(error):
+    return {"error": error, "windows": []}
+
+
+async def handle(connection, app, args):
     windows = []
 
     for win in app.terminal_windows:
@@ -47,9 +47,11 @@ async def main(connection):
         except Exception:
             pass
 
-    print(json.dumps({"windows": windows}, ensure_ascii=False))
+    return {"windows": windows}
 
 
 if __name__ == "__main__":
-    iterm2.run_until_complete(main)
+    from iterm2_worker import run_once
+
+    run_once("getWindowFrames", {})
 
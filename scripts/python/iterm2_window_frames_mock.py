@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""Mock of iterm2_window_frames.py."""
+import json
+
+from iterm2_sources_mock import RAW_WINDOW_FRAME, WINDOW_NUMBER
+
+
+def mock_result(args):
+    return {"windows": [{"windowNumber": WINDOW_NUMBER, "rawWindowFrame": RAW_WINDOW_FRAME}]}
+
+
+def main():
+    print(json.dumps(mock_result({})))
+
+
+if __name__ == '__main__':
+    main()
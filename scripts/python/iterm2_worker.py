@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""Long-lived iTerm2 bridge worker.
+
+Keeps one iTerm2 API connection open and answers newline-delimited JSON
+requests, so callers do not pay interpreter start-up, `import iterm2` and a
+fresh websocket handshake for every bridge call.
+
+Request:  {"id": 1, "op": "getSessions", "args": {}}
+Response: {"id": 1, "result": {...}}   # same JSON the one-shot script prints
+          {"id": 1, "error": "..."}    # worker-level failure
+
+Ops map 1:1 to the one-shot scripts in this directory:
+
+  getSessions        iterm2_sources.py
+  activateSession    iterm2_activate_and_crop.py   args: sessionId
+  sendText           iterm2_send_text.py           args: sessionId, text|textB64
+  readSessionBuffer  iterm2_session_reader.py      args: sessionId, maxBytes | cursor, sinceGeneration
+  getWindowFrames    iterm2_window_frames.py
+
+`sendText` requests are answered out of order: they are handed to a
+per-session coalescer (see iterm2_send_text.py) while the worker keeps
+reading, so a burst of keystrokes becomes one `async_send_text` per window.
+All other ops run one at a time in arrival order.
+
+`subscribeSessionBuffer` (args: sessionId, cursor) answers with a first
+delta plus a `subscription` id and then pushes
+`{"event": "sessionBuffer", "subscription": S, ...delta}` on the same stream
+until `unsubscribeSessionBuffer` (args: subscription) or EOF.
+
+`getSessions` is served from an event-driven model of windows/tabs/sessions
+(see iterm2_session_cache.py) and carries a `generation` counter; pass
+`{"sinceGeneration": N}` to get `{"unchanged": true}` while nothing moved.
+
+Transport is stdin/stdout by default, or a Unix socket with `--socket PATH`
+(one request stream per client connection). On start-up the worker emits
+`{"event": "ready", "pid": ...}` once the iTerm2 connection is established.
+
+`--framing binary` (or ITERMREMOTE_BRIDGE_FRAMING=binary) switches both
+directions from JSON lines to length-prefixed frames that carry session text
+as raw UTF-8 next to a JSON header instead of base64 inside it; see
+bridge_framing.py.
+
+The one-shot scripts call `run_once()` from here, so both paths share the
+exact same op implementations.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import bridge_framing
+
+try:
+    import iterm2
+except Exception as e:
+    iterm2 = None
+    IMPORT_ERROR = e
+
+import iterm2_activate_and_crop
+import iterm2_send_text
+import iterm2_session_cache
+import iterm2_session_reader
+import iterm2_sources
+import iterm2_window_frames
+
+OPS = {
+    "getSessions": iterm2_sources,
+    "activateSession": iterm2_activate_and_crop,
+    "sendText": iterm2_send_text,
+    "readSessionBuffer": iterm2_session_reader,
+    "getWindowFrames": iterm2_window_frames,
+}
+
+# Ops whose requests are dispatched without waiting for the previous one.
+CONCURRENT_OPS = {"sendText"}
+
+# Requests may carry large payloads (pasted text); keep well above the
+# asyncio default of 64 KiB per line.
+MAX_LINE_BYTES = 16 * 1024 * 1024
+
+
+def _dumps(obj):
+    return bridge_framing.dumps(obj)
+
+
+def _unavailable(module):
+    fn = getattr(module, "unavailable", None)
+    if fn is None:
+        return None
+    return fn(f"iterm2 module not available: {IMPORT_ERROR}")
+
+
+def run_once(op, args):
+    """Run a single op on a fresh connection and print its JSON to stdout."""
+    module = OPS[op]
+    if iterm2 is None:
+        print(_dumps(_unavailable(module)))
+        return
+
+    async def main(connection):
+        app = await iterm2.async_get_app(connection)
+        out = await module.handle(connection, app, args)
+        if out is not None:
+            print(_dumps(out))
+
+    iterm2.run_until_complete(main)
+
+
+async def dispatch(connection, req, buffers=None):
+    """Run one request; `buffers` holds the stream's readSessionBuffer state."""
+    rid = req.get("id") if isinstance(req, dict) else None
+    if not isinstance(req, dict):
+        return {"id": rid, "error": "request must be a JSON object"}
+    op = req.get("op")
+    if op == "ping":
+        return {"id": rid, "result": {"ok": True, "pid": os.getpid()}}
+    module = OPS.get(op)
+    if module is None:
+        return {"id": rid, "error": f"unknown op: {op}"}
+    args = req.get("args") or {}
+    try:
+        app = await iterm2.async_get_app(connection) if connection else None
+        if module is iterm2_session_reader:
+            result = await module.handle(connection, app, args, buffers)
+        else:
+            result = await module.handle(connection, app, args)
+    except Exception as e:
+        return {"id": rid, "error": f"{op} failed: {e}"}
+    return {"id": rid, "result": result}
+
+
+async def _subscribe(connection, req, reply, subs):
+    rid = req.get("id")
+    args = req.get("args") or {}
+    sub_id = len(subs) + 1
+    while sub_id in subs:
+        sub_id += 1
+
+    async def push(delta):
+        await reply(dict(delta, event="sessionBuffer", subscription=sub_id))
+
+    try:
+        app = await iterm2.async_get_app(connection)
+        first, task = await iterm2_session_reader.subscribe(connection, app, args, push)
+    except Exception as e:
+        return {"id": rid, "error": f"subscribeSessionBuffer failed: {e}"}
+    if task is not None:
+        subs[sub_id] = task
+        task.add_done_callback(lambda _t: subs.pop(sub_id, None))
+        first = dict(first, subscription=sub_id)
+    return {"id": rid, "result": first}
+
+
+def _unsubscribe(req, subs):
+    args = req.get("args") or {}
+    task = subs.pop(args.get("subscription"), None)
+    if task is not None:
+        task.cancel()
+    return {"id": req.get("id"), "result": {"ok": task is not None}}
+
+
+def _line_reader(reader):
+    async def recv():
+        while True:
+            line = await reader.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if line:
+                return json.loads(line)
+
+    return recv
+
+
+def _frame_reader(reader):
+    async def recv():
+        return await bridge_framing.read_frame(reader)
+
+    return recv
+
+
+async def serve(connection, recv, send, limit=None):
+    """Answer requests from one stream until `recv()` returns None (EOF).
+
+    With `limit`, stop after that many requests (warm-pool standby workers).
+    """
+    lock = asyncio.Lock()
+    inflight = set()
+    subs = {}
+    # Delta-read state is per stream: generations from one client must not
+    # be diffed against another client's reads.
+    buffers = {}
+
+    async def reply(obj):
+        # Concurrent replies must not interleave drains on one writer.
+        async with lock:
+            await send(obj)
+
+    async def run(req):
+        op = req.get("op") if isinstance(req, dict) else None
+        if op == "subscribeSessionBuffer":
+            await reply(await _subscribe(connection, req, reply, subs))
+        elif op == "unsubscribeSessionBuffer":
+            await reply(_unsubscribe(req, subs))
+        else:
+            await reply(await dispatch(connection, req, buffers))
+
+    try:
+        while True:
+            try:
+                req = await recv()
+            except bridge_framing.FramingError as e:
+                # Frame boundaries are lost; the stream cannot be resynced.
+                await reply({"id": None, "error": f"invalid frame: {e}"})
+                return
+            except ValueError as e:
+                await reply({"id": None, "error": f"invalid json: {e}"})
+                continue
+            if req is None:
+                return
+            if isinstance(req, dict) and req.get("op") in CONCURRENT_OPS:
+                task = asyncio.ensure_future(run(req))
+                inflight.add(task)
+                task.add_done_callback(inflight.discard)
+            else:
+                await run(req)
+            if limit is not None:
+                limit -= 1
+                if limit <= 0:
+                    return
+    finally:
+        for task in list(subs.values()):
+            task.cancel()
+        if inflight:
+            await asyncio.gather(*inflight, return_exceptions=True)
+
+
+async def _stdin_reader():
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_LINE_BYTES)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    return reader
+
+
+def _codec(framing):
+    if framing == "binary":
+        return _frame_reader, bridge_framing.encode_frame
+    return _line_reader, bridge_framing.dumps_line
+
+
+async def _serve_stdio(connection, framing, limit=None):
+    make_recv, encode = _codec(framing)
+    reader = await _stdin_reader()
+    out = sys.stdout.buffer
+
+    async def send(obj):
+        out.write(encode(obj))
+        out.flush()
+
+    await send({"event": "ready", "pid": os.getpid()})
+    await serve(connection, make_recv(reader), send, limit)
+
+
+async def _serve_socket(connection, path, framing):
+    make_recv, encode = _codec(framing)
+
+    async def on_client(reader, writer):
+        async def send(obj):
+            writer.write(encode(obj))
+            await writer.drain()
+
+        try:
+            await send({"event": "ready", "pid": os.getpid()})
+            await serve(connection, make_recv(reader), send)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+    server = await asyncio.start_unix_server(on_client, path=path, limit=MAX_LINE_BYTES)
+    sys.stderr.write(f"[iterm2_worker] listening on {path}\n")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Persistent iTerm2 bridge worker (NDJSON)")
+    ap.add_argument("--socket", default=None, help="Serve on a Unix socket instead of stdin/stdout")
+    ap.add_argument(
+        "--framing",
+        choices=["json", "binary"],
+        default=os.environ.get("ITERMREMOTE_BRIDGE_FRAMING") or "json",
+        help="Wire format: JSON lines (default) or length-prefixed binary frames",
+    )
+    ap.add_argument(
+        "--once",
+        action="store_true",
+        help="Standby mode for iterm2_warm_pool.py: connect, report ready, serve one request, exit",
+    )
+    args = ap.parse_args()
+
+    if iterm2 is None:
+        _, encode = _codec(args.framing)
+        sys.stdout.buffer.write(encode({"event": "error", "error": f"iterm2 module not available: {IMPORT_ERROR}"}))
+        sys.stdout.buffer.flush()
+        return 1
+
+    if not args.once:
+        iterm2_send_text.coalescer = iterm2_send_text.InputCoalescer()
+
+    async def run(connection):
+        if args.once:
+            await _serve_stdio(connection, args.framing, limit=1)
+            return
+        try:
+            app = await iterm2.async_get_app(connection)
+            await iterm2_session_cache.start(connection, app)
+        except Exception as e:
+            # getSessions still works, it just rebuilds the model per call.
+            sys.stderr.write(f"[iterm2_worker] session cache disabled: {e}\n")
+        if args.socket:
+            await _serve_socket(connection, args.socket, args.framing)
+        else:
+            await _serve_stdio(connection, args.framing)
+
+    iterm2.run_until_complete(run)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,25 @@
+"""Python client for the host_daemon WebSocket protocol (cmd / ack / evt).
+
+    from itermremote_client import DaemonClient
+
+    async with DaemonClient("ws://127.0.0.1:8766") as client:
+        events = await client.subscribe({"webrtc"})
+        sessions = (await client.call("iterm2", "getSessions"))["sessions"]
+        ack = await client.request("webrtc", "getLoopbackStats", timeout=5)
+
+Requires: websockets
+"""
+
+from .client import DEFAULT_TIMEOUT, DEFAULT_WS_URL, DaemonClient, EventSubscription
+from .envelope import PROTOCOL_VERSION, CommandError, CommandTimeout, make_cmd
+
+__all__ = [
+    "DEFAULT_TIMEOUT",
+    "DEFAULT_WS_URL",
+    "PROTOCOL_VERSION",
+    "CommandError",
+    "CommandTimeout",
+    "DaemonClient",
+    "EventSubscription",
+    "make_cmd",
+]
@@ -0,0 +1,198 @@
+"""Multiplexing asyncio client for the host_daemon WebSocket protocol.
+
+One reader task owns the socket's receive side:
+
+- acks resolve the future registered for their id in a pending map, so any
+  number of commands can be in flight at once (e.g. ICE candidates sent from
+  a callback while another command is waiting);
+- events are fanned out to every queue subscribed to their source, instead of
+  being dropped while a command waits for its ack.
+
+Every command has its own timeout. Acks that arrive after their command timed
+out are counted and discarded.
+"""
+
+import asyncio
+import itertools
+import os
+
+try:
+    import websockets
+except Exception:
+    websockets = None
+
+from .envelope import CommandError, CommandTimeout, decode, encode, make_cmd
+
+DEFAULT_WS_URL = os.environ.get("ITERMREMOTE_WS_URL", "ws://127.0.0.1:8766")
+DEFAULT_TIMEOUT = 30.0
+EVENT_QUEUE_SIZE = 1000
+
+
+class EventSubscription:
+    """Queue of events for a set of sources (None = every source).
+
+    Bounded: when the consumer falls behind, the oldest event is dropped and
+    counted in `dropped`. `get()` returns None once the connection is closed.
+    """
+
+    def __init__(self, client, sources=None, maxsize=EVENT_QUEUE_SIZE):
+        self._client = client
+        self.sources = set(sources) if sources else None
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, source):
+        return self.sources is None or source in self.sources
+
+    def _put(self, evt):
+        while True:
+            try:
+                self.queue.put_nowait(evt)
+                return
+            except asyncio.QueueFull:
+                self.queue.get_nowait()
+                self.dropped += 1
+
+    async def get(self, timeout=None):
+        if timeout is None:
+            return await self.queue.get()
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self._client._subs.discard(self)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        evt = await self.queue.get()
+        if evt is None:
+            raise StopAsyncIteration
+        return evt
+
+
+class DaemonClient:
+    """`async with DaemonClient(url) as client: data = await client.call(...)`."""
+
+    def __init__(self, url=DEFAULT_WS_URL, timeout=DEFAULT_TIMEOUT, id_prefix=None, **connect_kwargs):
+        self.url = url
+        self.timeout = timeout
+        self._prefix = id_prefix or f"py-{os.getpid()}"
+        self._ids = itertools.count(1)
+        self._connect_kwargs = connect_kwargs
+        self._ws = None
+        self._reader = None
+        self._pending = {}  # id -> Future[ack dict]
+        self._subs = set()
+        self._closed_error = None
+        self.late_acks = 0
+        self.unmatched = 0
+
+    # --- connection --------------------------------------------------------
+
+    async def connect(self):
+        if websockets is None:
+            raise RuntimeError("Missing dependency: websockets. Install via: pip3 install websockets")
+        self._ws = await websockets.connect(self.url, **self._connect_kwargs)
+        self._closed_error = None
+        self._reader = asyncio.ensure_future(self._read_loop())
+        return self
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._reader is not None:
+            try:
+                await self._reader
+            except Exception:
+                pass
+            self._reader = None
+
+    async def __aenter__(self):
+        return await self.connect()
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    @property
+    def in_flight(self):
+        return len(self._pending)
+
+    async def _read_loop(self):
+        error = ConnectionError("connection closed")
+        try:
+            async for raw in self._ws:
+                msg = decode(raw)
+                if msg is None:
+                    continue
+                kind = msg.get("type")
+                if kind == "ack":
+                    fut = self._pending.pop(msg.get("id"), None)
+                    if fut is None:
+                        self.late_acks += 1
+                    elif not fut.done():
+                        fut.set_result(msg)
+                elif kind == "evt":
+                    source = msg.get("source")
+                    for sub in list(self._subs):
+                        if sub.wants(source):
+                            sub._put(msg)
+                else:
+                    self.unmatched += 1
+        except Exception as e:
+            error = ConnectionError(f"connection lost: {e}")
+        finally:
+            self._closed_error = error
+            pending, self._pending = self._pending, {}
+            for fut in pending.values():
+                if not fut.done():
+                    fut.set_exception(error)
+            for sub in list(self._subs):
+                sub._put(None)
+
+    # --- commands ----------------------------------------------------------
+
+    async def request(self, target, action, payload=None, timeout=None):
+        """Send a command and return its ack dict (success or not)."""
+        if self._ws is None:
+            raise RuntimeError("not connected")
+        if self._closed_error is not None:
+            raise self._closed_error
+        cmd_id = f"{self._prefix}-{next(self._ids)}"
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[cmd_id] = fut
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            await self._ws.send(encode(make_cmd(cmd_id, target, action, payload)))
+            if timeout and timeout > 0:
+                return await asyncio.wait_for(fut, timeout)
+            return await fut
+        except asyncio.TimeoutError:
+            raise CommandTimeout(target, action, timeout) from None
+        finally:
+            self._pending.pop(cmd_id, None)
+
+    async def call(self, target, action, payload=None, timeout=None):
+        """Send a command and return ack["data"]; raises CommandError on failure."""
+        ack = await self.request(target, action, payload, timeout)
+        if not ack.get("success"):
+            raise CommandError(target, action, ack)
+        return ack.get("data") or {}
+
+    # --- events ------------------------------------------------------------
+
+    def events(self, sources=None, maxsize=EVENT_QUEUE_SIZE):
+        """New event queue for `sources` (iterable of source names, None = all)."""
+        sub = EventSubscription(self, sources, maxsize)
+        self._subs.add(sub)
+        return sub
+
+    async def subscribe(self, sources, timeout=None):
+        """Ask the orchestrator to send events for `sources`; returns a queue for them."""
+        sub = self.events(sources)
+        try:
+            await self.call("orchestrator", "subscribe", {"sources": sorted(sources)}, timeout)
+        except Exception:
+            sub.close()
+            raise
+        return sub
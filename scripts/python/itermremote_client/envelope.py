@@ -0,0 +1,61 @@
+"""Daemon protocol envelopes (see packages/itermremote_protocol).
+
+  cmd: {"version", "type": "cmd", "id", "target", "action", "payload"}
+  ack: {"version", "type": "ack", "id", "success", "data"?, "error"?: {"code", "message", "details"?}}
+  evt: {"version", "type": "evt", "source", "event", "ts", "payload"?}
+
+Envelopes are plain dicts, as the test scripts have always used them.
+"""
+
+import asyncio
+import json
+
+PROTOCOL_VERSION = 1
+
+
+class CommandError(RuntimeError):
+    """A command was acked with success=false."""
+
+    def __init__(self, target, action, ack):
+        err = ack.get("error") or {}
+        self.target = target
+        self.action = action
+        self.ack = ack
+        self.code = err.get("code", "unknown")
+        super().__init__(f"{self.code}: {err.get('message', 'unknown')}")
+
+
+class CommandTimeout(asyncio.TimeoutError):
+    """No ack arrived for a command within its timeout."""
+
+    def __init__(self, target, action, timeout):
+        self.target = target
+        self.action = action
+        self.timeout = timeout
+        super().__init__(f"{target}.{action}: no ack within {timeout:g}s")
+
+
+def make_cmd(cmd_id, target, action, payload=None):
+    return {
+        "version": PROTOCOL_VERSION,
+        "type": "cmd",
+        "id": cmd_id,
+        "target": target,
+        "action": action,
+        "payload": payload or {},
+    }
+
+
+def encode(msg):
+    return json.dumps(msg)
+
+
+def decode(raw):
+    """Parse one text frame; returns the dict, or None for anything else."""
+    if not isinstance(raw, str):
+        return None
+    try:
+        msg = json.loads(raw)
+    except ValueError:
+        return None
+    return msg if isinstance(msg, dict) else None
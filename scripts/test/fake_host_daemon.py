@@ -0,0 +1,729 @@
+#!/usr/bin/env python3
+"""
+Stand-in for host_daemon's WebSocket server, for running the Python harnesses
+on Linux / CI without a Mac.
+
+Speaks the same envelope (see packages/itermremote_protocol) and mirrors the
+routing of src/modules/daemon_ws/lib/ws_server_impl.dart and BlockRegistry:
+
+  orchestrator  subscribe, getState
+  state         get
+  echo          echo
+  iterm2        getSessions, activateSession, sendText, readSessionBuffer,
+                getWindowFrames, getState
+  webrtc        startLoopback, stopLoopback, createOffer, setRemoteDescription,
+                addIceCandidate, createAnswer, getLoopbackStats, getState
+  verify        captureEvidence, renderMultiPanelOverlay, getState
+
+Validation errors use the same codes and messages as the Dart blocks, and
+events (activated, loopbackStarted, iceCandidate, evidenceCaptured, ...) are
+only delivered to connections subscribed to their source.
+
+iterm2 results come from the scripts/python/*_mock.py bridge scripts, the
+same ones ITerm2Bridge runs with ITERMREMOTE_ITERM2_MOCK=1: in-process by
+default, or as one subprocess per call with --bridge subprocess (like the
+bridge's one-shot path). webrtc keeps the loopback state machine and a
+simulated frame counter but negotiates nothing: createOffer returns a
+well-formed H.264 offer with no media behind it. verify draws on a synthetic
+screen from tools/screen_capture.py (numpy + Pillow).
+
+Every command can be delayed by --latency-ms plus a uniform random
+0..--jitter-ms, with per-action overrides via --action-latency.
+
+Examples:
+  python3 scripts/test/fake_host_daemon.py
+  python3 scripts/test/fake_host_daemon.py --port 18766 --latency-ms 5 --jitter-ms 20
+  python3 scripts/test/fake_host_daemon.py --action-latency iterm2.activateSession=250 --bridge subprocess
+"""
+import argparse
+import asyncio
+import base64
+import importlib
+import json
+import os
+import random
+import secrets
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+PY_DIR = REPO_ROOT / "scripts" / "python"
+sys.path.insert(0, str(PY_DIR))
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+try:
+    import websockets
+except ImportError:
+    print("Missing dependency: websockets. Install via: pip3 install websockets", file=sys.stderr)
+    sys.exit(2)
+
+from itermremote_client.envelope import PROTOCOL_VERSION, decode, encode  # noqa: E402
+
+DEFAULT_PORT = int(os.environ.get("ITERMREMOTE_WS_PORT") or 8766)
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def ack_ok(cmd_id, data=None):
+    msg = {"version": PROTOCOL_VERSION, "type": "ack", "id": cmd_id, "success": True}
+    if data is not None:
+        msg["data"] = data
+    return msg
+
+
+def ack_fail(cmd_id, code, message, details=None):
+    error = {"code": code, "message": message}
+    if details is not None:
+        error["details"] = details
+    return {"version": PROTOCOL_VERSION, "type": "ack", "id": cmd_id, "success": False, "error": error}
+
+
+def make_event(source, event, payload=None):
+    msg = {"version": PROTOCOL_VERSION, "type": "evt", "source": source, "event": event, "ts": now_ms()}
+    if payload is not None:
+        msg["payload"] = payload
+    return msg
+
+
+class Latency:
+    """Injected delay per command: base + uniform(0, jitter), in ms."""
+
+    def __init__(self, base_ms=0.0, jitter_ms=0.0, per_action=None, seed=None):
+        self.base_ms = base_ms
+        self.jitter_ms = jitter_ms
+        self.per_action = dict(per_action or {})
+        self._rng = random.Random(seed)
+
+    def seconds(self, target, action):
+        base = self.per_action.get(f"{target}.{action}", self.base_ms)
+        jitter = self._rng.uniform(0.0, self.jitter_ms) if self.jitter_ms > 0 else 0.0
+        return max(0.0, base + jitter) / 1000.0
+
+
+# --- iterm2 bridge over the *_mock.py scripts ---------------------------------
+
+
+class MockBridge:
+    """Runs the *_mock.py bridge scripts in-process or as subprocesses."""
+
+    SCRIPTS = {
+        "getSessions": "iterm2_sources",
+        "activateSession": "iterm2_activate_and_crop",
+        "sendText": "iterm2_send_text",
+        "readSessionBuffer": "iterm2_session_reader",
+        "getWindowFrames": "iterm2_window_frames",
+    }
+
+    def __init__(self, mode="inproc", timeout=3.0):
+        if mode not in ("inproc", "subprocess"):
+            raise ValueError(f"unknown bridge mode: {mode}")
+        self.mode = mode
+        self.timeout = timeout
+        self.calls = 0
+
+    async def invoke(self, op, args, argv):
+        module = f"{self.SCRIPTS[op]}_mock"
+        self.calls += 1
+        if self.mode == "inproc":
+            return importlib.import_module(module).mock_result(args)
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, str(PY_DIR / f"{module}.py"), *argv,
+            cwd=str(REPO_ROOT),
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            out, err = await asyncio.wait_for(proc.communicate(), self.timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            raise RuntimeError(f"{op} failed: timeout after {int(self.timeout * 1000)}ms") from None
+        if proc.returncode != 0:
+            raise RuntimeError(f"{op} failed: {err.decode(errors='replace')}")
+        out = out.decode().strip()
+        return json.loads(out) if out else None
+
+
+# --- blocks ---------------------------------------------------------------------
+
+
+class FakeBlock:
+    name = ""
+
+    def __init__(self):
+        self.state = {"ready": False}
+        self._publish = None
+
+    def init(self, publish):
+        self._publish = publish
+        self.state = {"ready": True}
+
+    def publish(self, event, payload=None):
+        if self._publish is not None:
+            self._publish(make_event(self.name, event, payload))
+
+    async def handle(self, cmd):
+        action = cmd.get("action")
+        fn = getattr(self, f"do_{action}", None)
+        if fn is None:
+            return ack_fail(cmd["id"], "unknown_action", f"Unknown action: {action}")
+        return await fn(cmd["id"], cmd.get("payload") or {})
+
+
+class EchoBlock(FakeBlock):
+    name = "echo"
+
+    async def do_echo(self, cmd_id, payload):
+        return ack_ok(cmd_id, {"echo": payload})
+
+
+class ITerm2Block(FakeBlock):
+    name = "iterm2"
+
+    def __init__(self, bridge):
+        super().__init__()
+        self.bridge = bridge
+
+    async def do_getState(self, cmd_id, payload):
+        return ack_ok(cmd_id, self.state)
+
+    async def do_getSessions(self, cmd_id, payload):
+        out = await self.bridge.invoke("getSessions", {}, [])
+        panels = out.get("panels") if isinstance(out, dict) else None
+        return ack_ok(cmd_id, {"sessions": panels if isinstance(panels, list) else []})
+
+    async def do_activateSession(self, cmd_id, payload):
+        sid = payload.get("sessionId")
+        if not isinstance(sid, str) or not sid.strip():
+            return ack_fail(cmd_id, "invalid_payload", "activateSession requires payload.sessionId")
+        meta = await self.bridge.invoke("activateSession", {"sessionId": sid}, [sid])
+        meta = meta if isinstance(meta, dict) else {}
+        self.state = {**self.state, "lastActivatedSessionId": sid, "lastActivateMeta": meta}
+        self.publish("activated", {"sessionId": sid, "meta": meta})
+        return ack_ok(cmd_id, {"meta": meta})
+
+    async def do_sendText(self, cmd_id, payload):
+        sid = payload.get("sessionId")
+        text = payload.get("text")
+        if not isinstance(sid, str) or not sid.strip() or not isinstance(text, str):
+            return ack_fail(cmd_id, "invalid_payload", "sendText requires payload.sessionId and payload.text")
+        b64 = base64.b64encode(text.encode("utf-8")).decode("ascii")
+        out = await self.bridge.invoke("sendText", {"sessionId": sid, "text": text}, [sid, b64])
+        ok = out["ok"] if isinstance(out, dict) and isinstance(out.get("ok"), bool) else True
+        return ack_ok(cmd_id, {"ok": ok})
+
+    async def do_readSessionBuffer(self, cmd_id, payload):
+        sid = payload.get("sessionId")
+        if not isinstance(sid, str) or not sid.strip():
+            return ack_fail(cmd_id, "invalid_payload", "readSessionBuffer requires payload.sessionId")
+        mb = payload.get("maxBytes")
+        mb = int(mb) if isinstance(mb, (int, float)) else 65536
+        out = await self.bridge.invoke("readSessionBuffer", {"sessionId": sid, "maxBytes": mb}, [sid, str(mb)])
+        text = ""
+        if isinstance(out, dict) and isinstance(out.get("text"), str):
+            try:
+                text = base64.b64decode(out["text"]).decode("utf-8")
+            except ValueError:
+                text = ""
+        return ack_ok(cmd_id, {"text": text})
+
+    async def do_getWindowFrames(self, cmd_id, payload):
+        out = await self.bridge.invoke("getWindowFrames", {}, [])
+        windows = out.get("windows") if isinstance(out, dict) else None
+        return ack_ok(cmd_id, {"windows": windows if isinstance(windows, list) else []})
+
+    async def handle(self, cmd):
+        try:
+            return await super().handle(cmd)
+        except Exception as e:
+            return ack_fail(cmd["id"], "iterm2_error", str(e))
+
+
+def fake_offer_sdp(fps, bitrate_kbps):
+    fingerprint = ":".join(f"{b:02X}" for b in secrets.token_bytes(32))
+    lines = [
+        "v=0",
+        f"o=- {random.randint(10**17, 10**18)} 2 IN IP4 127.0.0.1",
+        "s=-",
+        "t=0 0",
+        "a=group:BUNDLE 0",
+        "a=msid-semantic: WMS fake",
+        "m=video 9 UDP/TLS/RTP/SAVPF 96",
+        "c=IN IP4 0.0.0.0",
+        f"b=AS:{bitrate_kbps}",
+        "a=rtcp:9 IN IP4 0.0.0.0",
+        f"a=ice-ufrag:{secrets.token_hex(2)}",
+        f"a=ice-pwd:{secrets.token_hex(12)}",
+        f"a=fingerprint:sha-256 {fingerprint}",
+        "a=setup:actpass",
+        "a=mid:0",
+        "a=sendonly",
+        "a=rtcp-mux",
+        "a=rtpmap:96 H264/90000",
+        "a=fmtp:96 level-asymmetry-allowed=1;packetization-mode=1;profile-level-id=42e032",
+        f"a=framerate:{fps}",
+        "",
+    ]
+    return "\r\n".join(lines)
+
+
+def _int(v, default):
+    if isinstance(v, int):
+        return v
+    try:
+        return int(str(v if v is not None else default))
+    except ValueError:
+        return default
+
+
+class WebRTCBlock(FakeBlock):
+    name = "webrtc"
+
+    IDLE_STATE = {
+        "loopbackActive": False,
+        "loopbackSourceType": "",
+        "loopbackSourceId": "",
+        "loopbackCropRect": {},
+        "loopbackStartTime": 0,
+        "loopbackStopTime": 0,
+        "loopbackFps": 30,
+        "loopbackBitrateKbps": 2000,
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.state = {"ready": False, **self.IDLE_STATE}
+        self._pc = False
+        self._remote_set = False
+        self._started = None
+        self._frames_at_stop = 0
+
+    def init(self, publish):
+        super().init(publish)
+        self.state = {"ready": True, **self.IDLE_STATE}
+        self.publish("ready", self.state)
+
+    def _not_ready(self, cmd_id):
+        return ack_fail(cmd_id, "not_ready", "PeerConnection not initialized")
+
+    def _frame_count(self):
+        if self._started is None:
+            return 0
+        return int((time.monotonic() - self._started) * self.state["loopbackFps"])
+
+    async def do_getState(self, cmd_id, payload):
+        return ack_ok(cmd_id, self.state)
+
+    async def do_startLoopback(self, cmd_id, payload):
+        if self._pc:
+            self._stop()
+        source_type = str(payload.get("sourceType") or "screen")
+        source_id = "" if payload.get("sourceId") is None else str(payload.get("sourceId"))
+        crop = payload.get("cropRect") if isinstance(payload.get("cropRect"), dict) else {}
+        fps = _int(payload.get("fps"), 30)
+        width = _int(payload.get("width"), 1920)
+        height = _int(payload.get("height"), 1080)
+        bitrate = payload.get("bitrateKbps")
+        bitrate = _int(bitrate, 0) if bitrate is not None else max(2000, width * height * fps // 20000)
+        crop = {k: float(v) for k, v in crop.items() if isinstance(v, (int, float))}
+        self._pc = True
+        self._remote_set = False
+        self._started = time.monotonic()
+        self.state = {
+            **self.state,
+            "loopbackActive": True,
+            "loopbackSourceType": source_type,
+            "loopbackSourceId": source_id,
+            "loopbackCropRect": crop,
+            "loopbackStartTime": now_ms(),
+            "loopbackFps": fps,
+            "loopbackBitrateKbps": bitrate,
+        }
+        self.publish("loopbackStarted", {
+            "sourceType": source_type, "sourceId": source_id, "cropRect": crop,
+            "fps": fps, "bitrateKbps": bitrate,
+        })
+        return ack_ok(cmd_id, self.state)
+
+    def _stop(self):
+        self._pc = False
+        self._remote_set = False
+        self._frames_at_stop = self._frame_count()
+        self._started = None
+        self.state = {**self.state, "loopbackActive": False, "loopbackStopTime": now_ms()}
+
+    async def do_stopLoopback(self, cmd_id, payload):
+        self._stop()
+        self.publish("loopbackStopped", self.state)
+        return ack_ok(cmd_id, self.state)
+
+    async def do_createOffer(self, cmd_id, payload):
+        if not self._pc:
+            return self._not_ready(cmd_id)
+        bitrate = max(250, min(20000, int(self.state.get("loopbackBitrateKbps") or 2000)))
+        sdp = fake_offer_sdp(self.state["loopbackFps"], bitrate)
+        self.publish("iceCandidate", {
+            "candidate": "candidate:1 1 udp 2122260223 127.0.0.1 9 typ host",
+            "sdpMid": "0",
+            "sdpMLineIndex": 0,
+        })
+        return ack_ok(cmd_id, {"type": "offer", "sdp": sdp, "sdpLength": len(sdp)})
+
+    async def do_setRemoteDescription(self, cmd_id, payload):
+        if not self._pc:
+            return self._not_ready(cmd_id)
+        sdp_type = payload.get("type")
+        sdp = payload.get("sdp")
+        if not isinstance(sdp_type, str) or not isinstance(sdp, str):
+            return ack_fail(cmd_id, "invalid_payload", "setRemoteDescription requires type and sdp", {
+                "type": type(sdp_type).__name__, "sdp": type(sdp).__name__,
+            })
+        if not sdp.startswith("v=0"):
+            return ack_fail(cmd_id, "set_remote_desc_failed", "Failed to set remote description: bad SDP",
+                            {"sdpLength": len(sdp), "type": sdp_type})
+        self._remote_set = True
+        return ack_ok(cmd_id, {"success": True})
+
+    async def do_addIceCandidate(self, cmd_id, payload):
+        if not self._pc:
+            return self._not_ready(cmd_id)
+        candidate = payload.get("candidate")
+        if not isinstance(candidate, str) or not candidate.strip():
+            return ack_fail(cmd_id, "invalid_payload", "addIceCandidate requires non-empty candidate string",
+                            {"candidateType": type(candidate).__name__})
+        return ack_ok(cmd_id, {"success": True})
+
+    async def do_createAnswer(self, cmd_id, payload):
+        if not self._pc:
+            return self._not_ready(cmd_id)
+        if not self._remote_set:
+            return ack_fail(cmd_id, "create_answer_failed",
+                            "createAnswer returned null or empty SDP. Remote description may not be set.",
+                            {"hasRemoteDescription": False, "sdpType": "answer"})
+        sdp = fake_offer_sdp(self.state["loopbackFps"], 2000).replace("a=setup:actpass", "a=setup:active")
+        return ack_ok(cmd_id, {"type": "answer", "sdp": sdp.replace("a=sendonly", "a=recvonly")})
+
+    async def do_getLoopbackStats(self, cmd_id, payload):
+        frames = self._frame_count() if self._started is not None else self._frames_at_stop
+        actual = float(self.state["loopbackFps"]) if self._started is not None and frames else 0.0
+        return ack_ok(cmd_id, {"stats": {
+            "active": self.state["loopbackActive"],
+            "sourceType": self.state["loopbackSourceType"],
+            "sourceId": self.state["loopbackSourceId"],
+            "cropRect": self.state["loopbackCropRect"],
+            "startTime": self.state["loopbackStartTime"],
+            "stopTime": self.state["loopbackStopTime"],
+            "targetFps": self.state["loopbackFps"],
+            "actualFps": actual,
+            "frameCount": frames,
+        }})
+
+    async def handle(self, cmd):
+        try:
+            return await super().handle(cmd)
+        except Exception as e:
+            return ack_fail(cmd["id"], "webrtc_error", f"Unhandled WebRTC error: {e}", {
+                "action": cmd.get("action"), "errorType": type(e).__name__,
+            })
+
+
+def _rect(d):
+    d = d if isinstance(d, dict) else {}
+    return tuple(float(d.get(k) or 0.0) for k in ("x", "y", "w", "h"))
+
+
+class VerifyBlock(FakeBlock):
+    name = "verify"
+
+    def __init__(self, capture_backend="synthetic"):
+        super().__init__()
+        self.capture_backend = capture_backend
+        self._backend = None
+
+    def init(self, publish):
+        super().init(publish)
+        self.publish("ready", self.state)
+
+    def _screen(self):
+        from screen_capture import capture_screen, get_backend
+
+        if self._backend is None:
+            self._backend = get_backend(self.capture_backend)
+        return capture_screen(self._backend).to_image().convert("RGB")
+
+    async def do_getState(self, cmd_id, payload):
+        return ack_ok(cmd_id, self.state)
+
+    async def do_captureEvidence(self, cmd_id, payload):
+        from PIL import ImageDraw
+
+        evidence_dir = payload.get("evidenceDir")
+        session_id = payload.get("sessionId")
+        crop_meta = payload.get("cropMeta")
+        if not isinstance(evidence_dir, str) or not evidence_dir.strip():
+            return ack_fail(cmd_id, "invalid_payload", "captureEvidence requires payload.evidenceDir")
+        if not isinstance(crop_meta, dict):
+            return ack_fail(cmd_id, "invalid_payload", "captureEvidence requires payload.cropMeta (Map)")
+
+        out = Path(evidence_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        ts = now_ms()
+        evidence_file = out / f"evidence_{ts}.json"
+        screenshot_png = out / f"screenshot_{ts}.png"
+        cropped_png = out / f"cropped_{ts}.png"
+        meta_json = out / f"meta_{ts}.json"
+        overlay_png = out / f"overlay_{ts}.png"
+        meta_json.write_text(json.dumps(crop_meta))
+
+        try:
+            screen = self._screen()
+        except Exception as e:
+            return ack_fail(cmd_id, "screencapture_failed", f"screencapture failed: {e}")
+        screen.save(screenshot_png)
+
+        wx, wy, _, _ = _rect(crop_meta.get("rawWindowFrame"))
+        fx, fy, fw, fh = _rect(crop_meta.get("frame"))
+        box = (int(wx + fx), int(wy + fy), int(wx + fx + fw), int(wy + fy + fh))
+        box = (max(0, box[0]), max(0, box[1]), min(screen.width, box[2]), min(screen.height, box[3]))
+        if box[2] > box[0] and box[3] > box[1]:
+            screen.crop(box).save(cropped_png)
+        overlay = screen.copy()
+        ImageDraw.Draw(overlay).rectangle(box, outline=(255, 0, 0), width=3)
+        overlay.save(overlay_png)
+
+        evidence = {
+            "timestamp": ts,
+            "sessionId": session_id,
+            "cropMeta": crop_meta,
+            "metaJson": str(meta_json),
+            "screenshotPng": str(screenshot_png),
+            "croppedPng": str(cropped_png),
+            "overlayPng": str(overlay_png),
+            "overlaySuccess": True,
+            "status": "captured",
+        }
+        evidence_file.write_text(json.dumps(evidence, indent=2))
+        self.state = {
+            **self.state,
+            "lastCaptureTime": ts,
+            "lastEvidencePath": str(evidence_file),
+            "lastSessionId": session_id,
+            "lastOverlaySuccess": True,
+        }
+        self.publish("evidenceCaptured", evidence)
+        return ack_ok(cmd_id, {
+            "evidencePath": str(evidence_file),
+            "screenshotPng": str(screenshot_png),
+            "croppedPng": str(cropped_png),
+            "overlayPng": str(overlay_png),
+            "metaJson": str(meta_json),
+            "evidence": evidence,
+        })
+
+    async def do_renderMultiPanelOverlay(self, cmd_id, payload):
+        from PIL import Image, ImageDraw
+
+        screenshot = payload.get("screenshotPng")
+        panels = payload.get("panels")
+        output_png = payload.get("outputPng")
+        output_json = payload.get("outputJson")
+        for key, value in (("screenshotPng", screenshot), ("outputPng", output_png), ("outputJson", output_json)):
+            if not isinstance(value, str) or not value:
+                return ack_fail(cmd_id, "invalid_payload", f"renderMultiPanelOverlay requires payload.{key}")
+        if not isinstance(panels, list):
+            return ack_fail(cmd_id, "invalid_payload", "renderMultiPanelOverlay requires payload.panels (List)")
+        if not Path(screenshot).exists():
+            return ack_fail(cmd_id, "not_found", f"screenshot not found: {screenshot}")
+        try:
+            img = Image.open(screenshot).convert("RGB")
+        except Exception:
+            return ack_fail(cmd_id, "decode_failed", f"Failed to decode PNG: {screenshot}")
+
+        window_meta = payload.get("windowMeta") if isinstance(payload.get("windowMeta"), dict) else {}
+        raw = window_meta.get("rawWindowFrame") if isinstance(window_meta.get("rawWindowFrame"), dict) else {}
+        wx, wy, _, _ = _rect(raw)
+        draw = ImageDraw.Draw(img)
+        painted = []
+        for p in panels:
+            if not isinstance(p, dict):
+                continue
+            x, y, w, h = _rect(p.get("frame"))
+            if w <= 0 or h <= 0:
+                continue
+            rect = [int(wx + x), int(wy + y), int(wx + x + w), int(wy + y + h)]
+            draw.rectangle(rect, outline=(255, 0, 0), width=3)
+            painted.append({"order": p.get("order"), "sessionId": p.get("sessionId"),
+                            "title": p.get("title"), "rect": rect})
+        Path(output_png).parent.mkdir(parents=True, exist_ok=True)
+        img.save(output_png)
+        Path(output_json).write_text(json.dumps({
+            "screenshot": screenshot,
+            "output": output_png,
+            "windowMeta": {"rawWindowFrame": raw},
+            "painted": painted,
+        }, indent=2))
+        return ack_ok(cmd_id, {"outputPng": output_png, "outputJson": output_json, "paintedCount": len(painted)})
+
+    async def handle(self, cmd):
+        try:
+            return await super().handle(cmd)
+        except Exception as e:
+            return ack_fail(cmd["id"], "verify_error", str(e))
+
+
+# --- server ---------------------------------------------------------------------
+
+
+class FakeDaemon:
+    """`await daemon.start()` then talk to ws://host:daemon.port."""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, latency=None, bridge=None, capture_backend="synthetic"):
+        self.host = host
+        self.port = port
+        self.latency = latency or Latency()
+        self.bridge = bridge or MockBridge()
+        self._clients = {}  # websocket -> subscribed sources
+        self._server = None
+        self.commands = 0
+        self.blocks = {}
+        for block in (EchoBlock(), ITerm2Block(self.bridge), WebRTCBlock(), VerifyBlock(capture_backend)):
+            block.init(self.publish)
+            self.blocks[block.name] = block
+
+    async def start(self):
+        self._server = await websockets.serve(self._handle_ws, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *_):
+        await self.stop()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def dump_state(self):
+        return {name: block.state for name, block in self.blocks.items()}
+
+    def publish(self, evt):
+        raw = encode(evt)
+        for ws, sources in list(self._clients.items()):
+            if evt["source"] in sources:
+                asyncio.ensure_future(self._send(ws, raw))
+
+    async def _send(self, ws, raw):
+        try:
+            await ws.send(raw)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _handle_ws(self, ws):
+        self._clients[ws] = set()
+        try:
+            async for raw in ws:
+                msg = decode(raw) if isinstance(raw, str) else None
+                if msg is None or not isinstance(msg.get("id"), str) or not isinstance(msg.get("target"), str):
+                    if isinstance(raw, str):
+                        await self._send(ws, encode(ack_fail("unknown", "decode_error", "invalid envelope")))
+                    continue
+                if msg.get("type") != "cmd":
+                    continue
+                asyncio.ensure_future(self._serve(ws, msg))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._clients.pop(ws, None)
+
+    async def _serve(self, ws, cmd):
+        self.commands += 1
+        delay = self.latency.seconds(cmd["target"], cmd.get("action"))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await self._send(ws, encode(await self.route(ws, cmd)))
+
+    async def route(self, ws, cmd):
+        target = cmd["target"]
+        action = cmd.get("action")
+        payload = cmd.get("payload") or {}
+        if target == "orchestrator" and action == "subscribe":
+            sources = payload.get("sources")
+            if not isinstance(sources, list):
+                return ack_fail(cmd["id"], "invalid_payload", "subscribe requires payload.sources: string[]")
+            subs = {s for s in sources if isinstance(s, str)}
+            if ws in self._clients:
+                self._clients[ws] = subs
+            return ack_ok(cmd["id"], {"sources": sorted(subs)})
+        if target == "orchestrator" and action == "getState":
+            return ack_ok(cmd["id"], {"state": self.dump_state()})
+        if target == "state":
+            if action == "get":
+                return ack_ok(cmd["id"], self.dump_state())
+            return ack_fail(cmd["id"], "unsupported_action", f"Action {action} not supported for target state")
+        block = self.blocks.get(target) or self.blocks.get(target.lower())
+        if block is None:
+            return ack_fail(cmd["id"], "unknown_target", f"No such block: {target}", {"target": target})
+        try:
+            return await block.handle(cmd)
+        except Exception as e:
+            return ack_fail(cmd["id"], "block_error", f"Block threw while handling {action}",
+                            {"target": target, "action": action, "error": str(e)})
+
+
+def parse_action_latency(items):
+    out = {}
+    for item in items or []:
+        name, _, ms = item.partition("=")
+        if "." not in name or not ms:
+            raise ValueError(f"bad --action-latency (want target.action=ms): {item}")
+        out[name.strip()] = float(ms)
+    return out
+
+
+async def run(args):
+    latency = Latency(args.latency_ms, args.jitter_ms, parse_action_latency(args.action_latency), args.seed)
+    daemon = FakeDaemon(args.host, args.port, latency, MockBridge(args.bridge), args.capture_backend)
+    await daemon.start()
+    print(f"[fake-daemon] listening on {daemon.url} (bridge={args.bridge}, "
+          f"latency={args.latency_ms:g}+0..{args.jitter_ms:g} ms)", flush=True)
+    try:
+        await asyncio.Future()
+    finally:
+        await daemon.stop()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Fake host_daemon WebSocket server backed by the *_mock.py bridge scripts")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=DEFAULT_PORT, help="Default: ITERMREMOTE_WS_PORT or 8766 (0 = any)")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="Base delay added to every command")
+    ap.add_argument("--jitter-ms", type=float, default=0.0, help="Extra uniform random delay, 0..N ms")
+    ap.add_argument("--action-latency", action="append", metavar="TARGET.ACTION=MS",
+                    help="Base delay for one action (repeatable)")
+    ap.add_argument("--bridge", choices=["inproc", "subprocess"], default="inproc",
+                    help="Run the mock bridge scripts in-process or one subprocess per call")
+    ap.add_argument("--capture-backend", default="synthetic", help="tools/screen_capture backend for verify")
+    ap.add_argument("--seed", type=int, default=None, help="Seed for the jitter")
+    args = ap.parse_args()
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"[fake-daemon] {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -18,15 +18,16 @@ from __future__ import annotations
 
 import asyncio
 import json
-import os
-import time
+import sys
 from dataclasses import dataclass, asdict
 from datetime import datetime
 from pathlib import Path
 
-import websockets
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts" / "python"))
 
-WS_URL = os.environ.get("ITERMREMOTE_WS_URL", "ws://127.0.0.1:8766")
+from itermremote_client import DEFAULT_WS_URL, DaemonClient  # noqa: E402
+
+WS_URL = DEFAULT_WS_URL
 OUTPUT_DIR = Path("/tmp/itermremote-e2e") / datetime.now().strftime("%Y%m%d-%H%M%S")
 PANEL_WAIT = 2.0  # Seconds to wait after panel switch
 LOOPBACK_WAIT = 3.0  # Seconds to collect loopback stats
@@ -68,57 +69,7 @@ class TestResult:
     error: str | None
 
 
-class WsClient:
-    """Simple WS client for host_daemon."""
-
-    def __init__(self, url: str):
-        self.url = url
-        self._ws = None
-        self._msg_id = 0
-
-    async def __aenter__(self):
-        self._ws = await websockets.connect(self.url)
-        return self
-
-    async def __aexit__(self, *_, **__):
-        if self._ws:
-            await self._ws.close()
-
-    async def call(self, target: str, action: str, payload: dict | None = None) -> dict:
-        """Send a command and wait for ACK."""
-        self._msg_id += 1
-        msg = {
-            "version": 1,
-            "type": "cmd",
-            "id": f"test-{self._msg_id}",
-            "target": target,
-            "action": action,
-            "payload": payload or {},
-        }
-        await self._ws.send(json.dumps(msg))
-        raw = await self._ws.recv()
-        resp = json.loads(raw)
-        if not resp.get("success"):
-            error = resp.get("error", {})
-            raise RuntimeError(f"{error.get('code', 'unknown')}: {error.get('message', 'unknown')}")
-        return resp.get("data", {})
-
-    async def subscribe(self, sources: set[str]):
-        """Subscribe to event sources."""
-        self._msg_id += 1
-        msg = {
-            "version": 1,
-            "type": "cmd",
-            "id": f"test-{self._msg_id}",
-            "target": "orchestrator",
-            "action": "subscribe",
-            "payload": {"sources": list(sources)},
-        }
-        await self._ws.send(json.dumps(msg))
-        await self._ws.recv()  # ACK
-
-
-async def list_panels(client: WsClient) -> list[PanelInfo]:
+async def list_panels(client: DaemonClient) -> list[PanelInfo]:
     """Get list of iTerm2 panels using iTerm2 Python API."""
     # Call the verify block's helper to get panels via iTerm2 API
     try:
@@ -133,7 +84,7 @@ async def list_panels(client: WsClient) -> list[PanelInfo]:
         return []
 
 
-async def test_panel(client: WsClient, panel: PanelInfo, output_dir: Path) -> TestResult:
+async def test_panel(client: DaemonClient, panel: PanelInfo, output_dir: Path) -> TestResult:
     """Test a single panel: activate, screenshot, loopback."""
     panel_dir = output_dir / panel.session_id
     panel_dir.mkdir(parents=True, exist_ok=True)
@@ -218,7 +169,7 @@ async def main() -> int:
     print(f"[E2E] Output dir: {OUTPUT_DIR}")
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    async with WsClient(WS_URL) as client:
+    async with DaemonClient(WS_URL) as client:
         # Subscribe to events
         await client.subscribe({"iterm2", "webrtc", "verify"})
 
@@ -236,13 +187,18 @@ async def main() -> int:
             print("[E2E] Testing basic blocks...")
 
             # Test each block
+            # All getState calls are in flight at once (acks are matched by id).
+            blocks = ["echo", "iterm2", "capture", "webrtc", "verify"]
+            states = await asyncio.gather(
+                *[client.call(block, "getState", {}) for block in blocks],
+                return_exceptions=True,
+            )
             results = {}
-            for block in ["echo", "iterm2", "capture", "webrtc", "verify"]:
-                try:
-                    data = await client.call(block, "getState", {})
+            for block, data in zip(blocks, states):
+                if isinstance(data, Exception):
+                    results[block] = {"ok": False, "error": str(data)}
+                else:
                     results[block] = {"ok": True, "state": data}
-                except Exception as e:
-                    results[block] = {"ok": False, "error": str(e)}
 
             summary = {"blocks": results, "timestamp": datetime.now().isoformat()}
             (OUTPUT_DIR / "summary.json").write_text(json.dumps(summary, indent=2))
@@ -1,33 +1,14 @@
 #!/usr/bin/env python3
 import argparse
+import asyncio
 import json
 import sys
 import time
 from pathlib import Path
 
-try:
-    import websockets
-except ImportError:
-    print("Missing dependency: websockets. Install via: pip3 install websockets", file=sys.stderr)
-    sys.exit(2)
-
-
-async def ws_cmd(ws, target, action, payload):
-    req_id = f"{target}.{action}.{int(time.time()*1000)}"
-    msg = {
-        "type": "cmd",
-        "version": 1,
-        "id": req_id,
-        "target": target,
-        "action": action,
-        "payload": payload,
-    }
-    await ws.send(json.dumps(msg))
-    while True:
-        raw = await ws.recv()
-        data = json.loads(raw)
-        if data.get("id") == req_id:
-            return data
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts" / "python"))
+
+from itermremote_client import DaemonClient  # noqa: E402
 
 
 def sort_panels_spatial(panels):
@@ -65,8 +46,8 @@ async def main():
 
     results = []
 
-    async with websockets.connect(args.ws_url) as ws:
-        list_ack = await ws_cmd(ws, "iterm2", "getSessions", {})
+    async with DaemonClient(args.ws_url) as client:
+        list_ack = await client.request("iterm2", "getSessions", {})
         if not list_ack.get("success"):
             raise RuntimeError(f"getSessions failed: {list_ack}")
         sessions = list_ack["data"]["sessions"]
@@ -77,14 +58,13 @@ async def main():
         first_title = panels[0].get("title", "")
         print(f"[0/{len(panels)}] capture base window screenshot via first panel: {first_title} {first_sid}")
 
-        base_act = await ws_cmd(ws, "iterm2", "activateSession", {"sessionId": first_sid})
+        base_act = await client.request("iterm2", "activateSession", {"sessionId": first_sid})
         if not base_act.get("success"):
             raise RuntimeError(f"activate failed: {base_act}")
         base_meta = base_act["data"]["meta"]
-        time.sleep(0.25)
+        await asyncio.sleep(0.25)
 
-        base_cap = await ws_cmd(
-            ws,
+        base_cap = await client.request(
             "verify",
             "captureEvidence",
             {
@@ -125,7 +105,7 @@ async def main():
         }
 
         # Ask verify block to render overlay. If not supported, we still proceed per-panel.
-        multi_ack = await ws_cmd(ws, "verify", "renderMultiPanelOverlay", overlay_payload)
+        multi_ack = await client.request("verify", "renderMultiPanelOverlay", overlay_payload)
         if not multi_ack.get("success"):
             print(f"WARN: renderMultiPanelOverlay not available: {multi_ack.get('error')}")
         else:
@@ -144,15 +124,14 @@ async def main():
                 "ts": int(time.time() * 1000),
             }
             try:
-                act = await ws_cmd(ws, "iterm2", "activateSession", {"sessionId": sid})
+                act = await client.request("iterm2", "activateSession", {"sessionId": sid})
                 if not act.get("success"):
                     raise RuntimeError(f"activate failed: {act}")
                 meta = act["data"]["meta"]
 
-                time.sleep(0.25)
+                await asyncio.sleep(0.25)
 
-                cap = await ws_cmd(
-                    ws,
+                cap = await client.request(
                     "verify",
                     "captureEvidence",
                     {
@@ -176,7 +155,7 @@ async def main():
                 )
                 print(f"  overlay={entry.get('overlayPng')}")
 
-                time.sleep(args.duration)
+                await asyncio.sleep(args.duration)
             except Exception as e:
                 entry["status"] = "error"
                 entry["error"] = str(e)
@@ -202,5 +181,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
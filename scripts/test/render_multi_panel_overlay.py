@@ -7,6 +7,8 @@
 #   <out_dir>/window_multi_overlay.json
 #
 # Uses iTerm2 Python API via scripts/python/iterm2_sources.py to get panels + frames.
+# The window is captured in memory (tools/screen_capture.py, backend from
+# ITERMREMOTE_CAPTURE_BACKEND); window.png is only written as an artifact.
 
 import json
 import subprocess
@@ -14,11 +16,14 @@ import sys
 from pathlib import Path
 
 try:
-    from PIL import Image, ImageDraw, ImageFont
+    from PIL import ImageDraw, ImageFont
 except ImportError:
     raise SystemExit("Missing Pillow. Install: pip3 install Pillow")
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+from screen_capture import capture_window  # noqa: E402
 
 out_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else REPO_ROOT / "build/verify_panel_switching/manual_overlay"
 out_dir.mkdir(parents=True, exist_ok=True)
@@ -56,9 +61,11 @@ if not cg:
     raise SystemExit("cgWindowId missing (activate_and_crop)")
 
 screenshot_path = out_dir / "window.png"
-subprocess.check_call(["/usr/sbin/screencapture", "-x", "-l", str(cg), str(screenshot_path)])
+# Keep the shadow, like `screencapture -l`: the box math below depends on it.
+capture = capture_window(int(cg), shadow=True)
+capture.save(screenshot_path)
 
-img = Image.open(screenshot_path).convert("RGBA")
+img = capture.to_image()
 draw = ImageDraw.Draw(img)
 
 # Load font
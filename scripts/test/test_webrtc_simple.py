@@ -3,33 +3,15 @@
 Simple WebRTC loopback test using cgWindowId from iTerm2 API.
 """
 import argparse
+import asyncio
 import json
 import sys
 import time
 from pathlib import Path
 
-try:
-    import websockets
-except ImportError:
-    print("Missing dependency: websockets. Install via: pip3 install websockets", file=sys.stderr)
-    sys.exit(2)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts" / "python"))
 
-async def ws_cmd(ws, target, action, payload):
-    req_id = f"{target}.{action}.{int(time.time()*1000)}"
-    msg = {
-        "type": "cmd",
-        "version": 1,
-        "id": req_id,
-        "target": target,
-        "action": action,
-        "payload": payload,
-    }
-    await ws.send(json.dumps(msg))
-    while True:
-        raw = await ws.recv()
-        data = json.loads(raw)
-        if data.get("id") == req_id:
-            return data
+from itermremote_client import DaemonClient  # noqa: E402
 
 async def main():
     parser = argparse.ArgumentParser()
@@ -44,9 +26,9 @@ async def main():
 
     results = []
 
-    async with websockets.connect(args.ws_url) as ws:
+    async with DaemonClient(args.ws_url) as client:
         # Get sessions
-        list_ack = await ws_cmd(ws, "iterm2", "getSessions", {})
+        list_ack = await client.request("iterm2", "getSessions", {})
         if not list_ack.get("success"):
             raise RuntimeError(f"getSessions failed: {list_ack}")
         sessions = list_ack["data"]["sessions"]
@@ -69,7 +51,7 @@ async def main():
         print(f"Testing panel: {title} ({sid})")
         
         # Activate and get crop metadata
-        act_ack = await ws_cmd(ws, "iterm2", "activateSession", {"sessionId": sid})
+        act_ack = await client.request("iterm2", "activateSession", {"sessionId": sid})
         if not act_ack.get("success"):
             print(f"ERROR: activateSession failed: {act_ack}")
             return
@@ -103,7 +85,7 @@ async def main():
         print(f"  cgWindowId: {cg_window_id}")
         
         # Start WebRTC loopback
-        start_ack = await ws_cmd(ws, "webrtc", "startLoopback", {
+        start_ack = await client.request("webrtc", "startLoopback", {
             "sourceType": "window",
             "sourceId": str(cg_window_id),
             "cropRect": crop_rect,
@@ -118,10 +100,10 @@ async def main():
         print(f"  ✓ Loopback started (fps={args.fps}, bitrate={args.bitrate}kbps)")
         
         # Wait for a few seconds
-        time.sleep(3)
+        await asyncio.sleep(3)
         
         # Get stats
-        stats_ack = await ws_cmd(ws, "webrtc", "getLoopbackStats", {})
+        stats_ack = await client.request("webrtc", "getLoopbackStats", {})
         if not stats_ack.get("success"):
             print(f"WARNING: getLoopbackStats failed: {stats_ack}")
         else:
@@ -129,7 +111,7 @@ async def main():
             print(f"  Stats: {json.dumps(stats, indent=2)}")
         
         # Stop loopback
-        stop_ack = await ws_cmd(ws, "webrtc", "stopLoopback", {})
+        stop_ack = await client.request("webrtc", "stopLoopback", {})
         if not stop_ack.get("success"):
             print(f"WARNING: stopLoopback failed: {stop_ack}")
         else:
@@ -156,5 +138,4 @@ async def main():
     print(f"\nSummary written to: {summary_file}")
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Round-trip checks for the bridge binary framing (scripts/python/bridge_framing.py).
+
+Encodes large session-text payloads as frames, decodes them back through the
+one-shot decoder, the incremental FrameDecoder (fed in random chunk sizes)
+and an asyncio StreamReader, and compares against the originals. Also reports
+frame size vs. the base64-in-JSON encoding.
+
+With --worker, additionally starts iterm2_worker.py with --framing binary and
+round-trips readSessionBuffer/sendText through it (needs an importable
+`iterm2` module, real or fake).
+
+Exit code is non-zero on any mismatch.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "python"))
+
+import bridge_framing  # noqa: E402
+from bridge_framing import FrameDecoder, Payload, decode_frame, encode_frame  # noqa: E402
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789 \t$#|-_=+éü中文\U0001f600"
+
+
+def make_text(rng, size):
+    lines = []
+    total = 0
+    while total < size:
+        n = rng.randint(0, 160)
+        line = "".join(rng.choice(ALPHABET) for _ in range(n))
+        lines.append(line)
+        total += len(line.encode("utf-8")) + 1
+    return "\n".join(lines)
+
+
+def check(name, ok, failures):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+
+def roundtrip_sizes(rng, sizes, failures):
+    for size in sizes:
+        text = make_text(rng, size)
+        raw = text.encode("utf-8")
+        obj = {
+            "id": 7,
+            "result": {
+                "text": Payload(raw),
+                "cursor": 1234,
+                "chunks": [Payload(raw[: len(raw) // 3]), {"nested": Payload(b"")}],
+            },
+        }
+        frame = encode_frame(obj)
+        line = bridge_framing.dumps_line(obj)
+        print(f"size={len(raw)} frame={len(frame)} json+b64={len(line)} "
+              f"saving={100.0 * (1 - len(frame) / len(line)):.1f}%")
+
+        out = decode_frame(frame)
+        res = out["result"]
+        check("one-shot text", bytes(res["text"]) == raw, failures)
+        check("one-shot chunks", bytes(res["chunks"][0]) == raw[: len(raw) // 3], failures)
+        check("one-shot empty payload", bytes(res["chunks"][1]["nested"]) == b"", failures)
+        check("one-shot scalars", out["id"] == 7 and res["cursor"] == 1234, failures)
+
+        # JSON mode must still carry the same bytes as base64.
+        decoded = json.loads(line)
+        check("json-mode base64", bridge_framing.text_of(decoded["result"]["text"]) == text, failures)
+
+        # Incremental decoder, three frames back to back, random chunking.
+        stream = frame + encode_frame({"id": 8, "result": None}) + frame
+        dec = FrameDecoder()
+        got = []
+        pos = 0
+        while pos < len(stream):
+            step = rng.randint(1, max(1, len(stream) // 7))
+            got.extend(dec.feed(stream[pos:pos + step]))
+            pos += step
+        check("incremental count", len(got) == 3 and dec.pending == 0, failures)
+        check("incremental text", all(bytes(g["result"]["text"]) == raw for g in (got[0], got[2])), failures)
+
+        async def via_reader():
+            reader = asyncio.StreamReader(limit=1 << 16)
+            reader.feed_data(stream)
+            reader.feed_eof()
+            frames = []
+            while True:
+                f = await bridge_framing.read_frame(reader)
+                if f is None:
+                    return frames
+                frames.append(f)
+
+        frames = asyncio.run(via_reader())
+        check("stream reader", len(frames) == 3 and bytes(frames[2]["result"]["text"]) == raw, failures)
+
+
+def corrupt_frames(failures):
+    frame = encode_frame({"text": Payload(b"hello")})
+    bad = [
+        ("truncated", frame[:-1]),
+        ("bad reference", frame.replace(b"[0, 5]", b"[3, 9]")),
+    ]
+    for name, data in bad:
+        try:
+            decode_frame(data)
+            check(f"rejects {name}", False, failures)
+        except bridge_framing.FramingError:
+            check(f"rejects {name}", True, failures)
+    try:
+        FrameDecoder(max_frame=16).feed(frame)
+        check("rejects oversized", False, failures)
+    except bridge_framing.FramingError:
+        check("rejects oversized", True, failures)
+
+
+def worker_roundtrip(rng, session_id, failures):
+    worker = REPO_ROOT / "scripts" / "python" / "iterm2_worker.py"
+    proc = subprocess.Popen(
+        [sys.executable, str(worker), "--framing", "binary"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    paste = make_text(rng, 256 * 1024)
+    reqs = [
+        {"id": 1, "op": "readSessionBuffer", "args": {"sessionId": session_id, "maxBytes": 1 << 20}},
+        {"id": 2, "op": "sendText", "args": {"sessionId": session_id, "text": Payload(paste)}},
+    ]
+    out, _ = proc.communicate(b"".join(encode_frame(r) for r in reqs), timeout=30)
+    replies = {f.get("id"): f for f in FrameDecoder().feed(out)}
+    ready = replies.get(None, {})
+    check("worker ready", ready.get("event") == "ready", failures)
+    text = replies.get(1, {}).get("result", {}).get("text")
+    check("worker readSessionBuffer raw payload", isinstance(text, memoryview), failures)
+    sent = replies.get(2, {}).get("result", {})
+    check("worker sendText payload", sent.get("ok") is True, failures)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Round-trip bridge binary framing")
+    ap.add_argument("--sizes", default="0,1,65536,1048576,16777216",
+                    help="Comma-separated UTF-8 payload sizes in bytes")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--worker", action="store_true", help="Also round-trip through iterm2_worker.py")
+    ap.add_argument("--session-id", default="A", help="Session used with --worker")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    failures = []
+    roundtrip_sizes(rng, [int(s) for s in args.sizes.split(",") if s.strip()], failures)
+    corrupt_frames(failures)
+    if args.worker:
+        worker_roundtrip(rng, args.session_id, failures)
+
+    if failures:
+        print(f"FAILED: {len(failures)} check(s): {', '.join(failures)}")
+        return 1
+    print("All framing round-trips passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
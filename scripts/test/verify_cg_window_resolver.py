@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Checks for scripts/python/cg_window_resolver.py using FakeWindowProvider.
+
+Runs anywhere (no Quartz needed). Exit code is non-zero on any failure.
+"""
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "python"))
+
+from cg_window_resolver import CGWindowResolver, FakeWindowProvider, score_candidates  # noqa: E402
+
+SCREEN_H = 1117.0
+
+WINDOWS = [
+    {"id": 900, "owner": "Finder", "pid": 1, "title": "", "layer": 0, "x": 0, "y": 25, "w": 800, "h": 600},
+    {"id": 101, "owner": "iTerm2", "pid": 2, "title": "a", "layer": 0, "x": 0, "y": 25, "w": 800, "h": 600},
+    {"id": 102, "owner": "iTerm2", "pid": 2, "title": "b", "layer": 0, "x": 820, "y": 40, "w": 800, "h": 600},
+    {"id": 103, "owner": "iTerm2", "pid": 2, "title": "", "layer": 25, "x": 0, "y": 0, "w": 1728, "h": 25},
+]
+
+
+def check(name, ok, failures):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+
+def main():
+    failures = []
+    provider = FakeWindowProvider(WINDOWS, screen_height=SCREEN_H)
+    r = CGWindowResolver(provider)
+
+    check("exact frame", r.resolve(1, {"x": 0, "y": 25, "w": 800, "h": 600}) == 101, failures)
+    check("second window", r.resolve(2, {"x": 820, "y": 40, "w": 800, "h": 600}) == 102, failures)
+
+    calls = provider.calls
+    r.resolve(1, {"x": 0, "y": 25, "w": 800, "h": 600})
+    r.resolve(2, {"x": 820.2, "y": 40, "w": 800, "h": 600})
+    check("cache hit does not list windows", provider.calls == calls, failures)
+
+    # Cocoa frame (origin bottom-left) of window 102.
+    cocoa_y = SCREEN_H - 40 - 600
+    r2 = CGWindowResolver(FakeWindowProvider(WINDOWS, screen_height=SCREEN_H))
+    check("flipped Y", r2.resolve(7, {"x": 820, "y": cocoa_y, "w": 800, "h": 600}) == 102, failures)
+
+    # Title-bar / menu-bar offset in Y only.
+    r3 = CGWindowResolver(FakeWindowProvider(WINDOWS))
+    check("Y offset", r3.resolve(8, {"x": 822, "y": 0, "w": 800, "h": 578}) == 102, failures)
+
+    # Frame change re-queries and follows the window.
+    provider.windows[2]["x"] = 300
+    calls = provider.calls
+    check("moved window", r.resolve(2, {"x": 300, "y": 40, "w": 800, "h": 600}) == 102, failures)
+    check("frame change re-queries", provider.calls == calls + 1, failures)
+
+    # Nothing resembling the frame.
+    check("rejects far frame", r.resolve(3, {"x": 3000, "y": 2000, "w": 200, "h": 100}) is None, failures)
+    check("no frame -> frontmost", r.resolve(3) == 101, failures)
+
+    # Window closed: cached id is dropped on the next list.
+    provider.windows = [w for w in provider.windows if w["id"] != 101]
+    r.resolve(9, {"x": 300, "y": 40, "w": 800, "h": 600})
+    check("stale id evicted", 1 not in r._cache, failures)
+
+    # Ignores other owners and non-zero layers.
+    only_finder = CGWindowResolver(FakeWindowProvider([WINDOWS[0], WINDOWS[3]]))
+    check("owner/layer filter", only_finder.resolve(1, {"x": 0, "y": 25, "w": 800, "h": 600}) is None, failures)
+
+    # Scores: exact match is 0; Y matches in either orientation at Y_WEIGHT.
+    frame = {"x": 10, "y": 30, "w": 790, "h": 610}
+    exact = dict(WINDOWS[1], x=10, y=30, w=790, h=610)
+    flipped = dict(exact, y=SCREEN_H - 30 - 610)
+    shifted = dict(exact, y=40)
+    scores = score_candidates([exact, flipped, shifted], frame, SCREEN_H)
+    check("scores", scores == [0.0, 0.0, 5.0], failures)
+
+    if failures:
+        print(f"FAILED: {len(failures)} check(s)")
+        return 1
+    print("All resolver checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Checks for scripts/test/fake_host_daemon.py, driven through
+scripts/python/itermremote_client on an ephemeral port.
+
+Needs websockets (and numpy + Pillow for the verify block). Exit code is
+non-zero on any failure.
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "python"))
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "test"))
+
+from fake_host_daemon import FakeDaemon, Latency, MockBridge  # noqa: E402
+from itermremote_client import DaemonClient  # noqa: E402
+
+
+def check(name, ok, failures):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+
+async def check_iterm2(client, other, failures):
+    sessions = (await client.call("iterm2", "getSessions"))["sessions"]
+    check("getSessions lists mock panels", [s["id"] for s in sessions] == ["session-1", "session-2"], failures)
+
+    events = await client.subscribe({"iterm2"})
+    quiet = other.events()
+    meta = (await client.call("iterm2", "activateSession", {"sessionId": "session-2"}))["meta"]
+    check("activateSession meta", meta.get("cgWindowId") == 4242 and meta["frame"]["x"] == 400.0, failures)
+    evt = await events.get(timeout=1.0)
+    check("activated event to subscriber", evt["event"] == "activated" and evt["payload"]["sessionId"] == "session-2",
+          failures)
+    await asyncio.sleep(0.05)
+    check("no event without subscribe", quiet.queue.empty(), failures)
+
+    ack = await client.request("iterm2", "activateSession", {})
+    check("invalid payload code", (ack.get("error") or {}).get("code") == "invalid_payload", failures)
+
+    sent = await client.call("iterm2", "sendText", {"sessionId": "session-1", "text": "ls\n"})
+    text = (await client.call("iterm2", "readSessionBuffer", {"sessionId": "session-1"}))["text"]
+    check("sendText / readSessionBuffer", sent == {"ok": True} and "session-1" in text, failures)
+
+
+async def check_webrtc(client, failures):
+    ack = await client.request("webrtc", "createOffer")
+    check("createOffer before start is not_ready", ack["error"]["code"] == "not_ready", failures)
+    state = await client.call("webrtc", "startLoopback", {"sourceType": "window", "sourceId": 4242, "fps": 60})
+    check("startLoopback state", state["loopbackActive"] and state["loopbackFps"] == 60, failures)
+    offer = await client.call("webrtc", "createOffer")
+    check("offer SDP", offer["type"] == "offer" and offer["sdp"].startswith("v=0") and "H264" in offer["sdp"], failures)
+    await client.call("webrtc", "setRemoteDescription", {"type": "answer", "sdp": offer["sdp"]})
+    await client.call("webrtc", "addIceCandidate", {"candidate": "candidate:1 1 udp 1 127.0.0.1 9 typ host",
+                                                    "sdpMid": "0", "sdpMLineIndex": 0})
+    await asyncio.sleep(0.1)
+    stats = (await client.call("webrtc", "getLoopbackStats"))["stats"]
+    check("loopback frame counter", stats["frameCount"] > 0 and stats["targetFps"] == 60, failures)
+    state = await client.call("webrtc", "stopLoopback")
+    check("stopLoopback", state["loopbackActive"] is False, failures)
+
+
+async def check_verify(client, failures):
+    try:
+        import numpy as np
+        from PIL import Image
+    except ImportError:
+        print("  skip verify block (numpy / Pillow missing)")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        meta = (await client.call("iterm2", "activateSession", {"sessionId": "session-1"}))["meta"]
+        data = await client.call("verify", "captureEvidence", {"evidenceDir": tmp, "cropMeta": meta})
+        files = [data[k] for k in ("screenshotPng", "croppedPng", "overlayPng", "metaJson", "evidencePath")]
+        check("captureEvidence writes files", all(Path(f).exists() for f in files), failures)
+        cropped = np.asarray(Image.open(data["croppedPng"]))
+        frame = meta["frame"]
+        check("cropped PNG is the panel frame", cropped.shape[:2] == (int(frame["h"]), int(frame["w"])), failures)
+        screen = np.asarray(Image.open(data["screenshotPng"]).convert("RGB"))
+        overlay = np.asarray(Image.open(data["overlayPng"]).convert("RGB"))
+        check("overlay draws the crop box", screen.shape == overlay.shape and (screen != overlay).any(), failures)
+        out = await client.call("verify", "renderMultiPanelOverlay", {
+            "screenshotPng": data["screenshotPng"],
+            "windowMeta": {"rawWindowFrame": meta["rawWindowFrame"]},
+            "panels": [{"order": 1, "frame": meta["frame"]}],
+            "outputPng": str(Path(tmp) / "multi.png"),
+            "outputJson": str(Path(tmp) / "multi.json"),
+        })
+        check("renderMultiPanelOverlay", out["paintedCount"] == 1 and Path(out["outputPng"]).exists(), failures)
+
+
+async def run(failures):
+    latency = Latency(per_action={"echo.echo": 150.0})
+    async with FakeDaemon(port=0, latency=latency) as daemon:
+        async with DaemonClient(daemon.url, timeout=5.0) as client, DaemonClient(daemon.url) as other:
+            t0 = time.perf_counter()
+            data = await client.call("echo", "echo", {"x": 1})
+            elapsed = time.perf_counter() - t0
+            check("echo", data == {"echo": {"x": 1}}, failures)
+            check("injected action latency", 0.15 <= elapsed < 1.0, failures)
+
+            ack = await client.request("nope", "x")
+            check("unknown target", ack["error"]["code"] == "unknown_target", failures)
+            state = (await client.call("orchestrator", "getState"))["state"]
+            check("orchestrator getState", set(state) == {"echo", "iterm2", "webrtc", "verify"}, failures)
+
+            await check_iterm2(client, other, failures)
+            await check_webrtc(client, failures)
+            await check_verify(client, failures)
+
+    async with FakeDaemon(port=0, bridge=MockBridge("subprocess")) as daemon:
+        async with DaemonClient(daemon.url, timeout=10.0) as client:
+            sessions = (await client.call("iterm2", "getSessions"))["sessions"]
+            meta = (await client.call("iterm2", "activateSession", {"sessionId": "session-1"}))["meta"]
+            check("subprocess bridge", len(sessions) == 2 and meta["sessionId"] == "session-1", failures)
+
+
+def main():
+    failures = []
+    asyncio.run(run(failures))
+    if failures:
+        print(f"FAILED: {len(failures)} check(s)")
+        return 1
+    print("All fake daemon checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Checks for scripts/python/itermremote_client against an in-process WebSocket
+server that acks out of order, interleaves events and never acks one action.
+
+Needs only `websockets` (no daemon). Exit code is non-zero on any failure.
+"""
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "python"))
+
+import websockets  # noqa: E402
+
+from itermremote_client import CommandError, CommandTimeout, DaemonClient  # noqa: E402
+
+
+async def fake_daemon(ws):
+    async for raw in ws:
+        cmd = json.loads(raw)
+        asyncio.ensure_future(answer(ws, cmd))
+
+
+async def answer(ws, cmd):
+    action = cmd["action"]
+    payload = cmd.get("payload") or {}
+    if action == "never":
+        return
+    # An event for another source before every ack.
+    await ws.send(json.dumps({"version": 1, "type": "evt", "source": "noise", "event": "tick", "ts": 0}))
+    if action == "sleep":
+        await asyncio.sleep(payload.get("ms", 0) / 1000.0)
+    if action == "fail":
+        ack = {"version": 1, "type": "ack", "id": cmd["id"], "success": False,
+               "error": {"code": "bad", "message": "nope"}}
+    else:
+        ack = {"version": 1, "type": "ack", "id": cmd["id"], "success": True, "data": {"echo": payload}}
+    if action == "emit":
+        await ws.send(json.dumps({"version": 1, "type": "evt", "source": payload["source"],
+                                  "event": "emitted", "ts": 1, "payload": payload}))
+    await ws.send(json.dumps(ack))
+
+
+def check(name, ok, failures):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+
+async def run(failures):
+    async with websockets.serve(fake_daemon, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        async with DaemonClient(f"ws://127.0.0.1:{port}", timeout=2.0) as client:
+            data = await client.call("echo", "echo", {"x": 1})
+            check("call returns data", data == {"echo": {"x": 1}}, failures)
+
+            # Concurrent in-flight commands acked out of order.
+            t0 = time.perf_counter()
+            results = await asyncio.gather(*[
+                client.call("t", "sleep", {"ms": ms}) for ms in (300, 100, 200, 0)
+            ])
+            elapsed = time.perf_counter() - t0
+            check("out-of-order acks matched", [r["echo"]["ms"] for r in results] == [300, 100, 200, 0], failures)
+            check("commands overlap", elapsed < 0.55, failures)
+
+            try:
+                await client.call("t", "fail")
+                check("failure raises CommandError", False, failures)
+            except CommandError as e:
+                check("failure raises CommandError", e.code == "bad", failures)
+
+            ack = await client.request("t", "fail")
+            check("request returns failed ack", ack.get("success") is False, failures)
+
+            try:
+                await client.call("t", "never", timeout=0.2)
+                check("per-command timeout", False, failures)
+            except CommandTimeout:
+                check("per-command timeout", client.in_flight == 0, failures)
+
+            webrtc = client.events({"webrtc"})
+            everything = client.events()
+            await client.call("t", "emit", {"source": "webrtc"})
+            evt = await webrtc.get(timeout=1.0)
+            check("event routed by source", evt["source"] == "webrtc" and evt["event"] == "emitted", failures)
+            check("other sources filtered", webrtc.queue.empty(), failures)
+            seen = []
+            while not everything.queue.empty():
+                seen.append(everything.queue.get_nowait()["source"])
+            check("wildcard queue gets all", "webrtc" in seen and "noise" in seen, failures)
+
+            small = client.events({"noise"}, maxsize=2)
+            for _ in range(5):
+                await client.call("t", "echo")
+            check("bounded queue drops oldest", small.queue.qsize() == 2 and small.dropped == 3, failures)
+
+        # After close, subscribed queues end with None.
+        items = []
+        while not everything.queue.empty():
+            items.append(everything.queue.get_nowait())
+        check("queue ends on close", items[-1:] == [None], failures)
+
+
+def main():
+    failures = []
+    asyncio.run(run(failures))
+    if failures:
+        print(f"FAILED: {len(failures)} check(s)")
+        return 1
+    print("All client checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
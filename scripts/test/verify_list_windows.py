@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Checks for tools/list_windows.py, run as a subprocess with --provider mock
+on a fixture window list.
+
+Runs anywhere (no Quartz or swiftc needed). Exit code is non-zero on any
+failure.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+TOOL = REPO_ROOT / "tools" / "list_windows.py"
+
+WINDOWS = [
+    {"id": 900, "owner": "Finder", "pid": 1, "title": "", "layer": 0, "x": 0, "y": 25, "w": 800, "h": 600},
+    {"id": 101, "owner": "iTerm2", "pid": 2, "title": "zsh", "layer": 0, "x": 0, "y": 25, "w": 800, "h": 600},
+    {"id": 102, "owner": "iTerm2", "pid": 2, "title": "vim", "layer": 0, "x": 820.5, "y": 40, "w": 800, "h": 600},
+    {"id": 103, "owner": "iTerm2", "pid": 2, "title": "", "layer": 25, "x": 0, "y": 0, "w": 1728, "h": 25},
+    {"id": 104, "owner": "itermremote_host", "pid": 3, "title": "Host", "layer": 0, "x": 10, "y": 10, "w": 400,
+     "h": 300},
+]
+
+
+def check(name, ok, failures):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+
+def run_tool(*argv, env=None):
+    return subprocess.run([sys.executable, str(TOOL), "--provider", "mock", *argv],
+                          capture_output=True, text=True, env=env)
+
+
+def main():
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = Path(tmp) / "windows.json"
+        fixture.write_text(json.dumps({"windows": WINDOWS, "screenHeight": 1117}))
+
+        proc = run_tool("--mock", str(fixture), "--json")
+        check("exit code", proc.returncode == 0, failures)
+        windows = json.loads(proc.stdout or "[]")
+        check("owner and layer filter", [w["windowNumber"] for w in windows] == [101, 102, 104], failures)
+        check("fields", all(set(w) == {"windowNumber", "owner", "name", "bounds"} for w in windows), failures)
+        first = windows[0] if windows else {}
+        check("first window", first.get("owner") == "iTerm2" and first.get("name") == "zsh", failures)
+        check("bounds", first.get("bounds") == {"Height": 600, "Width": 800, "X": 0, "Y": 25}, failures)
+        check("fractional bounds kept", len(windows) > 1 and windows[1]["bounds"]["X"] == 820.5, failures)
+
+        proc = run_tool("--mock", str(fixture), "--json", "--all")
+        check("--all skips the owner filter",
+              [w["windowNumber"] for w in json.loads(proc.stdout or "[]")] == [900, 101, 102, 104], failures)
+
+        proc = run_tool("--mock", str(fixture))
+        lines = proc.stdout.splitlines()
+        check("text output", len(lines) == 3 and lines[0].split("\t")[:3] == ["101", "iTerm2", "zsh"], failures)
+
+        # A bare list works too, and ITERMREMOTE_WINDOWS_MOCK stands in for --mock.
+        bare = Path(tmp) / "bare.json"
+        bare.write_text(json.dumps(WINDOWS[:2]))
+        proc = run_tool("--json", env=dict(os.environ, ITERMREMOTE_WINDOWS_MOCK=str(bare)))
+        check("mock from env", [w["windowNumber"] for w in json.loads(proc.stdout or "[]")] == [101], failures)
+
+        env = {k: v for k, v in os.environ.items() if k != "ITERMREMOTE_WINDOWS_MOCK"}
+        proc = run_tool(env=env)
+        check("mock without a file fails", proc.returncode == 1 and "needs --mock" in proc.stderr, failures)
+
+    if failures:
+        print(f"FAILED: {len(failures)} check(s)")
+        return 1
+    print("All list_windows checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Checks for tools/screen_capture.py using SyntheticBackend.
+
+Runs anywhere (no Quartz / screencapture needed). Exit code is non-zero on
+any failure.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+from screen_capture import Capture, CaptureError, SyntheticBackend, get_backend  # noqa: E402
+
+
+def check(name, ok, failures):
+    print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not ok:
+        failures.append(name)
+
+
+def main():
+    failures = []
+    backend = SyntheticBackend(windows={42: (100, 50, 300, 200)}, seed=3)
+    screen = backend.screen
+    ref = Image.fromarray(screen)
+
+    full = backend.capture_screen()
+    check("screen size", full.size == (screen.shape[1], screen.shape[0]), failures)
+
+    box = (10, 20, 110, 70)
+    view = full.crop(box)
+    check("crop is a view", np.shares_memory(view.pixels, screen), failures)
+    check("crop origin", view.origin == (10, 20), failures)
+    check("to_image matches PIL crop", np.array_equal(np.asarray(view.to_image()), np.asarray(ref.crop(box))), failures)
+    check(
+        "gray matches PIL L",
+        np.allclose(view.gray(), np.asarray(ref.crop(box).convert("L"), dtype=np.float32), atol=1.0),
+        failures,
+    )
+
+    nested = view.crop((5, 5, 50, 30))
+    check("nested crop origin", nested.origin == (15, 25), failures)
+    check("clamped crop", full.crop((-10, -10, 5, 5)).size == (5, 5), failures)
+
+    # Quartz hands out BGRA rows; the same pixels must come out as RGBA.
+    bgra = Capture(np.ascontiguousarray(screen[:, :, [2, 1, 0, 3]]), "BGRA")
+    bview = bgra.crop(box)
+    check("BGRA to_image", np.array_equal(np.asarray(bview.to_image()), np.asarray(ref.crop(box))), failures)
+    check("BGRA rgb view", np.array_equal(bview.rgb(), np.asarray(ref.crop(box))[:, :, :3]), failures)
+
+    win = backend.capture_window(42)
+    check("window size", win.size == (300, 200), failures)
+    check("window is a view", np.shares_memory(win.pixels, screen), failures)
+    try:
+        backend.capture_window(7)
+        check("unknown window raises", False, failures)
+    except CaptureError:
+        check("unknown window raises", True, failures)
+
+    check("backend by name", get_backend("synthetic").name == "synthetic", failures)
+
+    if failures:
+        print(f"FAILED: {len(failures)} check(s)")
+        return 1
+    print("All screen capture checks passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,28 +21,9 @@ import sys
 import time
 from pathlib import Path
 
-try:
-    import websockets
-except ImportError:
-    print("Missing dependency: websockets. Install via: pip3 install websockets", file=sys.stderr)
-    sys.exit(2)
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "scripts" / "python"))
 
-async def ws_cmd(ws, target, action, payload):
-    req_id = f"{target}.{action}.{int(time.time()*1000)}"
-    msg = {
-        "type": "cmd",
-        "version": 1,
-        "id": req_id,
-        "target": target,
-        "action": action,
-        "payload": payload,
-    }
-    await ws.send(json.dumps(msg))
-    while True:
-        raw = await ws.recv()
-        data = json.loads(raw)
-        if data.get("id") == req_id:
-            return data
+from itermremote_client import DaemonClient  # noqa: E402
 
 def sort_panels_spatial(panels):
     # row-major: top-to-bottom, left-to-right
@@ -105,12 +86,12 @@ async def main():
 
     results = []
 
-    async with websockets.connect(args.ws_url) as ws:
+    async with DaemonClient(args.ws_url) as client:
         print(f"Connected to {args.ws_url}")
         
         # Step 1: Get sessions
         print("\n[1/2] Getting iTerm2 sessions...")
-        list_ack = await ws_cmd(ws, "iterm2", "getSessions", {})
+        list_ack = await client.request("iterm2", "getSessions", {})
         if not list_ack.get("success"):
             raise RuntimeError(f"getSessions failed: {list_ack}")
         sessions = list_ack["data"]["sessions"]
@@ -136,7 +117,7 @@ async def main():
             try:
                 # Activate session
                 print(f"  - Activating session...")
-                act = await ws_cmd(ws, "iterm2", "activateSession", {"sessionId": sid})
+                act = await client.request("iterm2", "activateSession", {"sessionId": sid})
                 if not act.get("success"):
                     raise RuntimeError(f"activate failed: {act}")
                 meta = act["data"]["meta"]
@@ -151,7 +132,7 @@ async def main():
                 
                 # Start WebRTC loopback
                 print(f"  - Starting WebRTC loopback (fps={args.fps}, bitrate={args.bitrate_kbps}kbps)...")
-                loopback_ack = await ws_cmd(ws, "webrtc", "startLoopback", {
+                loopback_ack = await client.request("webrtc", "startLoopback", {
                     "sourceType": "desktop",
                     "sourceId": meta.get("cgWindowId"),
                     "cropRect": cropRect,
@@ -172,7 +153,7 @@ async def main():
                 
                 # Capture evidence
                 print(f"  - Capturing evidence...")
-                cap = await ws_cmd(ws, "verify", "captureEvidence", {
+                cap = await client.request("verify", "captureEvidence", {
                     "evidenceDir": str(out_dir),
                     "sessionId": sid,
                     "cropMeta": meta,
@@ -187,7 +168,7 @@ async def main():
                     print(f"  - Evidence saved: {entry.get('overlayPng')}")
                 
                 # Get loopback stats
-                stats_ack = await ws_cmd(ws, "webrtc", "getLoopbackStats", {})
+                stats_ack = await client.request("webrtc", "getLoopbackStats", {})
                 if stats_ack.get("success"):
                     entry["loopbackStats"] = stats_ack.get("data", {}).get("stats", {})
                     print(f"  - Stats: {entry.get('loopbackStats')}")
@@ -199,7 +180,7 @@ async def main():
                 
                 # Stop loopback
                 print(f"  - Stopping loopback...")
-                stop_ack = await ws_cmd(ws, "webrtc", "stopLoopback", {})
+                stop_ack = await client.request("webrtc", "stopLoopback", {})
                 if not stop_ack.get("success"):
                     print(f"  - WARNING: stopLoopback failed: {stop_ack.get('error')}")
                 
@@ -212,7 +193,7 @@ async def main():
                 
                 # Try to stop loopback on error
                 try:
-                    await ws_cmd(ws, "webrtc", "stopLoopback", {})
+                    await client.request("webrtc", "stopLoopback", {})
                 except:
                     pass
             
@@ -2,22 +2,18 @@
 """
 Capture iTerm2 panel screenshot:
 - Activate panel via python bridge
-- Take full screenshot with screencapture
-- Crop according to panel frame (relative to window)
+- Capture only the panel's window (cgWindowId from the bridge) in memory,
+  falling back to a full screenshot when there is no usable window capture
+- Crop according to panel frame (relative to window); crops are views
 """
 
 import argparse
 import subprocess
 import sys
-import tempfile
-import os
 from pathlib import Path
 
-try:
-    from PIL import Image, ImageFilter
-except ImportError:
-    print("PIL not found: pip3 install Pillow", file=sys.stderr)
-    sys.exit(1)
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import screen_capture  # noqa: E402
 
 def activate_panel(session_id):
     """Run iterm2_activate_and_crop.py and return JSON."""
@@ -29,10 +25,34 @@ def activate_panel(session_id):
     import json
     return json.loads(proc.stdout)
 
-def capture_full_screen(out_path):
-    """Capture full screen using screencapture."""
-    subprocess.run(["/usr/sbin/screencapture", "-x", out_path], check=True)
-    return Image.open(out_path)
+def capture_full_screen(backend=None):
+    """Capture the main display; returns a screen_capture.Capture."""
+    return screen_capture.capture_screen(backend)
+
+# A window capture whose aspect ratio differs from rawWindowFrame by more than
+# this is not the window we asked for (or includes a shadow); use the screen.
+WINDOW_ASPECT_TOLERANCE = 0.05
+
+def capture_window_image(meta, backend=None):
+    """Window-only capture for meta["cgWindowId"], or None if unusable."""
+    cg = meta.get("cgWindowId")
+    if not cg:
+        return None
+    try:
+        img = screen_capture.capture_window(int(cg), shadow=False, backend=backend)
+    except screen_capture.CaptureError as e:
+        print(f"window capture failed, using full screen: {e}", file=sys.stderr)
+        return None
+    rwf = meta.get("rawWindowFrame") or {}
+    iw, ih = img.size
+    rw = float(rwf.get("w", 0))
+    rh = float(rwf.get("h", 0))
+    if iw <= 0 or ih <= 0 or rw <= 0 or rh <= 0:
+        return None
+    if abs((iw / ih) / (rw / rh) - 1.0) > WINDOW_ASPECT_TOLERANCE:
+        print(f"window capture {iw}x{ih} does not match rawWindowFrame {rwf}, using full screen", file=sys.stderr)
+        return None
+    return img
 
 def crop_panel_from_full(full_img, meta):
     """
@@ -42,8 +62,6 @@ def crop_panel_from_full(full_img, meta):
       - frame: panel bounds (in window coords)
       - rawWindowFrame: actual window screen bounds
     """
-    wf = meta["windowFrame"]
-    pf = meta["frame"]
     rwf = meta["rawWindowFrame"]
 
     # Normalize coordinates to full image space.
@@ -61,6 +79,18 @@ def crop_panel_from_full(full_img, meta):
     # Extract window from full image.
     # Note: full image may be larger (multi-monitor). We'll assume window is within.
     window_img = full_img.crop((wx, wy, wx + ww, wy + wh))
+    return crop_panel_from_window(window_img, meta, ww, wh)
+
+def crop_panel_from_window(window_img, meta, ww=None, wh=None):
+    """
+    Crop the panel out of an image of the whole window.
+    ww/wh are the window size in image pixels (default: the image size, as
+    for a window-only capture at any backing scale).
+    """
+    wf = meta["windowFrame"]
+    pf = meta["frame"]
+    if ww is None or wh is None:
+        ww, wh = window_img.size
 
     # Now crop panel from window image using windowFrame (normalized to window size).
     # windowFrame is the layout bounds of the window content (may be slightly smaller than raw).
@@ -106,6 +136,13 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("session_id", help="iTerm2 session ID")
     parser.add_argument("--out", default="/tmp/panel.png", help="Output path")
+    parser.add_argument("--backend", default=None, help="Capture backend: auto, quartz, screencapture, synthetic")
+    parser.add_argument(
+        "--mode",
+        choices=["auto", "window", "screen"],
+        default="auto",
+        help="auto: window-only capture with full-screen fallback",
+    )
     args = parser.parse_args()
 
     meta = activate_panel(args.session_id)
@@ -113,22 +150,26 @@ def main():
     import time
     time.sleep(0.2)
 
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-        tmp_path = tmp.name
-
-    try:
-        out_path = Path(args.out)
-        out_path.parent.mkdir(parents=True, exist_ok=True)
-
-        full_img = capture_full_screen(tmp_path)
-        panel_img = crop_panel_from_full(full_img, meta)
-        panel_img.save(str(out_path))
-        print(f"Saved: {args.out}")
-        print(f"Window frame: {meta['windowFrame']}")
-        print(f"Panel frame: {meta['frame']}")
-        print(f"Raw window frame: {meta['rawWindowFrame']}")
-    finally:
-        os.unlink(tmp_path)
+    out_path = Path(args.out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    backend = screen_capture.get_backend(args.backend)
+    window_img = capture_window_image(meta, backend) if args.mode in ("auto", "window") else None
+    if window_img is not None:
+        captured = window_img
+        panel_img = crop_panel_from_window(window_img, meta)
+    elif args.mode == "window":
+        print("window capture unavailable", file=sys.stderr)
+        sys.exit(1)
+    else:
+        captured = capture_full_screen(backend)
+        panel_img = crop_panel_from_full(captured, meta)
+    panel_img.save(str(out_path))
+    print(f"Saved: {args.out}")
+    print(f"Capture: {'window' if window_img is not None else 'screen'} {captured.size[0]}x{captured.size[1]} ({captured.nbytes} bytes)")
+    print(f"Window frame: {meta['windowFrame']}")
+    print(f"Panel frame: {meta['frame']}")
+    print(f"Raw window frame: {meta['rawWindowFrame']}")
 
 if __name__ == "__main__":
     main()
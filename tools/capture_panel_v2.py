@@ -13,21 +13,44 @@ Key difference from v1:
 
 This avoids coordinate space mismatch between Cocoa window coords and screencapture PNG.
 
+The screenshot is taken in memory via screen_capture.py (--backend); the
+template, search region and panel are views into it, not re-decoded copies.
+
+Matching uses the FFT + summed-area-table NCC in image_match.py, run
+coarse-to-fine: the full search happens on a 1/2**levels downsampled
+pyramid and each finer level only refines a few pixels around the previous
+best. The score at every level is written to the .meta.json.
+
+The matched rect, score and a template hash are kept per CGWindowID in a
+small JSON cache (--locate-cache). The next run first searches only a few
+pixels around the cached rect and falls back to the wide search when the
+template hash differs (title bar/tabs changed) or that score is below
+--prior-threshold.
+
 Requires: Pillow, numpy
 """
 
 import argparse
+import hashlib
 import json
 import os
 import subprocess
 import sys
-import tempfile
 import time
 from pathlib import Path
 from typing import Optional
 
 import numpy as np
-from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from image_match import norm_xcorr2d, pyramid_match  # noqa: E402
+from screen_capture import Capture, capture_screen, get_backend  # noqa: E402
+
+DEFAULT_LOCATE_CACHE = Path("/tmp/itermremote-capture/locate_cache.json")
+
+# Pixels searched around the cached rect before falling back to the wide search.
+PRIOR_PAD = 6
+PRIOR_THRESHOLD = 0.9
 
 
 def activate_panel(repo_root: Path, session_id: str) -> dict:
@@ -47,73 +70,12 @@ def activate_panel(repo_root: Path, session_id: str) -> dict:
     return meta
 
 
-def screencapture_full(out_path: Path) -> None:
-    subprocess.run(["/usr/sbin/screencapture", "-x", str(out_path)], check=True)
-
-
-def to_gray_np(img: Image.Image) -> np.ndarray:
-    return np.asarray(img.convert("L"), dtype=np.float32)
+def screencapture_full(backend=None) -> Capture:
+    return capture_screen(backend)
 
 
-def norm_xcorr2d(search: np.ndarray, templ: np.ndarray) -> tuple[int, int, float]:
-    """Very small NCC matcher.
-
-    Returns (best_y, best_x, best_score).
-
-    Notes:
-    - This is CPU heavy but fine for a constrained search area.
-    - search and templ are grayscale float32.
-    """
-    sh, sw = search.shape
-    th, tw = templ.shape
-    if th <= 0 or tw <= 0 or th > sh or tw > sw:
-        raise ValueError("invalid template/search sizes")
-
-    t = templ
-    t_mean = float(t.mean())
-    t0 = t - t_mean
-    t_norm = float(np.sqrt((t0 * t0).sum()))
-    if t_norm == 0:
-        raise ValueError("template has zero variance")
-
-    best = (-1e9, 0, 0)
-    # Step by 2 pixels for speed; refine around best later.
-    step = 2
-    for y in range(0, sh - th + 1, step):
-        patch_rows = search[y : y + th]
-        for x in range(0, sw - tw + 1, step):
-            p = patch_rows[:, x : x + tw]
-            p_mean = float(p.mean())
-            p0 = p - p_mean
-            p_norm = float(np.sqrt((p0 * p0).sum()))
-            if p_norm == 0:
-                continue
-            score = float((p0 * t0).sum()) / (p_norm * t_norm)
-            if score > best[0]:
-                best = (score, y, x)
-
-    # Local refine in a 10px radius with step=1.
-    _, by, bx = best
-    ry0 = max(0, by - 10)
-    rx0 = max(0, bx - 10)
-    ry1 = min(sh - th, by + 10)
-    rx1 = min(sw - tw, bx + 10)
-    best2 = best
-    for y in range(ry0, ry1 + 1):
-        patch_rows = search[y : y + th]
-        for x in range(rx0, rx1 + 1):
-            p = patch_rows[:, x : x + tw]
-            p_mean = float(p.mean())
-            p0 = p - p_mean
-            p_norm = float(np.sqrt((p0 * p0).sum()))
-            if p_norm == 0:
-                continue
-            score = float((p0 * t0).sum()) / (p_norm * t_norm)
-            if score > best2[0]:
-                best2 = (score, y, x)
-
-    score, y, x = best2
-    return y, x, score
+def to_gray_np(img: Capture) -> np.ndarray:
+    return img.gray()
 
 
 def clamp_rect(x: int, y: int, w: int, h: int, W: int, H: int) -> tuple[int, int, int, int]:
@@ -124,8 +86,78 @@ def clamp_rect(x: int, y: int, w: int, h: int, W: int, H: int) -> tuple[int, int
     return x, y, w, h
 
 
-def locate_window_rect(full_img: Image.Image, meta: dict, debug_dir: Optional[Path]) -> tuple[int, int, int, int]:
-    """Return (x,y,w,h) of iTerm2 window in full screenshot pixel coords."""
+def load_locate_cache(path: Path) -> dict:
+    try:
+        data = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def save_locate_cache(path: Path, cache: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cache, indent=2))
+    os.replace(tmp, path)
+
+
+def template_hash(templ: np.ndarray) -> str:
+    """Hash of a coarse (1/4 scale, 16 grey levels) copy of the template.
+
+    Robust to sub-pixel noise, but changes when the title bar/tab strip does.
+    """
+    h = templ.shape[0] // 4 * 4
+    w = templ.shape[1] // 4 * 4
+    small = templ[:h, :w].reshape(h // 4, 4, w // 4, 4).mean(axis=(1, 3))
+    q = (small // 16).astype(np.uint8)
+    return hashlib.sha1(f"{templ.shape}".encode() + q.tobytes()).hexdigest()[:16]
+
+
+def _match_near(
+    full_img: Capture,
+    templ: np.ndarray,
+    x: int,
+    y: int,
+    pad: int,
+) -> Optional[tuple[int, int, float]]:
+    """Exhaustive match within `pad` pixels of (x, y). Returns (x, y, score) or None."""
+    W, H = full_img.size
+    th, tw = templ.shape
+    x0 = max(0, x - pad)
+    y0 = max(0, y - pad)
+    x1 = min(W - tw, x + pad)
+    y1 = min(H - th, y + pad)
+    if x1 < x0 or y1 < y0:
+        return None
+    search = to_gray_np(full_img.crop((x0, y0, x1 + tw, y1 + th)))
+    try:
+        dy, dx, score = norm_xcorr2d(search, templ)
+    except ValueError:
+        return None
+    return x0 + dx, y0 + dy, score
+
+
+def locate_window_rect(
+    full_img: Capture,
+    meta: dict,
+    debug_dir: Optional[Path],
+    levels: int = 3,
+    match_info: Optional[dict] = None,
+    prior: Optional[dict] = None,
+    prior_threshold: float = PRIOR_THRESHOLD,
+) -> tuple[int, int, int, int]:
+    """Return (x,y,w,h) of iTerm2 window in full screenshot pixel coords.
+
+    `levels` is the pyramid depth (0 = single native-resolution search). When
+    `match_info` is given it is filled with the final score, per-level
+    scores, the template hash and which search produced the result.
+
+    `prior` is a locate-cache entry from an earlier run ({"rect", "guess",
+    "score", "templHash"}); if given, a window of +-PRIOR_PAD px around its
+    rect (shifted by any change of the guess) is tried first and accepted
+    when it scores at least `prior_threshold`. A prior whose template hash
+    differs from the current template is skipped.
+    """
     W, H = full_img.size
 
     rwf = meta["rawWindowFrame"]
@@ -149,6 +181,45 @@ def locate_window_rect(full_img: Image.Image, meta: dict, debug_dir: Optional[Pa
     th = min(120, gh)
     templ_box = (gx, gy, gx + tw, gy + th)
     templ = full_img.crop(templ_box)
+    templ_np = to_gray_np(templ)
+    templ_hash = template_hash(templ_np)
+    if match_info is not None:
+        match_info.update({"templHash": templ_hash, "guess": [gx, gy, gw, gh]})
+
+    templ_changed = bool(prior) and prior.get("templHash") != templ_hash
+    if templ_changed and match_info is not None:
+        match_info["prior"] = {"templChanged": True, "hit": False}
+    if prior and not templ_changed and prior.get("rect") and prior.get("guess"):
+        px, py = int(prior["rect"][0]), int(prior["rect"][1])
+        # The guess moved with the window (resize/move): move the prior along.
+        px += gx - int(prior["guess"][0])
+        py += gy - int(prior["guess"][1])
+        t0 = time.perf_counter()
+        near = _match_near(full_img, templ_np, px, py, PRIOR_PAD)
+        prior_ms = (time.perf_counter() - t0) * 1000.0
+        if match_info is not None:
+            match_info["prior"] = {
+                "rect": [px, py, gw, gh],
+                "score": None if near is None else round(near[2], 6),
+                "ms": round(prior_ms, 3),
+                "templChanged": False,
+                "hit": near is not None and near[2] >= prior_threshold,
+            }
+        if near is not None and near[2] >= prior_threshold:
+            win_x, win_y, score = near
+            if match_info is not None:
+                match_info.update({"score": score, "ms": round(prior_ms, 3), "levels": [], "search": "prior"})
+            if debug_dir:
+                debug_dir.mkdir(parents=True, exist_ok=True)
+                (debug_dir / "match.txt").write_text(
+                    f"score={score}\n"
+                    f"match_ms={prior_ms:.3f}\n"
+                    f"search=prior pad={PRIOR_PAD}\n"
+                    f"guess=({gx},{gy},{gw},{gh})\n"
+                    f"prior=({px},{py})\n"
+                    f"win=({win_x},{win_y},{gw},{gh})\n"
+                )
+            return clamp_rect(win_x, win_y, gw, gh, W, H)
 
     # Search within a padded region around the guess.
     pad = 300
@@ -164,7 +235,11 @@ def locate_window_rect(full_img: Image.Image, meta: dict, debug_dir: Optional[Pa
         templ.save(debug_dir / "templ.png")
         search.save(debug_dir / "search.png")
 
-    y, x, score = norm_xcorr2d(to_gray_np(search), to_gray_np(templ))
+    t0 = time.perf_counter()
+    y, x, score, level_scores = pyramid_match(to_gray_np(search), templ_np, max_levels=levels)
+    match_ms = (time.perf_counter() - t0) * 1000.0
+    if match_info is not None:
+        match_info.update({"score": score, "ms": round(match_ms, 3), "levels": level_scores, "search": "wide"})
 
     # Recovered top-left of template within full image.
     rx = sx0 + x
@@ -180,7 +255,9 @@ def locate_window_rect(full_img: Image.Image, meta: dict, debug_dir: Optional[Pa
     if debug_dir:
         (debug_dir / "match.txt").write_text(
             f"score={score}\n"
-            f"guess=({gx},{gy},{gw},{gh})\n"
+            f"match_ms={match_ms:.3f}\n"
+            + "".join(f"level{r['level']}=({r['x']},{r['y']}) score={r['score']}\n" for r in level_scores)
+            + f"guess=({gx},{gy},{gw},{gh})\n"
             f"search_box=({sx0},{sy0},{sx1},{sy1})\n"
             f"templ_box=({templ_box[0]},{templ_box[1]},{templ_box[2]},{templ_box[3]})\n"
             f"match_tl=({rx},{ry})\n"
@@ -190,7 +267,7 @@ def locate_window_rect(full_img: Image.Image, meta: dict, debug_dir: Optional[Pa
     return clamp_rect(win_x, win_y, win_w, win_h, W, H)
 
 
-def crop_panel(full_img: Image.Image, meta: dict, win_rect: tuple[int, int, int, int]) -> Image.Image:
+def crop_panel(full_img: Capture, meta: dict, win_rect: tuple[int, int, int, int]) -> Capture:
     wf = meta["windowFrame"]
     pf = meta["frame"]
 
@@ -224,6 +301,19 @@ def main() -> int:
     ap.add_argument("session_id")
     ap.add_argument("--out", required=True)
     ap.add_argument("--debug-dir", default=None)
+    ap.add_argument("--levels", type=int, default=3, help="Pyramid levels for window matching (0 = native only)")
+    ap.add_argument(
+        "--locate-cache",
+        default=os.environ.get("ITERMREMOTE_LOCATE_CACHE", str(DEFAULT_LOCATE_CACHE)),
+        help="JSON file with the last window rect per CGWindowID ('' disables)",
+    )
+    ap.add_argument(
+        "--prior-threshold",
+        type=float,
+        default=PRIOR_THRESHOLD,
+        help="Minimum score to accept the cached rect without a wide search",
+    )
+    ap.add_argument("--backend", default=None, help="Capture backend: auto, quartz, screencapture, synthetic")
     args = ap.parse_args()
 
     repo_root = Path(__file__).parent.parent
@@ -235,34 +325,50 @@ def main() -> int:
     meta = activate_panel(repo_root, args.session_id)
     time.sleep(0.25)
 
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as tmp:
-        tmp_path = Path(tmp.name)
+    full_img = screencapture_full(get_backend(args.backend))
 
-    try:
-        screencapture_full(tmp_path)
-        full_img = Image.open(tmp_path)
-
-        win_rect = locate_window_rect(full_img, meta, debug_dir)
-        panel = crop_panel(full_img, meta, win_rect)
-        panel.save(out_path)
-
-        # Emit metadata for inspection.
-        meta_out = {
-            "sessionId": meta.get("sessionId"),
-            "frame": meta.get("frame"),
-            "windowFrame": meta.get("windowFrame"),
-            "rawWindowFrame": meta.get("rawWindowFrame"),
-            "winRect": {"x": win_rect[0], "y": win_rect[1], "w": win_rect[2], "h": win_rect[3]},
-        }
-        (out_path.parent / (out_path.stem + ".meta.json")).write_text(json.dumps(meta_out, indent=2))
+    cache_path = Path(args.locate_cache) if args.locate_cache else None
+    cache_key = str(meta["cgWindowId"]) if meta.get("cgWindowId") else None
+    cache = load_locate_cache(cache_path) if cache_path and cache_key else {}
+    prior = cache.get(cache_key) if cache_key else None
+    if prior and prior.get("imageSize") != list(full_img.size):
+        prior = None  # Different display / scale factor.
 
-        print(f"Saved: {out_path}")
-        return 0
-    finally:
+    match_info: dict = {}
+    win_rect = locate_window_rect(
+        full_img, meta, debug_dir, args.levels, match_info, prior=prior, prior_threshold=args.prior_threshold
+    )
+
+    if cache_path and cache_key:
+        cache[cache_key] = {
+            "rect": list(win_rect),
+            "guess": match_info.get("guess"),
+            "score": round(float(match_info.get("score", 0.0)), 6),
+            "templHash": match_info.get("templHash"),
+            "imageSize": list(full_img.size),
+            "ts": time.time(),
+        }
         try:
-            os.unlink(tmp_path)
-        except OSError:
-            pass
+            save_locate_cache(cache_path, cache)
+        except OSError as e:
+            print(f"warning: locate cache not written: {e}", file=sys.stderr)
+
+    panel = crop_panel(full_img, meta, win_rect)
+    panel.save(out_path)
+
+    # Emit metadata for inspection.
+    meta_out = {
+        "sessionId": meta.get("sessionId"),
+        "frame": meta.get("frame"),
+        "windowFrame": meta.get("windowFrame"),
+        "rawWindowFrame": meta.get("rawWindowFrame"),
+        "winRect": {"x": win_rect[0], "y": win_rect[1], "w": win_rect[2], "h": win_rect[3]},
+        "match": match_info,
+    }
+    (out_path.parent / (out_path.stem + ".meta.json")).write_text(json.dumps(meta_out, indent=2))
+
+    print(f"Saved: {out_path}")
+    return 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Capture every iTerm2 panel in one pass:
+- List panels + frames once via scripts/python/iterm2_sources.py
+- Take one window-only capture per iTerm2 window (by cgWindowId); windows
+  without a usable window capture share a single full-screen capture
+- Crop each panel from its window image (views, see screen_capture.py)
+- Write all crops plus one metadata JSON
+
+Unlike calling capture_panel.py per session, nothing is activated and there
+is no settle sleep per panel: window captures do not need the window to be
+frontmost. Use --activate when falling back to full-screen capture for
+windows that may be covered.
+
+Output:
+  <out_dir>/<NN>_<sessionId>.png
+  <out_dir>/panels.json
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "tools"))
+
+import screen_capture  # noqa: E402
+from capture_panel import capture_window_image, crop_panel_from_full, crop_panel_from_window  # noqa: E402
+
+
+def list_panels():
+    raw = subprocess.check_output([sys.executable, str(REPO_ROOT / "scripts/python/iterm2_sources.py")])
+    data = json.loads(raw)
+    if "error" in data:
+        raise RuntimeError(f"iterm2_sources failed: {data['error']}")
+    return data.get("panels", [])
+
+
+def activate(session_id):
+    subprocess.run(
+        [sys.executable, str(REPO_ROOT / "scripts/python/iterm2_activate_and_crop.py"), session_id],
+        capture_output=True,
+        check=True,
+    )
+
+
+def group_by_window(panels):
+    """windowId -> panels, in first-seen order; panels without frames are skipped."""
+    windows = {}
+    for p in panels:
+        if not p.get("frame") or not p.get("windowFrame") or not p.get("rawWindowFrame"):
+            continue
+        windows.setdefault(p.get("windowId"), []).append(p)
+    return windows
+
+
+def _file_name(index, session_id):
+    safe = re.sub(r"[^A-Za-z0-9._-]+", "_", str(session_id))
+    return f"{index:02d}_{safe}.png"
+
+
+def capture_all(panels, out_dir, backend, use_activate=False):
+    """Capture and crop every panel. Returns the metadata dict."""
+    windows = group_by_window(panels)
+    screen = None
+    win_meta = []
+    out_panels = []
+
+    for window_id, group in windows.items():
+        first = group[0]
+        t0 = time.perf_counter()
+        image = capture_window_image(first, backend)
+        mode = "window"
+        if image is None:
+            if use_activate:
+                activate(first["id"])
+                screen = None  # Window order changed; take a fresh screenshot.
+            if screen is None:
+                screen = screen_capture.capture_screen(backend)
+            image = screen
+            mode = "screen"
+        capture_ms = (time.perf_counter() - t0) * 1000.0
+        win_meta.append({
+            "windowId": window_id,
+            "cgWindowId": first.get("cgWindowId"),
+            "mode": mode,
+            "size": list(image.size),
+            "bytes": image.nbytes,
+            "captureMs": round(capture_ms, 3),
+        })
+
+        for p in group:
+            crop = crop_panel_from_window(image, p) if mode == "window" else crop_panel_from_full(image, p)
+            name = _file_name(len(out_panels), p["id"])
+            crop.save(out_dir / name)
+            out_panels.append({
+                "sessionId": p["id"],
+                "title": p.get("title"),
+                "windowId": window_id,
+                "cgWindowId": p.get("cgWindowId"),
+                "file": name,
+                "mode": mode,
+                "crop": {"x": crop.origin[0], "y": crop.origin[1], "w": crop.size[0], "h": crop.size[1]},
+                "frame": p.get("frame"),
+                "windowFrame": p.get("windowFrame"),
+                "rawWindowFrame": p.get("rawWindowFrame"),
+            })
+
+    return {
+        "backend": getattr(backend, "name", None),
+        "capturedAt": time.time(),
+        "windows": win_meta,
+        "panels": out_panels,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Capture all iTerm2 panels from one screenshot per window")
+    ap.add_argument("out_dir")
+    ap.add_argument("--sessions", default=None, help="Comma-separated session ids (default: all)")
+    ap.add_argument("--backend", default=None, help="Capture backend: auto, quartz, screencapture, synthetic")
+    ap.add_argument("--activate", action="store_true", help="Raise windows before full-screen fallback captures")
+    args = ap.parse_args()
+
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    panels = list_panels()
+    if args.sessions:
+        wanted = set(args.sessions.split(","))
+        panels = [p for p in panels if p.get("id") in wanted]
+    if not panels:
+        print("No panels found", file=sys.stderr)
+        return 1
+    list_ms = (time.perf_counter() - t0) * 1000.0
+
+    meta = capture_all(panels, out_dir, screen_capture.get_backend(args.backend), args.activate)
+    meta["listMs"] = round(list_ms, 3)
+    meta["totalMs"] = round((time.perf_counter() - t0) * 1000.0, 3)
+    (out_dir / "panels.json").write_text(json.dumps(meta, indent=2))
+
+    print(f"Saved {len(meta['panels'])} panel(s) from {len(meta['windows'])} window(s) to {out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
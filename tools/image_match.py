@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Normalized cross-correlation (NCC) template matching in NumPy.
+
+Used by capture_panel_v2.py to find the iTerm2 window inside a screenshot.
+
+For a template T (th x tw, mean-subtracted T0) and every offset (y, x) of the
+search image S, NCC is
+
+    sum(P * T0) / (||P - mean(P)|| * ||T0||)
+
+where P is the search patch at (y, x). The numerator is one correlation of S
+with T0, done with a real FFT for all offsets at once. The patch norms come
+from summed-area tables of S and S**2, so each offset costs O(1) instead of
+O(th * tw). Total cost is O(S log S) regardless of template size.
+
+Requires: numpy
+"""
+
+import numpy as np
+
+# Patches whose variance is below this (per pixel, in grey levels^2) are flat
+# and get score -inf, like the zero-norm skip in the original matcher.
+FLAT_VARIANCE = 1e-6
+
+
+def _fast_len(n: int) -> int:
+    """Smallest 5-smooth integer >= n (cheap FFT size)."""
+    best = 1 << max(0, (n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            p = p35
+            while p < n:
+                p *= 2
+            best = min(best, p)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+def _window_sums(a: np.ndarray, th: int, tw: int) -> np.ndarray:
+    """Sum of `a` over every th x tw window, via a summed-area table."""
+    sat = np.zeros((a.shape[0] + 1, a.shape[1] + 1), dtype=np.float64)
+    np.cumsum(a, axis=0, out=sat[1:, 1:])
+    np.cumsum(sat[1:, 1:], axis=1, out=sat[1:, 1:])
+    out = sat[th:, tw:] - sat[:-th, tw:]
+    out -= sat[th:, :-tw]
+    out += sat[:-th, :-tw]
+    return out
+
+
+def _check(search: np.ndarray, templ: np.ndarray) -> None:
+    if search.ndim != 2 or templ.ndim != 2:
+        raise ValueError("search and template must be 2-D grayscale arrays")
+    sh, sw = search.shape
+    th, tw = templ.shape
+    if th <= 0 or tw <= 0 or th > sh or tw > sw:
+        raise ValueError("invalid template/search sizes")
+
+
+def ncc_map(search: np.ndarray, templ: np.ndarray) -> np.ndarray:
+    """NCC score for every valid offset: shape (sh - th + 1, sw - tw + 1).
+
+    Flat (zero-variance) patches score -inf.
+    """
+    _check(search, templ)
+    s = np.asarray(search, dtype=np.float64)
+    t = np.asarray(templ, dtype=np.float64)
+    sh, sw = s.shape
+    th, tw = t.shape
+    n = float(th * tw)
+
+    t0 = t - t.mean()
+    t_norm = float(np.sqrt((t0 * t0).sum()))
+    if t_norm == 0:
+        raise ValueError("template has zero variance")
+
+    # Valid-region correlation via circular FFT: offsets with y <= sh - th and
+    # x <= sw - tw never wrap, so a transform of the search size is enough.
+    fh = _fast_len(sh)
+    fw = _fast_len(sw)
+    fs = np.fft.rfft2(s, s=(fh, fw))
+    ft = np.fft.rfft2(t0, s=(fh, fw))
+    corr = np.fft.irfft2(fs * np.conj(ft), s=(fh, fw))[: sh - th + 1, : sw - tw + 1]
+
+    # Patch variance * n from window sums of S and S**2 (in place: these are
+    # full-screenshot-sized arrays).
+    sums = _window_sums(s, th, tw)
+    var = _window_sums(np.square(s), th, tw)
+    sums *= sums
+    sums /= n
+    var -= sums
+    del sums
+    flat = var <= FLAT_VARIANCE * n
+    var[flat] = 1.0
+    np.sqrt(var, out=var)
+    var *= t_norm
+    score = np.divide(corr, var)
+    score[flat] = -np.inf
+    return score
+
+
+def best_match(score: np.ndarray) -> tuple[int, int, float]:
+    """(y, x, score) of the maximum of an NCC map (first one on ties)."""
+    idx = int(np.argmax(score))
+    y, x = divmod(idx, score.shape[1])
+    return y, x, float(score[y, x])
+
+
+def norm_xcorr2d(search: np.ndarray, templ: np.ndarray) -> tuple[int, int, float]:
+    """Exhaustive NCC match. Returns (best_y, best_x, best_score).
+
+    Same contract as the original loop-based matcher in capture_panel_v2.py,
+    but every offset is scored (no step-2 scan + local refine).
+    """
+    return best_match(ncc_map(search, templ))
+
+
+# --- coarse-to-fine search ---------------------------------------------------
+
+# Do not shrink the template below this many pixels on either side; smaller
+# templates stop being distinctive.
+MIN_PYRAMID_TEMPL = 12
+
+
+def downsample2(a: np.ndarray) -> np.ndarray:
+    """Halve both dimensions by averaging 2x2 blocks (odd edges dropped)."""
+    h = a.shape[0] // 2 * 2
+    w = a.shape[1] // 2 * 2
+    a = np.asarray(a[:h, :w], dtype=np.float32)
+    return a.reshape(h // 2, 2, w // 2, 2).mean(axis=(1, 3))
+
+
+def pyramid_levels(templ_shape: tuple[int, int], max_levels: int = 3) -> int:
+    """How many 2x reductions the template can take (0 = native only)."""
+    th, tw = templ_shape
+    levels = 0
+    while levels < max_levels and min(th, tw) // 2 >= MIN_PYRAMID_TEMPL:
+        th //= 2
+        tw //= 2
+        levels += 1
+    return levels
+
+
+def _peaks(score: np.ndarray, k: int, sep_y: int, sep_x: int) -> list:
+    """Up to `k` local maxima of `score`, at least sep_y/sep_x apart."""
+    m = score.copy()
+    out = []
+    for _ in range(k):
+        y, x, v = best_match(m)
+        if not np.isfinite(v):
+            break
+        out.append((y, x, v))
+        m[max(0, y - sep_y):y + sep_y + 1, max(0, x - sep_x):x + sep_x + 1] = -np.inf
+    return out
+
+
+def pyramid_match(
+    search: np.ndarray,
+    templ: np.ndarray,
+    max_levels: int = 3,
+    radius: int = 3,
+    candidates: int = 5,
+    min_score: float = 0.8,
+) -> tuple[int, int, float, list]:
+    """Coarse-to-fine NCC match. Returns (y, x, score, levels).
+
+    The full search runs only at the coarsest level (up to 1/2**max_levels
+    scale). The best `candidates` coarse peaks are each refined: every finer
+    level re-scores offsets within `radius` pixels of the upscaled previous
+    best. The candidate with the best native-resolution score wins.
+
+    If the final score is below `min_score` (the coarse level was too blurry
+    to tell candidates apart) the search is repeated with one level less,
+    down to a plain native-resolution search.
+
+    `levels` lists, coarsest first, one record per level for the winning
+    candidate: {"level", "scale", "y", "x", "score", "searched"}, with y/x in
+    that level's pixels and `searched` the number of offsets scored there.
+    Records of abandoned attempts are kept with "retried": true.
+    """
+    _check(search, templ)
+    n = min(max_levels, pyramid_levels(templ.shape, max_levels))
+    y, x, score, records = _pyramid_once(search, templ, n, radius, candidates)
+    if score < min_score and n > 0:
+        y, x, score, finer = pyramid_match(search, templ, n - 1, radius, candidates, min_score)
+        records = [dict(r, retried=True) for r in records] + finer
+    return y, x, score, records
+
+
+def _pyramid_once(search, templ, n, radius, candidates):
+    searches = [np.asarray(search, dtype=np.float32)]
+    templs = [np.asarray(templ, dtype=np.float32)]
+    for _ in range(n):
+        searches.append(downsample2(searches[-1]))
+        templs.append(downsample2(templs[-1]))
+
+    def record(level, y, x, score, searched):
+        return {
+            "level": level,
+            "scale": 1.0 / (1 << level),
+            "y": int(y),
+            "x": int(x),
+            "score": round(float(score), 6),
+            "searched": int(searched),
+        }
+
+    coarse = ncc_map(searches[n], templs[n])
+    th, tw = templs[n].shape
+    best = None
+    for cy0, cx0, cscore in _peaks(coarse, max(1, candidates), th // 2, tw // 2):
+        y, x, score = cy0, cx0, cscore
+        records = [record(n, y, x, score, coarse.size)]
+        for level in range(n - 1, -1, -1):
+            s = searches[level]
+            t = templs[level]
+            sh, sw = s.shape
+            lh, lw = t.shape
+            cy = min(y * 2, sh - lh)
+            cx = min(x * 2, sw - lw)
+            y0 = max(0, cy - radius)
+            x0 = max(0, cx - radius)
+            y1 = min(sh - lh, cy + radius)
+            x1 = min(sw - lw, cx + radius)
+            m = ncc_map(s[y0:y1 + lh, x0:x1 + lw], t)
+            dy, dx, score = best_match(m)
+            y, x = y0 + dy, x0 + dx
+            records.append(record(level, y, x, score, m.size))
+        if best is None or score > best[2]:
+            best = (int(y), int(x), float(score), records)
+    if best is None:
+        raise ValueError("search region has no textured patch")
+    return best
@@ -1,48 +1,169 @@
 #!/usr/bin/env python3
+"""List on-screen top-level windows (iTerm2 / Flutter host) with CGWindowIDs.
+
+Window lists come from the providers shared with the CGWindowID lookup in
+scripts/python/cg_window_resolver.py:
+
+- quartz: CGWindowListCopyWindowInfo in-process (PyObjC), no compiler needed.
+- swift:  a small Swift helper, compiled once into
+          /tmp/itermremote-list-windows/list_windows-<source hash> and reused
+          until the source changes.
+- mock:   windows from a JSON file (ITERMREMOTE_WINDOWS_MOCK or --mock), for
+          Linux tests. Either a list of provider dicts or
+          {"windows": [...], "screenHeight": ...}.
+
+"auto" uses mock when ITERMREMOTE_WINDOWS_MOCK is set, else quartz, else swift.
+
+Output (one line per window, unchanged from the original tool):
+  <windowNumber>\\t<owner>\\t<name>\\t<bounds dict>
+or a JSON array of {"windowNumber", "owner", "name", "bounds"} with --json.
+"""
+
+import argparse
+import hashlib
 import json
+import os
 import subprocess
 import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts" / "python"))
+
+from cg_window_resolver import FakeWindowProvider, Quartz, QuartzWindowProvider  # noqa: E402
+
+MOCK_ENV = "ITERMREMOTE_WINDOWS_MOCK"
+BUILD_DIR = Path("/tmp/itermremote-list-windows")
 
-swift_code = '''
-import Cocoa
+OWNER_MATCH = ("iterm", "flutter", "host")
+MAX_WINDOWS = 200
+
+SWIFT_SOURCE = '''
 import CoreGraphics
 import Foundation
 
 let options: CGWindowListOption = [.optionOnScreenOnly, .excludeDesktopElements]
-guard let infoList = CGWindowListCopyWindowInfo(options, kCGNullWindowID) as? [[String: Any]] else {
-    print("[]")
-    exit(0)
-}
+let infoList = (CGWindowListCopyWindowInfo(options, kCGNullWindowID) as? [[String: Any]]) ?? []
 var result: [[String: Any]] = []
-for w in infoList.prefix(200):
-    let num = w[kCGWindowNumber as String] as? Int ?? -1
-    let owner = w[kCGWindowOwnerName as String] as? String ?? ""
-    let name = w[kCGWindowName as String] as? String ?? ""
-    let layer = w[kCGWindowLayer as String] as? Int ?? 0
+for w in infoList {
     let bounds = w[kCGWindowBounds as String] as? [String: Any] ?? [:]
-    # Only include top-level windows (layer 0)
-    if layer == 0 and (owner.lowercased().contains("iterm") or owner.lowercased().contains("flutter") or owner.lowercased().contains("host")):
-        result.append([
-            "windowNumber": num,
-            "owner": owner,
-            "name": name,
-            "bounds": bounds
-        ])
+    result.append([
+        "id": w[kCGWindowNumber as String] as? Int ?? -1,
+        "owner": w[kCGWindowOwnerName as String] as? String ?? "",
+        "pid": w[kCGWindowOwnerPID as String] as? Int ?? 0,
+        "title": w[kCGWindowName as String] as? String ?? "",
+        "layer": w[kCGWindowLayer as String] as? Int ?? 0,
+        "x": bounds["X"] as? Double ?? 0,
+        "y": bounds["Y"] as? Double ?? 0,
+        "w": bounds["Width"] as? Double ?? 0,
+        "h": bounds["Height"] as? Double ?? 0,
+    ])
+}
 let data = try JSONSerialization.data(withJSONObject: result)
 print(String(data: data, encoding: .utf8) ?? "[]")
 '''
 
-# Compile and run
-proc = subprocess.run(["swiftc", "-", "-o", "/tmp/list_windows"], input=swift_code.encode(), capture_output=True)
-if proc.returncode != 0:
-    print("Compilation failed:", proc.stderr.decode(), file=sys.stderr)
-    sys.exit(1)
 
-proc = subprocess.run(["/tmp/list_windows"], capture_output=True, text=True)
-try:
-    windows = json.loads(proc.stdout)
+class SwiftWindowProvider:
+    """CGWindowListCopyWindowInfo through a cached compiled Swift helper."""
+
+    def __init__(self, build_dir=BUILD_DIR, source=SWIFT_SOURCE):
+        self.build_dir = Path(build_dir)
+        self.source = source
+
+    def binary(self) -> Path:
+        digest = hashlib.sha256(self.source.encode()).hexdigest()[:16]
+        path = self.build_dir / f"list_windows-{digest}"
+        if path.exists():
+            return path
+        self.build_dir.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        proc = subprocess.run(["swiftc", "-O", "-", "-o", str(tmp)], input=self.source.encode(), capture_output=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"Compilation failed: {proc.stderr.decode()}")
+        os.replace(tmp, path)
+        return path
+
+    def screen_height(self):
+        return None
+
+    def list_windows(self):
+        proc = subprocess.run([str(self.binary())], capture_output=True, text=True, check=True)
+        return json.loads(proc.stdout)
+
+
+def mock_provider(path) -> FakeWindowProvider:
+    data = json.loads(Path(path).read_text())
+    if isinstance(data, dict):
+        return FakeWindowProvider(data.get("windows", []), data.get("screenHeight"))
+    return FakeWindowProvider(data)
+
+
+def get_provider(name="auto", mock=None):
+    mock = mock or os.environ.get(MOCK_ENV)
+    if name == "auto":
+        name = "mock" if mock else ("quartz" if Quartz is not None else "swift")
+    if name == "mock":
+        if not mock:
+            raise RuntimeError(f"mock provider needs --mock or {MOCK_ENV}")
+        return mock_provider(mock)
+    if name == "quartz":
+        return QuartzWindowProvider()
+    if name == "swift":
+        return SwiftWindowProvider()
+    raise RuntimeError(f"unknown provider: {name}")
+
+
+def _num(v):
+    v = float(v)
+    return int(v) if v.is_integer() else v
+
+
+def list_windows(provider, owners=OWNER_MATCH):
+    """Top-level windows whose owner matches, in front-to-back order."""
+    out = []
+    for w in provider.list_windows()[:MAX_WINDOWS]:
+        owner = str(w.get("owner") or "")
+        if int(w.get("layer") or 0) != 0:
+            continue
+        if owners and not any(o in owner.lower() for o in owners):
+            continue
+        out.append({
+            "windowNumber": int(w.get("id", -1)),
+            "owner": owner,
+            "name": str(w.get("title") or ""),
+            "bounds": {
+                "Height": _num(w.get("h", 0)),
+                "Width": _num(w.get("w", 0)),
+                "X": _num(w.get("x", 0)),
+                "Y": _num(w.get("y", 0)),
+            },
+        })
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="List on-screen iTerm2 / host windows")
+    ap.add_argument("--provider", choices=["auto", "quartz", "swift", "mock"], default="auto")
+    ap.add_argument("--mock", default=None, help=f"JSON window list for the mock provider (or {MOCK_ENV})")
+    ap.add_argument("--all", action="store_true", help="Do not filter by owner")
+    ap.add_argument("--json", action="store_true")
+    args = ap.parse_args()
+
+    try:
+        provider = get_provider(args.provider, args.mock)
+        windows = list_windows(provider, () if args.all else OWNER_MATCH)
+    except Exception as e:
+        print(f"Failed to list windows: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(windows, ensure_ascii=False))
+        return 0
     for w in windows:
         print(f"{w['windowNumber']}\t{w['owner']}\t{w['name']}\t{w['bounds']}")
-except Exception as e:
-    print("Failed to parse output:", e, file=sys.stderr)
-    print("stdout:", proc.stdout[:500], file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
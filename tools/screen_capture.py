@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""In-memory screen / window capture.
+
+The capture tools used to run `screencapture` into a temporary PNG and decode
+it again with PIL before cropping. This module hands back the raw pixels
+instead, as a `Capture`: a NumPy (H, W, 4) uint8 array plus its channel
+order. `Capture.crop()` takes a PIL-style box and returns another `Capture`
+that is a view into the same buffer, so window -> panel crops copy nothing.
+Pixels are only converted (`to_image()`, `gray()`) or encoded (`save()`)
+when the caller asks for it.
+
+Backends (ITERMREMOTE_CAPTURE_BACKEND, default "auto"):
+
+- quartz:        CGWindowListCreateImage via PyObjC; the CGImage bytes are
+                 wrapped without copying (BGRA).
+- screencapture: /usr/sbin/screencapture to an uncompressed BMP temp file
+                 (no PNG encode/decode); fallback when Quartz is unavailable.
+- synthetic:     a NumPy image held in memory, with window rects registered
+                 by CGWindowID. For Linux / tests; ITERMREMOTE_CAPTURE_SYNTHETIC
+                 may point at an image file to use as the screen.
+
+"auto" picks quartz when PyObjC is importable, screencapture on other macOS
+systems and synthetic elsewhere.
+
+Requires: numpy, Pillow (only for to_image()/save()/the screencapture backend)
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+try:
+    import Quartz
+except Exception:
+    Quartz = None
+
+BACKEND_ENV = "ITERMREMOTE_CAPTURE_BACKEND"
+SYNTHETIC_ENV = "ITERMREMOTE_CAPTURE_SYNTHETIC"
+SCREENCAPTURE = "/usr/sbin/screencapture"
+
+# ITU-R 601 luma, the same weights PIL uses for convert("L").
+_LUMA = {"R": 0.299, "G": 0.587, "B": 0.114}
+
+
+class CaptureError(RuntimeError):
+    pass
+
+
+class Capture:
+    """Raw pixels of a screen or window capture.
+
+    `pixels` is an (H, W, 4) uint8 array in `order` ("RGBA" or "BGRA"); it may
+    be a view into a larger capture (see `crop`). `origin` is the (x, y) of
+    pixel (0, 0) in the capture this was cropped from.
+    """
+
+    def __init__(self, pixels: np.ndarray, order: str = "RGBA", origin: tuple[int, int] = (0, 0), source: str = ""):
+        if pixels.ndim != 3 or pixels.shape[2] != 4 or pixels.dtype != np.uint8:
+            raise ValueError(f"expected (H, W, 4) uint8 pixels, got {pixels.shape} {pixels.dtype}")
+        if order not in ("RGBA", "BGRA"):
+            raise ValueError(f"unsupported channel order: {order}")
+        self.pixels = pixels
+        self.order = order
+        self.origin = origin
+        self.source = source
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """(width, height), like PIL's Image.size."""
+        return self.pixels.shape[1], self.pixels.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.pixels.shape[0] * self.pixels.shape[1] * 4)
+
+    def crop(self, box: tuple[int, int, int, int]) -> "Capture":
+        """View of (left, upper, right, lower), clamped to the image. No copy."""
+        W, H = self.size
+        left, upper, right, lower = (int(v) for v in box)
+        left = max(0, min(left, W))
+        upper = max(0, min(upper, H))
+        right = max(left, min(right, W))
+        lower = max(upper, min(lower, H))
+        return Capture(
+            self.pixels[upper:lower, left:right],
+            self.order,
+            (self.origin[0] + left, self.origin[1] + upper),
+            self.source,
+        )
+
+    def rgb(self) -> np.ndarray:
+        """(H, W, 3) RGB view (negative channel stride for BGRA, no copy)."""
+        if self.order == "RGBA":
+            return self.pixels[:, :, :3]
+        return self.pixels[:, :, 2::-1]
+
+    def gray(self) -> np.ndarray:
+        """float32 luma, same scale as np.asarray(img.convert("L"))."""
+        p = self.pixels
+        out = np.zeros(p.shape[:2], dtype=np.float32)
+        for i, ch in enumerate(self.order[:3]):
+            out += p[:, :, i] * np.float32(_LUMA[ch])
+        return out
+
+    def _row_buffer(self):
+        """(buffer, row stride) covering this view's rows in the parent buffer."""
+        p = self.pixels
+        h, w, _ = p.shape
+        if p.strides[1:] != (4, 1) or h == 0 or w == 0:
+            p = np.ascontiguousarray(p)
+            return p, w * 4
+        stride = p.strides[0]
+        span = stride * (h - 1) + w * 4
+        flat = np.lib.stride_tricks.as_strided(p, shape=(span,), strides=(1,), writeable=False)
+        return flat, stride
+
+    def to_image(self):
+        """PIL image (RGBA) read straight from the pixel buffer."""
+        from PIL import Image
+
+        buf, stride = self._row_buffer()
+        w, h = self.size
+        try:
+            return Image.frombuffer("RGBA", (w, h), buf, "raw", self.order, stride, 1)
+        except ValueError:
+            # Older Pillow wants the buffer to cover a full stride on the last row.
+            buf = np.ascontiguousarray(self.pixels)
+            return Image.frombuffer("RGBA", (w, h), buf, "raw", self.order, 0, 1)
+
+    def save(self, path, **kwargs) -> None:
+        self.to_image().save(str(path), **kwargs)
+
+
+def _from_pil(img, source: str) -> Capture:
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    return Capture(np.asarray(img), "RGBA", source=source)
+
+
+class ScreencaptureBackend:
+    """/usr/sbin/screencapture into an uncompressed BMP."""
+
+    name = "screencapture"
+
+    def _run(self, flags: list) -> Capture:
+        from PIL import Image
+
+        fd, path = tempfile.mkstemp(prefix="itermremote-capture-", suffix=".bmp")
+        os.close(fd)
+        try:
+            subprocess.run([SCREENCAPTURE, "-x", "-t", "bmp"] + flags + [path], check=True)
+            with Image.open(path) as img:
+                img.load()
+                return _from_pil(img, self.name)
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise CaptureError(f"screencapture failed: {e}") from e
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def capture_screen(self) -> Capture:
+        return self._run([])
+
+    def capture_window(self, cg_window_id: int, shadow: bool = False) -> Capture:
+        return self._run(["-l", str(int(cg_window_id))] + ([] if shadow else ["-o"]))
+
+
+class QuartzBackend:
+    """CGWindowListCreateImage; pixels are a view of the CGImage's bytes."""
+
+    name = "quartz"
+
+    def __init__(self):
+        if Quartz is None:
+            raise CaptureError("Quartz (pyobjc) is not available")
+
+    def _wrap(self, image) -> Capture:
+        if image is None:
+            raise CaptureError("CGWindowListCreateImage returned no image (screen recording permission?)")
+        w = int(Quartz.CGImageGetWidth(image))
+        h = int(Quartz.CGImageGetHeight(image))
+        bpr = int(Quartz.CGImageGetBytesPerRow(image))
+        if int(Quartz.CGImageGetBitsPerPixel(image)) != 32:
+            raise CaptureError("unexpected CGImage pixel format")
+        data = Quartz.CGDataProviderCopyData(Quartz.CGImageGetDataProvider(image))
+        rows = np.frombuffer(data, dtype=np.uint8)[: bpr * h].reshape(h, bpr // 4, 4)
+        # Screen images are 32-bit little-endian premultiplied-first: BGRA.
+        return Capture(rows[:, :w], "BGRA", source=self.name)
+
+    def capture_screen(self) -> Capture:
+        rect = Quartz.CGDisplayBounds(Quartz.CGMainDisplayID())
+        image = Quartz.CGWindowListCreateImage(
+            rect,
+            Quartz.kCGWindowListOptionOnScreenOnly,
+            Quartz.kCGNullWindowID,
+            Quartz.kCGWindowImageBestResolution,
+        )
+        return self._wrap(image)
+
+    def capture_window(self, cg_window_id: int, shadow: bool = False) -> Capture:
+        opts = Quartz.kCGWindowImageBestResolution
+        if not shadow:
+            opts |= Quartz.kCGWindowImageBoundsIgnoreFraming
+        image = Quartz.CGWindowListCreateImage(
+            Quartz.CGRectNull,
+            Quartz.kCGWindowListOptionIncludingWindow,
+            int(cg_window_id),
+            opts,
+        )
+        return self._wrap(image)
+
+
+class SyntheticBackend:
+    """In-memory screen for tests: `screen` is (H, W, 4) RGBA uint8.
+
+    `windows` maps CGWindowID -> (x, y, w, h) in screen pixels.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, screen: Optional[np.ndarray] = None, windows: Optional[dict] = None, seed: int = 0):
+        if screen is None:
+            rng = np.random.default_rng(seed)
+            screen = rng.integers(0, 256, size=(900, 1440, 4), dtype=np.uint8)
+            screen[:, :, 3] = 255
+        self.screen = screen
+        self.windows = dict(windows or {})
+        self.calls = 0
+
+    @classmethod
+    def from_file(cls, path, windows: Optional[dict] = None) -> "SyntheticBackend":
+        from PIL import Image
+
+        with Image.open(path) as img:
+            return cls(np.array(img.convert("RGBA")), windows)
+
+    def capture_screen(self) -> Capture:
+        self.calls += 1
+        return Capture(self.screen, "RGBA", source=self.name)
+
+    def capture_window(self, cg_window_id: int, shadow: bool = False) -> Capture:
+        self.calls += 1
+        rect = self.windows.get(int(cg_window_id))
+        if rect is None:
+            raise CaptureError(f"no synthetic window {cg_window_id}")
+        x, y, w, h = rect
+        win = Capture(self.screen, "RGBA", source=self.name).crop((x, y, x + w, y + h))
+        return Capture(win.pixels, win.order, source=self.name)
+
+
+def get_backend(name: Optional[str] = None):
+    """Backend by name (quartz/screencapture/synthetic/auto)."""
+    name = (name or os.environ.get(BACKEND_ENV) or "auto").strip().lower()
+    if name == "auto":
+        if Quartz is not None:
+            name = "quartz"
+        elif sys.platform == "darwin":
+            name = "screencapture"
+        else:
+            name = "synthetic"
+    if name == "quartz":
+        return QuartzBackend()
+    if name == "screencapture":
+        return ScreencaptureBackend()
+    if name == "synthetic":
+        path = os.environ.get(SYNTHETIC_ENV)
+        return SyntheticBackend.from_file(Path(path)) if path else SyntheticBackend()
+    raise CaptureError(f"unknown capture backend: {name}")
+
+
+def capture_screen(backend=None) -> Capture:
+    backend = backend or get_backend()
+    try:
+        return backend.capture_screen()
+    except CaptureError:
+        if not isinstance(backend, QuartzBackend):
+            raise
+        return ScreencaptureBackend().capture_screen()
+
+
+def capture_window(cg_window_id: int, shadow: bool = False, backend=None) -> Capture:
+    backend = backend or get_backend()
+    try:
+        return backend.capture_window(cg_window_id, shadow=shadow)
+    except CaptureError:
+        if not isinstance(backend, QuartzBackend):
+            raise
+        return ScreencaptureBackend().capture_window(cg_window_id, shadow=shadow)